@@ -11,6 +11,12 @@ PROJECT_ROOT = BASE_DIR
 BUILD_DIR = os.path.join(PROJECT_ROOT, 'build')
 DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
 RESULTS_DIR = os.path.join(PROJECT_ROOT, 'results')
+LANDMARK_DIR = os.path.join(DATA_DIR, 'landmarks')     # Кэш таблиц ориентиров ALT (.lm)
+CPD_DIR = os.path.join(DATA_DIR, 'cpd')                 # Таблицы первых ходов CPD (.cpd)
+SNAPSHOT_DIR = os.path.join(DATA_DIR, 'snapshots')     # Снимки планировщиков (.pfs)
+RESULTS_STORE_DIR = os.path.join(DATA_DIR, 'results_store')  # Строки exp по ключу конфигурации (докачка прогонов)
+MAP_CACHE_DIR = os.path.join(BUILD_DIR, 'map_cache')  # Разобранные карты (.npy по хэшу содержимого)
+SCEN_CACHE_DIR = os.path.join(BUILD_DIR, 'scen_cache')  # Сценарии по колонкам (.npz по хэшу содержимого)
 
 sys.path.append(BUILD_DIR)
 
@@ -24,6 +30,8 @@ except ImportError:
 CONNECTIVITY = 8                            # 4 или 8
 MAP_TYPES = ['maze', 'random', 'my_random']    # Типы карт. Добавьте свое, если положили в data
 RADIUS = 5                                  # для окна вокруг агента 11*11 должно быть 5. влияет пока только на подсчет cost2go
+LANDMARK_COUNT = 8                          # Число ориентиров для эвристики ALT (HeuristicType.Landmark)
+COMPACT_MODE = False                        # Компактный режим поиска (uint32 стоимости, 8 байт/клетка). Для карт 4096² и больше
 
 
 # --- 3. НАСТРОЙКИ ПО УМОЛЧАНИЮ (DEFAULTS) ---
@@ -36,6 +44,8 @@ DEFAULT_ALGO = "astar"
 DEFAULT_VISUAL_ID = 1000
 # Сколько задач показывать подряд, если ID не задан
 DEFAULT_VISUAL_LIMIT = 1  
+# Тепловая карта раскрытий: пишем каждое k-е раскрытие (0 — без трассы)
+VISUAL_TRACE_STRIDE = 1
 
 DEFAULT_MAP = os.path.join(DATA_DIR, 'map', DEFAULT_MAP_NAME)
 DEFAULT_SCEN = os.path.join(DATA_DIR, 'scen', DEFAULT_SCEN_NAME)
@@ -48,6 +58,15 @@ EXP_SAMPLING_MODE = 'uniform'                 # 'all', 'uniform', 'first', 'last
 EXP_SAMPLING_COUNT = 2000                # Количество задач
 EXP_TARGET_MAP =  "random512-10-0.map"    # Имя карты или None (все). ["maze512-1-0.map", "random512-40-0.map", "Moscow_0_256.map" ]
 EXPERIMENT_CONNECTIVITIES = [8]           # [4, 8]. Для лабиринта лучше ставить 4
+EXP_THREADS = 1                           # Потоков C++ для find_paths (1 — точные замеры времени, 0 = все ядра). Больше потоков — через --threads
+EXP_JOBS = 1                              # Процессов для exp (--jobs). При >1 и --threads 0 find_paths в каждом процессе все равно в 1 поток
+EXP_JOB_CHUNK = 500                       # Задач в одной единице работы процесса
+EXP_WORKER_PLANNERS = 4                   # Сколько планировщиков (карт) держит в памяти каждый процесс
+EXP_PIN_WORKERS = False                   # Привязать каждый процесс к своему ядру (--pin, только Linux)
+EXPERIMENT_QUEUES = ["binary"]            # Открытые списки (ключи QUEUE_REGISTRY). ["binary", "dary", "bucket", "radix"]
+ARA_DEADLINE_MS = 50                      # Дедлайн anytime ARA* на задачу (мс), 0 — до оптимума
+EXP_MAX_EXPANSIONS = 0                    # Бюджет раскрытий на задачу (0 — без ограничения). Прерванные задачи: Success=False, StopReason в CSV
+EXP_DEADLINE_MS = 0                       # Бюджет времени на задачу (мс) для всех алгоритмов, кроме ARA* (0 — без ограничения)
 
 
 # --- 4. РЕЕСТР АЛГОРИТМОВ ---
@@ -60,19 +79,45 @@ if pfc:
         "manhattan":(pfc.AlgorithmType.AStar,    pfc.HeuristicType.Manhattan, 1.0),
         "euclid":   (pfc.AlgorithmType.AStar,    pfc.HeuristicType.Euclidean, 1.0),
         "wastar":   (pfc.AlgorithmType.WAStar,   pfc.HeuristicType.Octile,    1.5),
+        "jps":      (pfc.AlgorithmType.JPS,      pfc.HeuristicType.Octile,    1.0),
+        "jps+":     (pfc.AlgorithmType.JPSPlus,  pfc.HeuristicType.Octile,    1.0),
+        "bidijkstra":(pfc.AlgorithmType.BiDijkstra, pfc.HeuristicType.Zero,   1.0),
+        "biastar":  (pfc.AlgorithmType.BiAStar,  pfc.HeuristicType.Octile,    1.0),
+        "alt":      (pfc.AlgorithmType.AStar,    pfc.HeuristicType.Landmark,  1.0),
+        "hpa":      (pfc.AlgorithmType.HPA,      pfc.HeuristicType.Octile,    1.0),
+        "cpd":      (pfc.AlgorithmType.CPD,      pfc.HeuristicType.Octile,    1.0),
+        "ara":      (pfc.AlgorithmType.ARA,      pfc.HeuristicType.Octile,    5.0),
+        "dstar":    (pfc.AlgorithmType.DStarLite, pfc.HeuristicType.Octile,   1.0),
     }
     
+    # Реестр открытых списков. bucket/radix — только для Dijkstra (h = 0),
+    # для A*/WA* ядро само подставит dary. Реально использованный список пишется в результаты
+    QUEUE_REGISTRY = {
+        "binary":   pfc.QueueType.Binary,
+        "dary":     pfc.QueueType.DAry,
+        "bucket":   pfc.QueueType.Bucket,
+        "radix":    pfc.QueueType.Radix,
+    }
+
     # Список для массового тестирования
     EXPERIMENT_ALGORITHMS = [
         ("BFS",            pfc.AlgorithmType.BFS,      pfc.HeuristicType.Zero,      1.0),
         ("Dijkstra",       pfc.AlgorithmType.Dijkstra, pfc.HeuristicType.Zero,      1.0),
         ("A* (Octile)",    pfc.AlgorithmType.AStar,    pfc.HeuristicType.Octile,    1.0),
+        ("A* (ALT)",       pfc.AlgorithmType.AStar,    pfc.HeuristicType.Landmark,  1.0),
         ("WA* (x1.5)",     pfc.AlgorithmType.WAStar,   pfc.HeuristicType.Octile,    1.5),
         ("WA* (x2.0)",     pfc.AlgorithmType.WAStar,   pfc.HeuristicType.Octile,    2.0),
         ("WA* (x5.0)",     pfc.AlgorithmType.WAStar,   pfc.HeuristicType.Octile,    5.0),
         ("WA* (x10.0)",     pfc.AlgorithmType.WAStar,   pfc.HeuristicType.Octile,    10.0),
+        ("JPS",            pfc.AlgorithmType.JPS,      pfc.HeuristicType.Octile,    1.0),
+        ("JPS+",           pfc.AlgorithmType.JPSPlus,  pfc.HeuristicType.Octile,    1.0),
+        ("Bi-Dijkstra",    pfc.AlgorithmType.BiDijkstra, pfc.HeuristicType.Zero,    1.0),
+        ("Bi-A* (Octile)", pfc.AlgorithmType.BiAStar,  pfc.HeuristicType.Octile,    1.0),
+        ("HPA*",           pfc.AlgorithmType.HPA,      pfc.HeuristicType.Octile,    1.0),
+        ("ARA* (x5.0)",    pfc.AlgorithmType.ARA,      pfc.HeuristicType.Octile,    5.0),   # Вес — начальный, дедлайн ARA_DEADLINE_MS
 
     ]
 else:
     ALGO_REGISTRY = {}
+    QUEUE_REGISTRY = {}
     EXPERIMENT_ALGORITHMS = []
\ No newline at end of file
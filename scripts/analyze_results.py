@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -13,17 +14,28 @@ RESULTS_DIR = os.path.join(os.path.dirname(BASE_DIR), 'results')
 ALGO_ORDER = [
     "BFS",
     "Dijkstra",
+    "Bi-Dijkstra",
     "A* (Octile)",
     "A* (Manhattan)",
     "A* (Euclid)",
+    "A* (ALT)",
+    "Bi-A* (Octile)",
+    "HPA*",
+    "ARA* (x5.0)",
     "WA* (x1.5)",
     "WA* (x2.0)",
     "WA* (x3.0)",
     "WA* (x5.0)",
     "WA* (x10.0)",
+    "JPS",
+    "JPS+",
     "Greedy"
 ]
 
+# Колонки подробной статистики поиска (есть в CSV, если ядро собрано с PATHFINDING_STATS)
+STATS_COLUMNS = ["Generated", "Pushes", "StalePops", "Reexpansions", "PeakOpen", "Touched",
+                 "SetupMS", "SearchMS", "ReconstructMS"]
+
 def get_plot_title(base_title, df, file_tag):
     unique_maps = df['MapName'].unique()
     if len(unique_maps) == 1:
@@ -32,16 +44,18 @@ def get_plot_title(base_title, df, file_tag):
         return f"{base_title} ({file_tag})"
 
 def get_order(df):
-    """Сортирует алгоритмы согласно эталонному списку ALGO_ORDER."""
-    present_algos = set(df['Algorithm'].unique())
-    order = [algo for algo in ALGO_ORDER if algo in present_algos]
-    order += list(present_algos - set(ALGO_ORDER))
-    return order
+    """Сортирует алгоритмы согласно эталонному списку ALGO_ORDER (суффикс ' [Queue]' не учитывается)."""
+    def rank(algo):
+        base = algo.split(' [')[0]
+        return (ALGO_ORDER.index(base) if base in ALGO_ORDER else len(ALGO_ORDER), algo)
+    return sorted(df['Algorithm'].unique(), key=rank)
 
-def save_summary_report(df, output_dir, file_tag):
+def save_summary_report(df, output_dir, file_tag, df_all=None):
     report_path = os.path.join(output_dir, f'{file_tag}_report.txt')
     
-    summary = df.groupby(['Connectivity', 'Algorithm']).agg({
+    # Колонка Queue есть только в новых CSV
+    group_cols = ['Connectivity', 'Algorithm'] + (['Queue'] if 'Queue' in df.columns else [])
+    summary = df.groupby(group_cols).agg({
         'TimeMS': 'mean',
         'ExpandedNodes': 'mean',
         'PathLength': 'mean',
@@ -49,11 +63,11 @@ def save_summary_report(df, output_dir, file_tag):
         'Success': 'mean'
     }).reset_index()
 
-    summary['Algorithm'] = pd.Categorical(summary['Algorithm'], categories=ALGO_ORDER, ordered=True)
-    summary = summary.sort_values(['Connectivity', 'Algorithm'])
+    summary['Algorithm'] = pd.Categorical(summary['Algorithm'], categories=get_order(df), ordered=True)
+    summary = summary.sort_values(group_cols)
 
     summary['TimeMS'] = summary['TimeMS'].round(3)
-    summary['ExpandedNodes'] = summary['ExpandedNodes'].astype(int)
+    summary['ExpandedNodes'] = summary['ExpandedNodes'].round().astype('Int64')  # <NA> у CPD
     summary['PathLength'] = summary['PathLength'].round(2)
     summary['Suboptimality'] = summary['Suboptimality'].round(2)
     summary['Success'] = (summary['Success'] * 100).round(1)
@@ -66,8 +80,36 @@ def save_summary_report(df, output_dir, file_tag):
     text_report.append(f"\n{'='*80}")
     text_report.append("ПОЯСНЕНИЯ:")
     text_report.append("1. TimeMS: Среднее время (меньше = лучше).")
-    text_report.append("2. ExpandedNodes: Раскрытые вершины (меньше = лучше).")
+    text_report.append("2. ExpandedNodes: Раскрытые вершины (меньше = лучше). У CPD (поиск по таблице) раскрытий")
+    text_report.append("   нет — <NA>, в сравнении по раскрытиям он не участвует.")
     text_report.append("3. Suboptimality: % отклонения от идеала (0% = идеал).")
+
+    # Подробные счетчики (ядро собрано с PATHFINDING_STATS): откуда берется время
+    stats_cols = [c for c in STATS_COLUMNS if c in df.columns]
+    if stats_cols:
+        stats = df.groupby(group_cols)[stats_cols + ['ExpandedNodes']].mean()
+        # Цена одного раскрытия в цикле поиска — сравнима между алгоритмами
+        stats['NsPerExp'] = stats['SearchMS'] * 1e6 / stats['ExpandedNodes'].clip(lower=1)
+        stats = stats.drop(columns='ExpandedNodes').reset_index()
+        stats['Algorithm'] = pd.Categorical(stats['Algorithm'], categories=get_order(df), ordered=True)
+        stats = stats.sort_values(group_cols)
+        text_report.append(f"\n{'='*80}")
+        text_report.append("СЧЕТЧИКИ ПОИСКА (средние на задачу):")
+        text_report.append(stats.round(3).to_string(index=False))
+        text_report.append("Generated — рассмотрено соседей, Pushes — вставок в OPEN, StalePops — пропущено")
+        text_report.append("устаревших записей, Reexpansions — повторных раскрытий, PeakOpen — пик OPEN,")
+        text_report.append("Touched — затронуто клеток. Setup/Search/ReconstructMS — фазы времени.")
+        text_report.append("NaN — счетчик алгоритмом не ведется (HPA*, CPD; Touched у D* Lite), это не нулевая работа.")
+
+    # Задачи, остановленные бюджетом (EXP_MAX_EXPANSIONS / EXP_DEADLINE_MS / дедлайн ARA*).
+    # Без найденного пути они не входят в средние выше
+    if df_all is not None and 'StopReason' in df_all.columns:
+        stopped = df_all[df_all['StopReason'].fillna('Finished') != 'Finished']
+        if not stopped.empty:
+            counts = stopped.groupby(['Connectivity', 'Algorithm', 'StopReason', 'Success']).size()
+            text_report.append(f"\n{'='*80}")
+            text_report.append("ОСТАНОВЛЕНО БЮДЖЕТОМ (Success=True — путь есть, но не доказан оптимальным):")
+            text_report.append(counts.rename('Tasks').reset_index().to_string(index=False))
     
     with open(report_path, "w", encoding="utf-8") as f:
         f.write("\n".join(text_report))
@@ -119,13 +161,12 @@ def plot_tradeoff(df, output_dir, file_tag):
     conn = df['Connectivity'].max()
     target_df = df[
         (df['Connectivity'] == conn) & 
-        (df['Algorithm'].str.contains('A\*|WA\*|Greedy', case=False, regex=True))
+        (df['Algorithm'].str.contains('A\*|WA\*|JPS|Greedy', case=False, regex=True))
     ]
     if target_df.empty: return
 
     summary = target_df.groupby('Algorithm').agg({'TimeMS': 'mean', 'Suboptimality': 'mean'}).reset_index()
-    present_algos = set(summary['Algorithm'])
-    order = [algo for algo in ALGO_ORDER if algo in present_algos]
+    order = get_order(summary)
     summary['Algorithm'] = pd.Categorical(summary['Algorithm'], categories=order, ordered=True)
     summary = summary.sort_values('Algorithm')
 
@@ -154,6 +195,65 @@ def plot_tradeoff(df, output_dir, file_tag):
     plt.savefig(os.path.join(output_dir, f'{file_tag}_4_tradeoff.png'))
     plt.close()
 
+    if 'AnytimeProfile' in target_df.columns:
+        plot_anytime_profiles(target_df, summary, output_dir, file_tag, conn)
+
+def parse_anytime_profile(profile):
+    """'время_мс:длина:граница;...' -> список (время_мс, длина, граница)."""
+    if not isinstance(profile, str) or not profile:
+        return []
+    return [tuple(float(v) for v in item.split(':')) for item in profile.split(';')]
+
+def plot_anytime_profiles(target_df, summary, output_dir, file_tag, conn):
+    """Anytime-профили ARA*: средняя субоптимальность лучшего пути и доказанная граница во времени.
+    Точки — обычные алгоритмы (среднее время, средняя субоптимальность) для сравнения."""
+    anytime = target_df[target_df['AnytimeProfile'].fillna('').astype(str) != '']
+    if anytime.empty: return
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+    sns.set_style("whitegrid")
+    palette = sns.color_palette('tab10')
+
+    for k, (algo, group) in enumerate(anytime.groupby('Algorithm')):
+        profiles = [(parse_anytime_profile(p), opt) for p, opt in zip(group['AnytimeProfile'], group['OptimalLength'])]
+        profiles = [(sol, opt) for sol, opt in profiles if sol and opt > 0]
+        if not profiles: continue
+        # Сетка начинается, когда первое решение есть у всех задач — иначе среднее
+        # считалось бы по меняющемуся набору задач
+        t_max = max(sol[-1][0] for sol, _ in profiles)
+        t_min = max(max(sol[0][0] for sol, _ in profiles), 1e-3)
+        grid = np.geomspace(t_min, max(t_max, t_min * 1.01), 200)
+
+        mean_subopt, mean_bound = [], []
+        for t in grid:
+            subopts, bounds = [], []
+            for sol, opt in profiles:
+                # Лучшее решение, найденное к моменту t
+                _, cost, bound = [s for s in sol if s[0] <= t][-1]
+                subopts.append((cost - opt) / opt * 100)
+                if np.isfinite(bound): bounds.append((bound - 1) * 100)
+            mean_subopt.append(np.mean(subopts))
+            mean_bound.append(np.mean(bounds) if bounds else np.nan)
+
+        color = palette[k % len(palette)]
+        ax.step(grid, mean_subopt, where='post', color=color, linewidth=2.5, label=f'{algo}: субоптимальность')
+        ax.step(grid, mean_bound, where='post', color=color, linestyle='--', linewidth=1.5, label=f'{algo}: граница')
+
+    others = summary[~summary['Algorithm'].astype(str).isin(anytime['Algorithm'].unique())]
+    for _, row in others.iterrows():
+        ax.scatter(row['TimeMS'], row['Suboptimality'], color='black', s=40, zorder=3)
+        ax.annotate(str(row['Algorithm']), (row['TimeMS'], row['Suboptimality']),
+                    textcoords='offset points', xytext=(5, 5), fontsize=9)
+
+    ax.set_xscale('log')
+    ax.set_xlabel('Время (мс, log scale)')
+    ax.set_ylabel('Субоптимальность (%)')
+    ax.legend(loc='upper right')
+    plt.title(get_plot_title(f'Anytime-профиль (Conn={conn})', target_df, file_tag))
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, f'{file_tag}_4_tradeoff_anytime.png'))
+    plt.close()
+
 # --- SCATTER PLOTS (Зависимость от сложности) ---
 
 def plot_time_vs_length(df, output_dir, file_tag):
@@ -291,9 +391,16 @@ def analyze_recursive(force=False):
                 # убрать bfs из 8-связности, так как он считает длину диагонали за 1
                 df_success = df_success[~((df_success['Algorithm'] == 'BFS') & (df_success['Connectivity'] == 8))]
                 if df_success.empty: continue
+
+                # Если в одном CSV несколько открытых списков — различаем их в подписи алгоритма
+                if 'Queue' in df_success.columns:
+                    df_success = df_success.copy()
+                    queues_per_algo = df_success.groupby('Algorithm')['Queue'].transform('nunique')
+                    multi = queues_per_algo > 1
+                    df_success.loc[multi, 'Algorithm'] = df_success.loc[multi, 'Algorithm'] + ' [' + df_success.loc[multi, 'Queue'] + ']'
                 
                 # Генерируем 6 артефактов
-                save_summary_report(df_success, root, file_tag)
+                save_summary_report(df_success, root, file_tag, df_all=df)
                 
                 # Барплоты (средние значения)
                 plot_time_comparison(df_success, root, file_tag)
@@ -2,8 +2,10 @@ import os
 import time
 import argparse
 import torch
+import numpy as np
 import config
 from core.map_parser import MapParser
+from core.snapshot import load_planner
 import pathfinding_core as pfc
 from gpu.gpu_planner import GPUPathPlanner
 
@@ -63,7 +65,7 @@ def run_benchmarks(args):
             map_path = os.path.join(map_dir, map_name)
             if not os.path.exists(map_path): continue
             
-            width, height, grid = MapParser.parse_map(map_path)
+            width, height, grid = MapParser.parse_map(map_path, as_array=True)
             
             # У нас стоит лимит на задания из сценариев, так что выбираем равномерно
             sampled_tasks = get_uniform_tasks(all_tasks, args.target_tasks)
@@ -75,7 +77,8 @@ def run_benchmarks(args):
             # Подбираем нужный batch_size
             batch_size = args.batch_size
 
-            cpu_planner = pfc.PathPlanner(width, height, grid)
+            # Кэш целей cost2go по умолчанию выключен: CPU, как и GPU, каждый раз считает заново
+            cpu_planner = load_planner(map_path)
             gpu_planner = GPUPathPlanner(width, height, grid)
 
             """
@@ -101,9 +104,14 @@ def run_benchmarks(args):
             # ------------------
             #        CPU
             # -----------------
+            # Тот же пакетный режим, что и на GPU: один вызов на батч, без GIL,
+            # агенты с общей целью считаются одной обратной Дейкстрой
+            agents_arr = np.asarray(agents, dtype=np.int32)
+            goals_arr = np.asarray(goals, dtype=np.int32)
             t0 = time.perf_counter()
-            for i in range(B):
-                cpu_planner.get_cost2go_window(agents[i][0], agents[i][1], goals[i][0], goals[i][1], args.radius, 4, args.fast_break)
+            for i in range(0, B, batch_size):
+                cpu_planner.get_cost2go_windows(agents_arr[i : i + batch_size], goals_arr[i : i + batch_size],
+                                                args.radius, 4, args.fast_break, args.threads)
             cpu_time = time.perf_counter() - t0
 
             # Вывод результатов
@@ -1,6 +1,8 @@
 import os
 import config
 from core.map_parser import MapParser
+from core.cpd import ensure_cpd
+from core.snapshot import load_planner
 import pathfinding_core as pfc
 
 """
@@ -10,9 +12,12 @@ import pathfinding_core as pfc
 
 def run_bench_logic(args):
     limit = args.limit
+    use_cpd = getattr(args, 'cpd', False)
+    threads = getattr(args, 'threads', config.EXP_THREADS)
+    queue = config.QUEUE_REGISTRY[getattr(args, 'queue', 'binary')]
     print(f"🚀 BENCHMARK MODE (Сводка по {limit} задачам на карту)")
-    print(f"{'Map':<20} | {'Algo':<12} | {'Tasks':<6} | {'Avg Nodes':<10} | {'Avg Time(ms)':<12}")
-    print("-" * 65)
+    print(f"{'Map':<20} | {'Algo':<12} | {'Queue':<6} | {'Tasks':<6} | {'Avg Nodes':<10} | {'Avg Time(ms)':<12}")
+    print("-" * 74)
 
     for m_type in config.MAP_TYPES:
         scen_dir = os.path.join(config.DATA_DIR, 'scen', m_type)
@@ -22,14 +27,13 @@ def run_bench_logic(args):
         scen_files = [f for f in os.listdir(scen_dir) if f.endswith('.scen')][:1]
         
         for s_file in scen_files:
-            tasks = MapParser.parse_scenarios(os.path.join(scen_dir, s_file))
-            if not tasks: continue
+            tasks = MapParser.load_scenarios(os.path.join(scen_dir, s_file))
+            if not len(tasks): continue
             
-            map_name = tasks[0]["map_name"]
+            map_name = tasks.map_name
             if not os.path.exists(os.path.join(map_dir, map_name)): continue
             
-            width, height, grid = MapParser.parse_map(os.path.join(map_dir, map_name))
-            planner = pfc.PathPlanner(width, height, grid)
+            planner = load_planner(os.path.join(map_dir, map_name))
             
             """
             Тестируем алгоритмы
@@ -45,18 +49,34 @@ def run_bench_logic(args):
                     end = len(tasks)
                 else:
                     end = min(limit, len(tasks))
-                    
-                for task in tasks[:limit]:
-                    res = planner.find_path(task["start"][0], task["start"][1],
-                                          task["goal"][0], task["goal"][1],
-                                          algo, heur, w_val, config.CONNECTIVITY)
-                    if res.found:
-                        total_time += res.execution_time
-                        total_nodes += res.expanded_nodes
-                        success_tasks += 1
+
+                starts, goals = tasks.starts[:end], tasks.goals[:end]
+                res = planner.find_paths(starts, goals, algo, heur, w_val, config.CONNECTIVITY,
+                                         threads=threads, queue=queue)
+
+                found = res["found"]
+                total_time = float(res["execution_time"][found].sum())
+                total_nodes = int(res["expanded_nodes"][found].sum())
+                success_tasks = int(found.sum())
 
                 # Выводим среднее значение, если хоть один путь найден
                 if success_tasks > 0:
                     avg_time_ms = (total_time / success_tasks) * 1000
                     avg_nodes = total_nodes / success_tasks
-                    print(f"{map_name[:20]:<20} | {name:<12} | {success_tasks:<6} | {avg_nodes:<10.0f} | {avg_time_ms:<12.3f}")
\ No newline at end of file
+                    print(f"{map_name[:20]:<20} | {name:<12} | {res['queue'].name:<6} | {success_tasks:<6} | {avg_nodes:<10.0f} | {avg_time_ms:<12.3f}")
+
+            # Таблица первых ходов: предрасчет один раз, запрос — только поиск в таблице
+            if use_cpd:
+                map_path = os.path.join(map_dir, map_name)
+                cpd_file, build_time = ensure_cpd(planner, map_path, config.CONNECTIVITY,
+                                                  threads=threads)
+                res = planner.find_paths(starts, goals, pfc.AlgorithmType.CPD, pfc.HeuristicType.Octile,
+                                         1.0, config.CONNECTIVITY, threads=threads)
+                found = res["found"]
+                success_tasks = int(found.sum())
+                avg_time_ms = float(res["execution_time"][found].mean()) * 1000 if success_tasks else 0.0
+                print(f"{map_name[:20]:<20} | {'CPD':<12} | {'-':<6} | {success_tasks:<6} | {0:<10} | {avg_time_ms:<12.3f}")
+
+                build_desc = f"{build_time:.1f} s" if build_time is not None else "— (файл загружен через mmap)"
+                size_mb = os.path.getsize(cpd_file) / 2**20
+                print(f"   CPD {map_name}: build {build_desc} | file {size_mb:.1f} MB | lookup {avg_time_ms * 1000:.1f} us/path")
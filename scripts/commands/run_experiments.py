@@ -2,38 +2,268 @@ import os
 import sys
 import csv
 import random
+import multiprocessing
+from collections import OrderedDict
 from datetime import datetime
+import numpy as np
 import config
 
 try:
     import pathfinding_core as pfc
     from core.map_parser import MapParser
+    from core.landmarks import ensure_landmarks
+    from core.snapshot import load_planner
+    from core.results_store import ResultsStore
 except ImportError as e:
     print(f"❌ Ошибка импорта: {e}")
     sys.exit(1)
 
 def get_tasks_subset(tasks, mode, count):
+    """Выборка из ScenarioTable: индексы считаются в NumPy, колонки берутся по ним"""
     total = len(tasks)
     if mode == 'all' or total <= count:
         return tasks, "All"
     if mode == 'first':
-        return tasks[:count], f"First {count}"
+        return tasks.take(slice(0, count)), f"First {count}"
     elif mode == 'last':
-        return tasks[-count:], f"Last {count}"
+        return tasks.take(slice(total - count, total)), f"Last {count}"
     elif mode == 'uniform':
-        step = total / count
-        indices = sorted(list(set([int(i * step) for i in range(count)])))
-        return [tasks[i] for i in indices], f"Uniform {len(indices)}"
+        indices = np.unique((np.arange(count) * (total / count)).astype(np.int64))
+        return tasks.take(indices), f"Uniform {len(indices)}"
     elif mode == 'random':
+        # Тот же генератор и seed, что у прежней выборки по списку: задачи совпадают
         random.seed(42)
-        return random.sample(tasks, count), f"Random {count}"
+        return tasks.take(np.array(random.sample(range(total), count))), f"Random {count}"
     return tasks, "Unknown"
 
-def run_experiments_logic(sampling_mode=None, sampling_count=None, target_map=None):
+# Колонки подробной статистики (только если ядро собрано с PATHFINDING_STATS):
+# имя в CSV -> (ключ в res["stats"], множитель)
+STATS_COLUMNS = {
+    "Generated": ("generated", 1),
+    "Pushes": ("pushes", 1),
+    "StalePops": ("stale_pops", 1),
+    "Reexpansions": ("reexpansions", 1),
+    "PeakOpen": ("peak_open", 1),
+    "Touched": ("touched", 1),
+    "SetupMS": ("setup_time", 1000),
+    "SearchMS": ("search_time", 1000),
+    "ReconstructMS": ("reconstruct_time", 1000),
+}
+
+CSV_HEADER = (["MapName", "Scenario", "Connectivity", "Algorithm", "Weight", "Queue",
+               "TaskID", "Success", "PathLength", "OptimalLength",
+               "ExpandedNodes", "TimeMS", "Suboptimality", "AnytimeProfile", "StopReason"]
+              + (list(STATS_COLUMNS) if pfc.STATS_ENABLED else []))
+
+# --- Единицы работы ---
+# Единица — (сценарий, связность, очередь, алгоритм, кусок задач): один вызов
+# find_paths. Последовательный режим и процессы-воркеры (--jobs) выполняют
+# одни и те же единицы в одном и том же порядке, поэтому CSV совпадают
+
+# Планировщики по картам (LRU) и связность подключенных к ним ориентиров —
+# свои в каждом процессе. Через снимки (load_planner) открыть карту дешево,
+# а массивы карты процессы делят через page cache
+_planners = OrderedDict()
+_landmarks_conn = {}
+
+
+def _cached_planner(map_path):
+    planner = _planners.pop(map_path, None)
+    if planner is None:
+        planner = load_planner(map_path)
+        if config.COMPACT_MODE:
+            planner.set_compact_mode(True)
+        while len(_planners) >= max(config.EXP_WORKER_PLANNERS, 1):
+            old_path, _ = _planners.popitem(last=False)
+            _landmarks_conn.pop(old_path, None)
+    _planners[map_path] = planner
+    return planner
+
+
+def _attach_landmarks(planner, map_path, conn):
+    # Таблица у планировщика одна: подключаем заново, только если связность другая
+    if _landmarks_conn.get(map_path) != conn:
+        ensure_landmarks(planner, map_path, conn)
+        _landmarks_conn[map_path] = conn
+
+
+def _deadline_ms(algo_enum):
+    # Бюджет на задачу: одна тяжелая задача не держит весь прогон.
+    # У anytime ARA* свой дедлайн
+    return config.ARA_DEADLINE_MS if algo_enum == pfc.AlgorithmType.ARA else config.EXP_DEADLINE_MS
+
+
+def _result_params(algo_name, algo_enum, heur_enum, weight, used_queue):
+    """Все, от чего зависит результат задачи: ключ в хранилище результатов"""
+    params = {
+        "algorithm": algo_name, "algo": algo_enum.name, "heuristic": heur_enum.name, "weight": weight,
+        "queue": used_queue, "deadline_ms": _deadline_ms(algo_enum),
+        "max_expansions": config.EXP_MAX_EXPANSIONS, "compact": config.COMPACT_MODE,
+    }
+    if heur_enum == pfc.HeuristicType.Landmark:
+        params["landmarks"] = config.LANDMARK_COUNT
+    return params
+
+
+def _make_units(store, groups, fresh, map_path, map_name, scen_file, tasks, conn, threads, chunk):
+    """
+    Единицы работы одной связности. В groups дописывается (файл хранилища, TaskID)
+    для каждой пары (алгоритм, очередь) — по ним потом собирается CSV. Единицы
+    создаются только для задач, которых в хранилище еще нет (fresh — для всех).
+    """
+    units = []
+    already_run = set()
+    for queue_name in config.EXPERIMENT_QUEUES:
+        queue_enum = config.QUEUE_REGISTRY[queue_name]
+        for algo_index, (algo_name, algo_enum, heur_enum, weight) in enumerate(config.EXPERIMENT_ALGORITHMS):
+            if conn == 8 and algo_name == "BFS": continue                               # BFS не поддерживает 8-связность, будем просто пропускать
+            if conn == 4 and algo_name.startswith("JPS"): continue                      # JPS только для 8-связности (на 4-связной это тот же A*)
+
+            # Ядро может заменить очередь (bucket для A* -> dary, BFS -> fifo). Дубли не гоняем
+            used_queue = pfc.PathPlanner.resolve_queue(queue_enum, algo_enum, heur_enum, conn).name
+            if (algo_name, used_queue) in already_run: continue
+            already_run.add((algo_name, used_queue))
+
+            store_path = store.path(map_path, scen_file, conn,
+                                    _result_params(algo_name, algo_enum, heur_enum, weight, used_queue))
+            groups.append((store_path, tasks.ids))
+            todo = tasks
+            done = {} if fresh else store.load(store_path)
+            if done:
+                done_ids = np.fromiter(done, dtype=np.int64, count=len(done))
+                todo = tasks.take(np.flatnonzero(~np.isin(tasks.ids, done_ids)))
+
+            step = chunk if chunk else max(len(todo), 1)
+            for begin in range(0, len(todo), step):
+                units.append({
+                    "map_path": map_path, "map_name": map_name, "scen_file": scen_file,
+                    "conn": conn, "algo_index": algo_index, "queue_name": queue_name,
+                    "used_queue": used_queue, "threads": threads, "store_path": store_path,
+                    "tasks": todo.take(slice(begin, begin + step)),
+                })
+    return units
+
+
+def _iter_units(store, groups, fresh, valid_scenarios, map_source_dir, mode, count, threads, chunk):
+    """Недостающие единицы работы по всем сценариям в порядке строк CSV"""
+    for scen_file, map_name, all_tasks in valid_scenarios:
+        map_path = os.path.join(map_source_dir, map_name)
+
+        # Выборка задач
+        current_tasks, desc = get_tasks_subset(all_tasks, mode, count)
+
+        # Используем алгоритмы из config.py
+        scenario_units = []
+        for conn in config.EXPERIMENT_CONNECTIVITIES:
+            scenario_units.append((conn, _make_units(store, groups, fresh, map_path, map_name, scen_file,
+                                                     current_tasks, conn, threads, chunk)))
+        missing = sum(len(unit["tasks"]) for _, units in scenario_units for unit in units)
+        print(f"   🗺️  {map_name} | {scen_file[:20]:<20} | {desc}"
+              + (f" | to run: {missing}" if missing else " | cached"))
+        if not missing:
+            continue  # Все есть в хранилище: карту даже не открываем
+
+        try:
+            planner = _cached_planner(map_path)
+        except Exception as e:
+            print(f"❌ Error loading {map_name}: {e}")
+            continue
+
+        for conn, units in scenario_units:
+            # Таблица ориентиров нужна только алгоритмам с эвристикой Landmark.
+            # При --jobs здесь она строится и сохраняется один раз, воркеры ее только отображают
+            if any(config.EXPERIMENT_ALGORITHMS[unit["algo_index"]][2] == pfc.HeuristicType.Landmark
+                   for unit in units):
+                _attach_landmarks(planner, map_path, conn)
+            yield from units
+
+
+def run_unit(unit):
+    """Один пакет find_paths -> (файл хранилища, строки CSV)"""
+    planner = _cached_planner(unit["map_path"])
+    conn = unit["conn"]
+    algo_name, algo_enum, heur_enum, weight = config.EXPERIMENT_ALGORITHMS[unit["algo_index"]]
+    if heur_enum == pfc.HeuristicType.Landmark:
+        _attach_landmarks(planner, unit["map_path"], conn)
+    tasks = unit["tasks"]
+
+    # Весь пакет задач уходит в C++ одним вызовом (потоки, без GIL)
+    res = planner.find_paths(
+        tasks.starts, tasks.goals, algo_enum, heur_enum, weight, conn,
+        threads=unit["threads"], queue=config.QUEUE_REGISTRY[unit["queue_name"]],
+        deadline_ms=_deadline_ms(algo_enum),
+        max_expansions=config.EXP_MAX_EXPANSIONS
+    )
+    solutions = res.get("solutions")
+    stop_reasons = res["stop_reason"]
+    # CPD идет по таблице без раскрытий: пустая ячейка, чтобы не выигрывать
+    # сравнение по раскрытиям (без таблицы он работает как A* и раскрытия пишутся)
+    table_lookup = algo_enum == pfc.AlgorithmType.CPD
+    stats = res["stats"]
+
+    rows = []
+    for i, (task_id, optimal_len) in enumerate(zip(tasks.ids.tolist(), tasks.optimal_len.tolist())):
+        found = bool(res["found"][i])
+        path_length = float(res["path_length"][i])
+
+        subopt = 0.0
+        if found and optimal_len > 0:
+            subopt = (path_length - optimal_len) / optimal_len * 100
+
+        # Улучшения ARA*: "время_мс:длина:граница;..."
+        profile = ""
+        if solutions is not None:
+            profile = ";".join(f"{t * 1000:.3f}:{c:.4f}:{b:.4f}" for t, c, b in solutions[i])
+
+        row = [
+            unit["map_name"], unit["scen_file"], conn, algo_name, weight, unit["used_queue"], task_id,
+            found, f"{path_length:.4f}", optimal_len,
+            "" if table_lookup and not res["expanded_nodes"][i] else int(res["expanded_nodes"][i]), f"{res['execution_time'][i] * 1000:.4f}", f"{subopt:.2f}",
+            profile, pfc.StopReason(int(stop_reasons[i])).name
+        ]
+        if stats is not None:
+            # Счетчик, который алгоритм не ведет (-1), — пустая ячейка, а не 0
+            row += [f"{stats[key][i] * scale:.4f}" if scale != 1
+                    else (int(stats[key][i]) if stats[key][i] >= 0 else "")
+                    for key, scale in STATS_COLUMNS.values()]
+        rows.append(row)
+    return unit["store_path"], rows
+
+
+def _init_worker(pin, counter):
+    """Процесс пула: при pin — привязка к своему ядру (меньше шума в замерах времени)"""
+    if pin and hasattr(os, "sched_setaffinity"):
+        with counter.get_lock():
+            index = counter.value
+            counter.value += 1
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cpus[index % len(cpus)]})
+
+
+def run_experiments_logic(sampling_mode=None, sampling_count=None, target_map=None, threads=None,
+                          jobs=None, pin=None, fresh=False):
     # Применяем каскад настроек: Аргумент -> Конфиг
     mode = sampling_mode if sampling_mode else config.EXP_SAMPLING_MODE
     count = sampling_count if sampling_count else config.EXP_SAMPLING_COUNT
     target_map = target_map if target_map else config.EXP_TARGET_MAP
+    threads = threads if threads is not None else config.EXP_THREADS
+    jobs = jobs if jobs is not None else config.EXP_JOBS
+    pin = pin if pin is not None else config.EXP_PIN_WORKERS
+
+    # Хранилище результатов: ключ — хэш карты, сценарий, параметры алгоритма и
+    # сборка ядра. fresh — пересчитать все (хранилище обновится новыми строками)
+    store = ResultsStore(CSV_HEADER)
+
+    # --jobs N: единицы работы раздаются N процессам, строки возвращаются в
+    # порядке единиц. Ядра делят процессы, поэтому find_paths внутри — в один
+    # поток, если число потоков не задано явно
+    pool = None
+    chunk = None
+    if jobs > 1:
+        threads = threads if threads > 0 else 1
+        chunk = config.EXP_JOB_CHUNK
+        context = multiprocessing.get_context()
+        pool = context.Pool(jobs, initializer=_init_worker, initargs=(pin, context.Value('i', 0)))
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
@@ -44,119 +274,85 @@ def run_experiments_logic(sampling_mode=None, sampling_count=None, target_map=No
         subfolder_name = "all_tasks" if mode == 'all' else f"{mode}_{count}"
 
     print(f"🎯 EXPERIMENTS STARTED")
-    print(f"   Mode: {mode.upper()} | Count: {count} | Map: {target_map if target_map else 'ALL'}")
+    print(f"   Mode: {mode.upper()} | Count: {count} | Map: {target_map if target_map else 'ALL'} | Threads: {threads if threads > 0 else 'ALL'}"
+          + (f" | Jobs: {jobs}{' (pinned)' if pin else ''}" if pool else ""))
 
-    for map_type in config.MAP_TYPES:
-        scen_source_dir = os.path.join(config.DATA_DIR, 'scen', map_type)
-        map_source_dir = os.path.join(config.DATA_DIR, 'map', map_type)
+    try:
+        for map_type in config.MAP_TYPES:
+            scen_source_dir = os.path.join(config.DATA_DIR, 'scen', map_type)
+            map_source_dir = os.path.join(config.DATA_DIR, 'map', map_type)
         
-        if not os.path.exists(scen_source_dir): continue
+            if not os.path.exists(scen_source_dir): continue
 
-        # 1. Сбор сценариев
-        valid_scenarios = []
-        try:
-            scen_files = [f for f in os.listdir(scen_source_dir) if f.endswith('.scen')]
-        except FileNotFoundError:
-            continue
+            # 1. Сбор сценариев
+            valid_scenarios = []
+            try:
+                scen_files = [f for f in os.listdir(scen_source_dir) if f.endswith('.scen')]
+            except FileNotFoundError:
+                continue
         
-        if not scen_files: continue
+            if not scen_files: continue
         
-        print(f"\n🔍 Scanning {map_type} ({len(scen_files)} files)...")
+            print(f"\n🔍 Scanning {map_type} ({len(scen_files)} files)...")
         
-        for scen_file in scen_files:
-            full_path = os.path.join(scen_source_dir, scen_file)
-            try:
-                tasks = MapParser.parse_scenarios(full_path)
-                if not tasks: continue
+            for scen_file in scen_files:
+                full_path = os.path.join(scen_source_dir, scen_file)
+                try:
+                    tasks = MapParser.load_scenarios(full_path)
+                    if not len(tasks): continue
                 
-                map_name = tasks[0]["map_name"]
+                    map_name = tasks.map_name
                 
-                # Фильтр по карте
-                if target_map and map_name != target_map:
-                    continue
+                    # Фильтр по карте
+                    if target_map and map_name != target_map:
+                        continue
                 
-                # Проверка наличия файла карты
-                if not os.path.exists(os.path.join(map_source_dir, map_name)):
-                    continue
+                    # Проверка наличия файла карты
+                    if not os.path.exists(os.path.join(map_source_dir, map_name)):
+                        continue
                     
-                valid_scenarios.append((scen_file, map_name, tasks))
-            except Exception:
-                continue
+                    valid_scenarios.append((scen_file, map_name, tasks))
+                except Exception:
+                    continue
 
-        if not valid_scenarios:
-            if target_map:
-                print(f"   ℹ️ Skip {map_type}: No scenarios for {target_map}")
-            continue
+            if not valid_scenarios:
+                if target_map:
+                    print(f"   ℹ️ Skip {map_type}: No scenarios for {target_map}")
+                continue
         
-        # Сортировка для кэширования
-        valid_scenarios.sort(key=lambda x: x[1])
+            # Сортировка для кэширования
+            valid_scenarios.sort(key=lambda x: x[1])
 
-        # 2. Подготовка CSV
-        current_result_dir = os.path.join(config.RESULTS_DIR, map_type, subfolder_name)
-        os.makedirs(current_result_dir, exist_ok=True)
+            # 2. Подготовка CSV
+            current_result_dir = os.path.join(config.RESULTS_DIR, map_type, subfolder_name)
+            os.makedirs(current_result_dir, exist_ok=True)
         
-        name_part = f"_{target_map}" if target_map else ""
-        csv_filename = f"res_{map_type}{name_part}_{timestamp}.csv"
-        csv_path = os.path.join(current_result_dir, csv_filename)
-
-        print(f"🚀 Running tests for {len(valid_scenarios)} scenarios -> {csv_filename}")
+            name_part = f"_{target_map}" if target_map else ""
+            csv_filename = f"res_{map_type}{name_part}_{timestamp}.csv"
+            csv_path = os.path.join(current_result_dir, csv_filename)
 
-        cached_map_name = None
-        cached_planner = None
+            print(f"🚀 Running tests for {len(valid_scenarios)} scenarios -> {csv_filename}")
 
-        with open(csv_path, mode='w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["MapName", "Scenario", "Connectivity", "Algorithm", "Weight", 
-                             "TaskID", "Success", "PathLength", "OptimalLength", 
-                             "ExpandedNodes", "TimeMS", "Suboptimality"])
+            # 3. Считаем только задачи, которых нет в хранилище. Строки каждой единицы
+            # сразу дописываются туда: прерванный прогон продолжится с этого места
+            groups = []
+            units = _iter_units(store, groups, fresh, valid_scenarios, map_source_dir, mode, count, threads, chunk)
+            for store_path, rows in (pool.imap(run_unit, units) if pool else map(run_unit, units)):
+                store.append(store_path, rows)
 
-            for scen_file, map_name, all_tasks in valid_scenarios:
-                
-                # Кэширование карты
-                if map_name != cached_map_name:
-                    try:
-                        width, height, grid = MapParser.parse_map(os.path.join(map_source_dir, map_name))
-                        planner = pfc.PathPlanner(width, height, grid)
-                        cached_map_name = map_name
-                        cached_planner = planner
-                    except Exception as e:
-                        print(f"❌ Error loading {map_name}: {e}")
-                        cached_map_name = None
-                        cached_planner = None
-                        continue
-                else:
-                    planner = cached_planner
-                
-                if not planner: continue
-
-                # Выборка задач
-                current_tasks, desc = get_tasks_subset(all_tasks, mode, count)
-                print(f"   🗺️  {map_name} | {scen_file[:20]:<20} | {desc}")
-
-                # Запуск алгоритмов
-                # Используем алгоритмы из config.py
-                connectivities = config.EXPERIMENT_CONNECTIVITIES
-                
-                for conn in connectivities:
-                    for algo_name, algo_enum, heur_enum, weight in config.EXPERIMENT_ALGORITHMS:
-                        if conn == 8 and algo_name == "BFS": continue                               # BFS не поддерживает 8-связность, будем просто пропускать
-                        for task in current_tasks:
-                            res = planner.find_path(
-                                task["start"][0], task["start"][1], 
-                                task["goal"][0], task["goal"][1], 
-                                algo_enum, heur_enum, weight, conn
-                            )
-
-                            subopt = 0.0
-                            if res.found and task["optimal_len"] > 0:
-                                subopt = (res.path_length - task["optimal_len"]) / task["optimal_len"] * 100
-                            
-                            writer.writerow([
-                                map_name, scen_file, conn, algo_name, weight, task["id"],
-                                res.found, f"{res.path_length:.4f}", task["optimal_len"],
-                                res.expanded_nodes, f"{res.execution_time * 1000:.4f}", f"{subopt:.2f}"
-                            ])
+            # 4. CSV прогона собирается из хранилища в прежнем порядке строк
+            with open(csv_path, mode='w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_HEADER)
+                for store_path, task_ids in groups:
+                    stored = store.load(store_path)
+                    writer.writerows(stored[task_id] for task_id in task_ids.tolist() if task_id in stored)
         print("✅ Done.")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
 
 if __name__ == "__main__":
     run_experiments_logic()
\ No newline at end of file
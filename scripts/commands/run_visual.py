@@ -3,6 +3,8 @@ import random
 from pathlib import Path
 import config
 from core.map_parser import MapParser
+from core.landmarks import ensure_landmarks
+from core.cpd import ensure_cpd
 import pathfinding_core as pfc
 
 try:
@@ -73,8 +75,14 @@ def run_visual_logic(args):
 
     print(f"📖 Map: {Path(map_path).parent.name}/{Path(map_path).name}")
 
-    width, height, grid = MapParser.parse_map(map_path)
+    width, height, grid = MapParser.parse_map(map_path, as_array=True)
     planner = pfc.PathPlanner(width, height, grid)
+    if config.COMPACT_MODE:
+        planner.set_compact_mode(True)
+    if heur_type == pfc.HeuristicType.Landmark:
+        ensure_landmarks(planner, map_path, config.CONNECTIVITY)
+    if algo_type == pfc.AlgorithmType.CPD:
+        ensure_cpd(planner, map_path, config.CONNECTIVITY)
 
     tasks_to_run = []
     if scen_path and os.path.exists(scen_path):
@@ -119,13 +127,21 @@ def run_visual_logic(args):
         except Exception as e:
             print(f"⚠️ Ошибка cost2go: {e}")
 
+        deadline_ms = config.ARA_DEADLINE_MS if algo_type == pfc.AlgorithmType.ARA else 0.0
+        trace_stride = getattr(args, 'trace_stride', config.VISUAL_TRACE_STRIDE)
         res = planner.find_path(start[0], start[1], goal[0], goal[1], 
-                               algo_type, heur_type, weight, config.CONNECTIVITY)
+                               algo_type, heur_type, weight, config.CONNECTIVITY,
+                               deadline_ms=deadline_ms, trace_stride=trace_stride)
 
         if res.found:
             print(f"✅ Found! Len: {res.path_length:.2f} | Nodes: {res.expanded_nodes} | Time: {res.execution_time*1000:.2f}ms")
+            if len(res.solutions):
+                print(f"   ARA*: улучшений {len(res.solutions)}, граница субоптимальности {res.solutions[-1, 2]:.3f}")
+            if len(res.trace):
+                print(f"   Трасса: {len(res.trace)} записей (каждое {trace_stride}-е раскрытие)")
             if save_map_image:
-                save_map_image(width, height, grid, res.path, start, goal, filename=path_filename)
+                save_map_image(width, height, grid, res.path, start, goal, filename=path_filename,
+                               trace=res.trace)
             print(f"✅ Результаты сохранены в папку: {viz_dir}")
         else:
             print("❌ Path Not Found")
\ No newline at end of file
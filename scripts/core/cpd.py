@@ -0,0 +1,38 @@
+import os
+import time
+import config
+from core.map_parser import file_digest
+
+
+def cpd_path(map_path, connectivity):
+    """Путь к таблице первых ходов карты: data/cpd/<карта>.<хэш карты>.c<связность>.cpd"""
+    map_name = os.path.basename(map_path)
+    return os.path.join(config.CPD_DIR, f"{map_name}.{file_digest(map_path)}.c{connectivity}.cpd")
+
+
+def ensure_cpd(planner, map_path, connectivity, threads=0):
+    """
+    Подключает к планировщику таблицу первых ходов (CPD) для AlgorithmType.CPD.
+    Файл ищется по хэшу содержимого карты. Если он есть — отображаем его в
+    память (mmap), иначе строим (долго: Дейкстра от каждой свободной клетки) и сохраняем.
+    Возвращает (путь к файлу, время построения в секундах или None, если загружен).
+    """
+    path = cpd_path(map_path, connectivity)
+
+    if os.path.exists(path):
+        try:
+            planner.load_cpd(path, mmap=True)
+            return path, None
+        except RuntimeError as e:
+            print(f"⚠️ Таблица {os.path.basename(path)} не подходит ({e}), строим заново")
+
+    start = time.perf_counter()
+    planner.build_cpd(connectivity, threads)
+    build_time = time.perf_counter() - start
+    os.makedirs(config.CPD_DIR, exist_ok=True)
+    # Пишем во временный файл и подменяем: параллельный процесс не отобразит
+    # недописанную таблицу (строки RLE читаются без контрольной суммы)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    planner.save_cpd(tmp_path)
+    os.replace(tmp_path, path)
+    return path, build_time
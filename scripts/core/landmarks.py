@@ -0,0 +1,35 @@
+import os
+import config
+from core.map_parser import file_digest
+
+
+def landmark_path(map_path, connectivity, count):
+    """Путь к файлу ориентиров карты: data/landmarks/<карта>.<хэш карты>.c<связность>.k<K>.lm"""
+    map_name = os.path.basename(map_path)
+    return os.path.join(config.LANDMARK_DIR, f"{map_name}.{file_digest(map_path)}.c{connectivity}.k{count}.lm")
+
+
+def ensure_landmarks(planner, map_path, connectivity, count=None):
+    """
+    Подключает к планировщику таблицу ориентиров ALT для эвристики Landmark.
+    Файл ищется по хэшу содержимого карты. Если он есть — отображаем его в
+    память (mmap), иначе строим и сохраняем, чтобы следующие запуски не пересчитывали.
+    """
+    count = count if count is not None else config.LANDMARK_COUNT
+    path = landmark_path(map_path, connectivity, count)
+
+    if os.path.exists(path):
+        try:
+            planner.load_landmarks(path, mmap=True)
+            return path
+        except RuntimeError as e:
+            print(f"⚠️ Ориентиры {os.path.basename(path)} не подходят ({e}), строим заново")
+
+    planner.build_landmarks(count, connectivity)
+    os.makedirs(config.LANDMARK_DIR, exist_ok=True)
+    # Пишем во временный файл и подменяем: другой процесс (--jobs, соседний
+    # прогон) не отобразит недописанную таблицу
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    planner.save_landmarks(tmp_path)
+    os.replace(tmp_path, path)
+    return path
@@ -1,88 +1,255 @@
+import hashlib
 import os
+import numpy as np
+
+try:
+    import config
+    MAP_CACHE_DIR = config.MAP_CACHE_DIR
+    SCEN_CACHE_DIR = config.SCEN_CACHE_DIR
+except ImportError:  # Самотест файла без config в пути — без кэша
+    MAP_CACHE_DIR = None
+    SCEN_CACHE_DIR = None
+
+# Алфавит MovingAI: '.' и 'G' — земля, 'S' — болото (проходимо); '@' и 'O' —
+# вне карты, 'T' — деревья, 'W' — вода (в бинарной сетке непроходимы).
+# Таблица символ -> клетка (0 — свободно, 1 — препятствие) для разбора без
+# цикла по символам. Любой символ, кроме проходимых, — препятствие
+_PASSABLE = b'.GS'
+_OBSTACLE_LUT = np.ones(256, dtype=np.uint8)
+_OBSTACLE_LUT[np.frombuffer(_PASSABLE, dtype=np.uint8)] = 0
+
+
+# Хэши файлов по (путь, mtime, размер): каждый файл читается один раз за запуск
+_file_digests = {}
+
+
+def file_digest(path):
+    """blake2b содержимого файла (16 hex-символов) — общий ключ всех кэшей по содержимому карт и сценариев"""
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in _file_digests:
+        with open(path, 'rb') as f:
+            _file_digests[key] = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    return _file_digests[key]
+
+
+def _parse_map_bytes(data):
+    """Текст .map -> np.uint8 (height, width), 0 — свободно, 1 — препятствие"""
+    # 1. Заголовок: несколько строк до ключевого слова 'map'
+    height = width = 0
+    pos = 0
+    body_start = -1
+    while pos < len(data):
+        end = data.find(b'\n', pos)
+        end = len(data) if end < 0 else end
+        line = data[pos:end].strip()
+        pos = end + 1
+        if line.startswith(b"height"):
+            height = int(line.split()[1])
+        elif line.startswith(b"width"):
+            width = int(line.split()[1])
+        elif line.startswith(b"map"):
+            body_start = pos
+            break
+
+    if body_start < 0:
+        raise ValueError("Некорректный формат файла: не найдено ключевое слово 'map'")
+
+    # 2. Сетка: пробелы между символами и \r выбрасываются, пустые строки
+    # пропускаются, из каждой строки берется ровно width символов
+    body = np.frombuffer(data[body_start:].translate(None, b' \t\r'), dtype=np.uint8)
+    breaks = np.flatnonzero(body == ord('\n'))
+    starts = np.concatenate(([0], breaks + 1))
+    lengths = np.concatenate((breaks, [len(body)])) - starts
+    starts = starts[lengths > 0][:height]
+    lengths = lengths[lengths > 0][:height]
+    if len(starts) < height or (lengths < width).any():
+        got = int(np.minimum(lengths, width).sum())
+        raise ValueError(f"Размер сетки не совпадает. Ожидалось {width*height}, получено {got}")
+
+    chars = body[starts[:, None] + np.arange(width)]
+    return _OBSTACLE_LUT[chars]
+
 
 class MapParser:
     @staticmethod
-    def parse_map(file_path):
+    def parse_map(file_path, as_array=False, use_cache=True):
+        """
+        Возвращает (width, height, grid).
+        as_array=False: grid — список int (как раньше).
+        as_array=True: grid — плоский np.uint8 массив длины width*height,
+        его можно отдавать в PathPlanner / GPUPathPlanner без копии в список.
+
+        Разобранная карта кэшируется в MAP_CACHE_DIR как <карта>.<хэш>.npy по
+        хэшу содержимого: повторная загрузка той же карты — отображение .npy
+        в память (массив только для чтения), правка файла дает новый ключ.
+        """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Файл карты не найден: {file_path}")
 
-        with open(file_path, 'r') as f:
-            lines = f.readlines()
-
-        height = 0
-        width = 0
-        grid = []
-        header_parsed = False
-        map_start_index = 0
-
-        # 1. Парсим заголовок
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if line.startswith("height"):
-                height = int(line.split()[1])
-            elif line.startswith("width"):
-                width = int(line.split()[1])
-            elif line.startswith("map"):
-                map_start_index = i + 1
-                header_parsed = True
-                break
-        
-        if not header_parsed:
-            raise ValueError("Некорректный формат файла: не найдено ключевое слово 'map'")
-
-        # 2. Парсим сетку
-        passable_chars = {'.', 'G', 'S'}
-        current_height = 0
-        
-        for i in range(map_start_index, len(lines)):
-            # ОЧИЩАЕМ строку от пробелов между символами
-            line = lines[i].strip().replace(" ", "") 
-            
-            if not line: 
-                continue
-            
-            # Если в файле символов больше, чем ширина (лишние пробелы в конце и т.д.)
-            # мы берем ровно столько, сколько указано в width
-            line = line[:width]
-                
-            for char in line:
-                if char in passable_chars:
-                    grid.append(0) # Свободно
-                else:
-                    grid.append(1) # Препятствие
-            
-            current_height += 1
-            if current_height >= height:
-                break
-
-        if len(grid) != width * height:
-            raise ValueError(f"Размер сетки не совпадает. Ожидалось {width*height}, получено {len(grid)}")
+        grid = None
+        cache_path = None
+        if use_cache and MAP_CACHE_DIR:
+            # Тот же ключ, что у снимков, ориентиров и CPD
+            cache_path = os.path.join(MAP_CACHE_DIR, f"{os.path.basename(file_path)}.{file_digest(file_path)}.npy")
+            if os.path.exists(cache_path):
+                try:
+                    grid = np.load(cache_path, mmap_mode='r')
+                    if grid.dtype != np.uint8 or grid.ndim != 2:
+                        grid = None
+                except (OSError, ValueError):
+                    grid = None  # Битый кэш — разбираем заново
+
+        if grid is None:
+            with open(file_path, 'rb') as f:
+                grid = _parse_map_bytes(f.read())
+            if cache_path:
+                try:
+                    os.makedirs(MAP_CACHE_DIR, exist_ok=True)
+                    tmp_path = f"{cache_path}.{os.getpid()}.tmp.npy"
+                    np.save(tmp_path, grid)
+                    os.replace(tmp_path, cache_path)
+                except OSError as e:
+                    print(f"⚠️ Не удалось сохранить кэш карты {os.path.basename(file_path)}: {e}")
 
+        height, width = grid.shape
+        grid = grid.reshape(-1)
+        if not as_array:
+            grid = grid.tolist()
         return width, height, grid
 
     @staticmethod
-    def parse_scenarios(scen_path):
-        scenarios = []
+    def load_scenarios(scen_path, use_cache=True):
+        """
+        Сценарии .scen по колонкам (ScenarioTable), без словаря на задачу.
+        Числовые колонки разбираются одним проходом np.fromstring по тексту.
+        Результат кэшируется в SCEN_CACHE_DIR как <сценарий>.<хэш>.npz по
+        хэшу содержимого. Нет файла — пустая таблица.
+        """
         if not os.path.exists(scen_path):
-            return scenarios
-
-        with open(scen_path, 'r') as f:
-            lines = f.readlines()
-            task_idx = 0
-            for line in lines:
-                parts = line.split()
-                if not parts or parts[0] == "version":
-                    continue
-                
-                scenarios.append({
-                    "id": task_idx,
-                    "map_name": parts[1],
-                    "start": (int(parts[4]), int(parts[5])),
-                    "goal": (int(parts[6]), int(parts[7])),
-                    "optimal_len": float(parts[8])
-                })
-                task_idx += 1
-        return scenarios
+            return ScenarioTable.empty()
+
+        cache_path = None
+        if use_cache and SCEN_CACHE_DIR:
+            cache_path = os.path.join(SCEN_CACHE_DIR, f"{os.path.basename(scen_path)}.{file_digest(scen_path)}.npz")
+            if os.path.exists(cache_path):
+                try:
+                    with np.load(cache_path) as cached:
+                        return ScenarioTable(**{name: cached[name] for name in ScenarioTable.COLUMNS})
+                except (OSError, ValueError, KeyError):
+                    pass  # Битый кэш — разбираем заново
+
+        with open(scen_path, 'rb') as f:
+            table = ScenarioTable.from_bytes(f.read(), scen_path)
+        if cache_path:
+            try:
+                os.makedirs(SCEN_CACHE_DIR, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+                np.savez(tmp_path, **{name: getattr(table, name) for name in ScenarioTable.COLUMNS})
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"⚠️ Не удалось сохранить кэш сценария {os.path.basename(scen_path)}: {e}")
+        return table
+
+    @staticmethod
+    def parse_scenarios(scen_path):
+        """Сценарии списком словарей (id, map_name, start, goal, optimal_len)"""
+        return MapParser.load_scenarios(scen_path).to_dicts()
+
+
+class ScenarioTable:
+    """
+    Задачи сценария по колонкам:
+      ids          int32 (N,)    — номер задачи в файле
+      bucket       int32 (N,)
+      map_id       int32 (N,)    — индекс в map_names
+      starts/goals int32 (N, 2)  — (x, y), сразу годятся для find_paths
+      optimal_len  float64 (N,)
+    """
+    COLUMNS = ("ids", "bucket", "map_id", "map_names", "starts", "goals", "optimal_len")
+
+    def __init__(self, ids, bucket, map_id, map_names, starts, goals, optimal_len):
+        self.ids = ids
+        self.bucket = bucket
+        self.map_id = map_id
+        self.map_names = [str(name) for name in map_names]
+        self.starts = starts
+        self.goals = goals
+        self.optimal_len = optimal_len
+
+    @classmethod
+    def empty(cls):
+        ints = np.zeros(0, dtype=np.int32)
+        pairs = np.zeros((0, 2), dtype=np.int32)
+        return cls(ints, ints, ints, [], pairs, pairs, np.zeros(0))
+
+    @classmethod
+    def from_bytes(cls, data, scen_path=""):
+        # Строка задачи: bucket, карта, ширина, высота, sx, sy, gx, gy, длина
+        tokens = data.split()
+        if tokens[:1] == [b"version"]:
+            tokens = tokens[2:]
+            data = data.lstrip().split(b"\n", 1)[1] if tokens else b""  # Без строки version
+        if not tokens:
+            return cls.empty()
+        if len(tokens) % 9 != 0:
+            raise ValueError(f"Некорректный формат сценария: {scen_path}")
+
+        names = tokens[1::9]
+        unique_names = sorted(set(names))
+        if len(unique_names) == 1:
+            map_id = np.zeros(len(names), dtype=np.int32)
+        else:
+            map_id = np.unique(np.array(names), return_inverse=True)[1].astype(np.int32)
+
+        # Числа — одним проходом np.fromstring по тексту без имен карт (имена
+        # длинные сначала, чтобы не резать одно имя внутри другого). Имя,
+        # похожее на число, так не вырезать — тогда разбор по токенам
+        if all(name.strip(b"0123456789.+-eE") for name in unique_names):
+            for name in sorted(unique_names, key=len, reverse=True):
+                data = data.replace(name, b" ")
+            numbers = np.fromstring(data, sep=" ")
+        else:
+            numbers = np.array([token for i, token in enumerate(tokens) if i % 9 != 1], dtype=np.float64)
+        if numbers.size != len(names) * 8:
+            raise ValueError(f"Некорректный формат сценария: {scen_path}")
+        numbers = numbers.reshape(-1, 8)
+
+        coords = numbers[:, 3:7].astype(np.int32)
+        return cls(
+            ids=np.arange(len(names), dtype=np.int32),
+            bucket=numbers[:, 0].astype(np.int32),
+            map_id=map_id,
+            map_names=[name.decode() for name in unique_names],
+            starts=np.ascontiguousarray(coords[:, 0:2]),
+            goals=np.ascontiguousarray(coords[:, 2:4]),
+            optimal_len=numbers[:, 7].copy(),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def map_name(self):
+        """Карта первой задачи (в файлах MovingAI она одна на сценарий)"""
+        return self.map_names[self.map_id[0]] if len(self) else None
+
+    def take(self, indices):
+        """Подмножество задач по индексам (номера задач в файле сохраняются)"""
+        return ScenarioTable(self.ids[indices], self.bucket[indices], self.map_id[indices],
+                             self.map_names, self.starts[indices], self.goals[indices],
+                             self.optimal_len[indices])
+
+    def to_dicts(self):
+        starts = self.starts.tolist()
+        goals = self.goals.tolist()
+        optimal = self.optimal_len.tolist()
+        return [{"id": task_id,
+                 "map_name": self.map_names[map_id],
+                 "start": tuple(starts[i]),
+                 "goal": tuple(goals[i]),
+                 "optimal_len": optimal[i]}
+                for i, (task_id, map_id) in enumerate(zip(self.ids.tolist(), self.map_id.tolist()))]
 
 # Простой тест при запуске файла
 if __name__ == "__main__":
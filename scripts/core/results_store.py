@@ -0,0 +1,88 @@
+import os
+import csv
+import json
+import hashlib
+import config
+import pathfinding_core as pfc
+from core.map_parser import file_digest
+
+
+def core_build_id():
+    """Id сборки ядра — хэш файла модуля pathfinding_core. Пересборка с другим кодом или флагами дает новый id"""
+    return file_digest(pfc.__file__)
+
+
+class ResultsStore:
+    """
+    Хранилище строк CSV эксперимента по ключу конфигурации:
+    data/results_store/<сборка ядра>/<карта>.<хэш карты>/<сценарий>.c<связность>.<хэш параметров>.csv
+
+    В параметры входит все, что влияет на результат задачи: алгоритм, эвристика,
+    вес, очередь, бюджеты. В файле по строке на задачу (TaskID). Строки
+    дописываются после каждой единицы работы (с fsync), поэтому прерванный
+    прогон продолжается с последней записанной единицы. Пересчитанные задачи
+    (--fresh) заменяют свои старые строки, а не дублируют их.
+    """
+
+    def __init__(self, header, root=None):
+        self.header = list(header)
+        self.task_column = self.header.index("TaskID")
+        self.root = os.path.join(root if root else config.RESULTS_STORE_DIR, core_build_id())
+
+    def path(self, map_path, scen_file, conn, params):
+        # Заголовок CSV — код Python, а не ядра: его смена тоже дает новый ключ
+        key = json.dumps({"params": params, "header": self.header}, sort_keys=True)
+        tag = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        map_dir = f"{os.path.basename(map_path)}.{file_digest(map_path)}"
+        return os.path.join(self.root, map_dir, f"{scen_file}.c{conn}.{tag}.csv")
+
+    def load(self, path):
+        """{TaskID: строка}. Файл с другим заголовком не используется, оборванные строки пропускаются"""
+        if not os.path.exists(path):
+            return {}
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            if next(reader, None) != self.header:
+                return {}
+            return {int(row[self.task_column]): row for row in reader if len(row) == len(self.header)}
+
+    def append(self, path, rows):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        stored = self.load(path)
+        if any(int(row[self.task_column]) in stored for row in rows):
+            self._replace(path, stored, rows)
+            return
+        with open(path, 'a+b') as f:
+            # Файл с чужим заголовком load() не читает: начинаем его заново,
+            # иначе новые строки копились бы под старым заголовком
+            with open(path, newline='') as text:
+                if next(csv.reader(text), None) != self.header:
+                    f.truncate(0)
+            # Прогон мог оборваться посреди строки: отрезаем хвост до последнего перевода строки
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    f.seek(0)
+                    f.truncate(f.read().rfind(b"\n") + 1)
+            new_file = f.seek(0, os.SEEK_END) == 0
+
+        with open(path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(self.header)
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replace(self, path, stored, rows):
+        """Задачи пересчитаны: файл переписывается целиком (временный файл и подмена)"""
+        stored.update((int(row[self.task_column]), row) for row in rows)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+            writer.writerows(stored.values())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
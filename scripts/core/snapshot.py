@@ -0,0 +1,36 @@
+import os
+import config
+import pathfinding_core as pfc
+from core.map_parser import MapParser, file_digest
+
+
+def snapshot_path(map_path):
+    """Путь к снимку планировщика карты: data/snapshots/<карта>.<хэш карты>.pfs"""
+    map_name = os.path.basename(map_path)
+    return os.path.join(config.SNAPSHOT_DIR, f"{map_name}.{file_digest(map_path)}.pfs")
+
+
+def load_planner(map_path, use_mmap=True):
+    """
+    Планировщик карты без разбора .map и подсчета масок и компонент.
+    Снимок ищется по хэшу содержимого карты. Если он есть — отображаем его в
+    память (mmap): все процессы на этой карте делят одну копию через page
+    cache. Иначе строим планировщик по карте и сохраняем снимок.
+    """
+    path = snapshot_path(map_path)
+
+    if os.path.exists(path):
+        try:
+            return pfc.PathPlanner.load(path, mmap=use_mmap)
+        except RuntimeError as e:
+            print(f"⚠️ Снимок {os.path.basename(path)} не подходит ({e}), строим заново")
+
+    width, height, grid = MapParser.parse_map(map_path, as_array=True)
+    planner = pfc.PathPlanner(width, height, grid)
+    os.makedirs(config.SNAPSHOT_DIR, exist_ok=True)
+    # Пишем во временный файл и подменяем: процессы, которые уже отобразили
+    # старый снимок, продолжают читать его страницы
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    planner.save(tmp_path)
+    os.replace(tmp_path, path)
+    return planner
@@ -1,8 +1,10 @@
 from PIL import Image, ImageDraw
 
-def save_map_image(width, height, grid, path=None, start=None, goal=None, filename="path_viz.png"):
+def save_map_image(width, height, grid, path=None, start=None, goal=None, filename="path_viz.png", trace=None):
     """
     Визуализация карты, где путь закрашивается целыми клетками.
+    trace: трасса раскрытий (result.trace из find_path(..., trace_stride=k)) —
+    рисуется тепловой картой под путем: цвет клетки — когда ее раскрыли.
     """
     # 1. Настройка масштаба (cell_size пикселей на одну клетку)
     if width > 512 or height > 512:
@@ -21,6 +23,8 @@ def save_map_image(width, height, grid, path=None, start=None, goal=None, filena
     COLOR_PATH = (255, 150, 150)    # Путь (нежно-красный, чтобы не перекрывал маркеры)
     COLOR_START = (0, 200, 0)       # Старт (зеленый)
     COLOR_GOAL = (0, 0, 200)        # Цель (синий)
+    COLOR_TRACE_EARLY = (255, 230, 90)   # Раскрыта рано (желтый)
+    COLOR_TRACE_LATE = (120, 40, 160)    # Раскрыта поздно (фиолетовый)
 
     img = Image.new("RGB", (img_width, img_height), COLOR_FREE)
     draw = ImageDraw.Draw(img)
@@ -32,13 +36,29 @@ def save_map_image(width, height, grid, path=None, start=None, goal=None, filena
                 shape = [x * cell_size, y * cell_size, (x + 1) * cell_size, (y + 1) * cell_size]
                 draw.rectangle(shape, fill=COLOR_WALL)
 
-    # 3. Закрашиваем клетки ПУТИ
-    if path:
+    # 3. Тепловая карта раскрытий: слой (H, W) целиком в NumPy, затем масштаб
+    # до клеток и наложение по маске раскрытых клеток
+    if trace is not None and len(trace):
+        import numpy as np
+        order = trace['step'] / max(int(trace['step'][-1]), 1)
+        early = np.array(COLOR_TRACE_EARLY, dtype=np.float64)
+        late = np.array(COLOR_TRACE_LATE, dtype=np.float64)
+        ys, xs = np.divmod(trace['cell'], width)
+        layer = np.zeros((height, width, 3), dtype=np.uint8)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        layer[ys, xs] = (early + (late - early) * order[:, None]).astype(np.uint8)
+        mask[ys, xs] = 255
+        size = (img_width, img_height)
+        img.paste(Image.fromarray(layer).resize(size, Image.NEAREST), (0, 0),
+                  Image.fromarray(mask).resize(size, Image.NEAREST))
+
+    # 4. Закрашиваем клетки ПУТИ
+    if path is not None and len(path):
         for (x, y) in path:
             shape = [x * cell_size, y * cell_size, (x + 1) * cell_size, (y + 1) * cell_size]
             draw.rectangle(shape, fill=COLOR_PATH)
 
-    # 4. Рисуем маркеры Старта и Финиша (поверх пути)
+    # 5. Рисуем маркеры Старта и Финиша (поверх пути)
     def fill_cell(pos, color):
         if pos:
             x, y = pos
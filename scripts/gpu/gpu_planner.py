@@ -1,3 +1,4 @@
+import numpy as np
 import torch
 import torch.nn.functional as F
 from gpu.bfs import bfs_distance_maps
@@ -12,7 +13,12 @@ class GPUPathPlanner:
         
         # 0 - свободно, 1 - препятствие
         # массив на C++  ---> 2D bool тензор PyTorch
-        grid_tensor = torch.tensor(grid, dtype=torch.bool, device=self.device)
+        if isinstance(grid, (list, tuple)):
+            grid_tensor = torch.tensor(grid, dtype=torch.bool, device=self.device)
+        else:
+            # NumPy/буфер (в том числе memmap кэша карт, только для чтения):
+            # маска стен считается на CPU, копия — только при переносе на устройство
+            grid_tensor = torch.from_numpy(np.asarray(grid) != 0).to(device=self.device)
         self.obstacles = grid_tensor.reshape((self.height, self.width))
 
     def get_cost2go_windows_batch(self, agents, goals, radius):
@@ -54,10 +54,18 @@ def main():
     vis_parser.add_argument('--id', type=int, default=config.DEFAULT_VISUAL_ID, help='Task ID from scenario')
     vis_parser.add_argument('--limit', type=int, default=config.DEFAULT_VISUAL_LIMIT, help='Run N tasks sequentially')
     vis_parser.add_argument('--radius', type=int, default=config.RADIUS, help='Radius of window for cost2go')
+    vis_parser.add_argument('--trace-stride', type=int, default=config.VISUAL_TRACE_STRIDE,
+                            help='Heatmap of expansions: record every k-th expansion (0 = off)')
 
     # --- 2. BENCH (CPU) ---
     bench_parser = subparsers.add_parser('bench', help='Быстрый бенчмарк поиска пути в консоль')
     bench_parser.add_argument('--limit', type=int, default=config.BENCH_LIMIT, help='Tasks per scenario')
+    bench_parser.add_argument('--queue', type=str, default='binary', choices=config.QUEUE_REGISTRY.keys(),
+                              help='Open list backend (bucket/radix only for Dijkstra)')
+    bench_parser.add_argument('--threads', type=int, default=config.EXP_THREADS,
+                              help='C++ threads per batch (default 1 for accurate timing, 0 = all cores)')
+    bench_parser.add_argument('--cpd', action='store_true',
+                              help='Also build/load the first-move table (CPD) and report build time, file size, lookup latency')
 
     # --- 3. EXP (EXPERIMENTS) ---
     exp_parser = subparsers.add_parser('exp', help='Массовые эксперименты (CSV)')
@@ -65,6 +73,13 @@ def main():
                             default=config.EXP_SAMPLING_MODE, help='Sampling mode')
     exp_parser.add_argument('--count', type=int, default=config.EXP_SAMPLING_COUNT, help='Tasks count per map')
     exp_parser.add_argument('--map', type=str, default=config.EXP_TARGET_MAP, help='Target map name')
+    exp_parser.add_argument('--threads', type=int, default=config.EXP_THREADS,
+                            help='C++ threads per batch (default 1 for accurate timing, 0 = all cores)')
+    exp_parser.add_argument('--jobs', type=int, default=config.EXP_JOBS, help='Worker processes (1 = run in this process)')
+    exp_parser.add_argument('--pin', action='store_true', default=config.EXP_PIN_WORKERS,
+                            help='Pin each worker process to its own CPU (Linux)')
+    exp_parser.add_argument('--fresh', action='store_true',
+                            help='Recompute all tasks instead of reusing the results store')
 
     # --- 4. BENCH-GPU (Cost2Go) ---
     gpu_parser = subparsers.add_parser('bench-gpu', help='Умный бенчмарк Cost2Go: CPU vs GPU')
@@ -75,6 +90,7 @@ def main():
     gpu_parser.add_argument('--map', type=str, default=None, help='Запуск только для конкретной карты')
     gpu_parser.add_argument('--fast_break', action=argparse.BooleanOptionalAction, default=True, 
                             help='Останавливать ли подсчет cost2go на CPU')
+    gpu_parser.add_argument('--threads', type=int, default=config.EXP_THREADS, help='C++ threads for CPU cost2go batch (default 1, 0 = all cores)')
 
     args = parser.parse_args()
 
@@ -83,7 +99,9 @@ def main():
     elif args.command == 'bench':
         run_bench_logic(args)
     elif args.command == 'exp':
-        run_experiments_logic(sampling_mode=args.mode, sampling_count=args.count, target_map=args.map)
+        run_experiments_logic(sampling_mode=args.mode, sampling_count=args.count, target_map=args.map,
+                              threads=args.threads, jobs=args.jobs, pin=args.pin,
+                              fresh=args.fresh)
     elif args.command == 'bench-gpu':
         run_bench_gpu_logic(args)
 
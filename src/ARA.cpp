@@ -0,0 +1,207 @@
+#include <chrono>
+
+#include "PathPlanner.h"
+
+// ARA* (Likhachev, Gordon, Thrun): серия WA* с убывающим весом, где каждая
+// итерация продолжает предыдущую. g и предки сохраняются, в OPEN остаются
+// нераскрытые клетки, а клетки, улучшенные после закрытия (INCONS),
+// возвращаются в OPEN перед следующей итерацией.
+//
+// После итерации доказанная граница субоптимальности
+//   bound = min(w, g(goal) / min_{OPEN ∪ INCONS} (g + h))
+// (для согласованной эвристики). Поиск прекращается при bound = 1
+// или когда кончился бюджет — тогда возвращается лучший найденный путь.
+
+namespace {
+
+// Шаг уменьшения веса между итерациями
+constexpr double kWeightStep = 0.5;
+
+}  // namespace
+
+template <class OpenList>
+SearchResult PathPlanner::runARA(SearchContext& ctx, OpenList& open_set,
+                                 int start_id, int goal_id,
+                                 HeuristicType h_type, double weight,
+                                 int connectivity,
+                                 const SearchBudget& budget) const {
+  using clock = std::chrono::high_resolution_clock;
+  auto start_time = clock::now();
+  // Повторные раскрытия считаются по всему поиску: у ARA* они между
+  // итерациями штатные
+  StatsCollector stats;
+  stats.track(ctx.expansion_marks, ctx.cells);
+  auto elapsed = [&] {
+    return std::chrono::duration<double>(clock::now() - start_time).count();
+  };
+  const double inf = std::numeric_limits<double>::infinity();
+
+  // Метки CLOSED / INCONS: значение = номер итерации, в которой клетка туда попала
+  // (номера не переполняются: задолго до предела int метки сбрасываются)
+  const size_t cells = ctx.cells;
+  if (ctx.closed_epoch.size() != cells ||
+      ctx.anytime_id > std::numeric_limits<int>::max() / 2) {
+    ctx.closed_epoch.assign(cells, 0);
+    ctx.incons_epoch.assign(cells, 0);
+    ctx.anytime_id = 0;
+  }
+  std::vector<int>& incons = ctx.fifo;  // Очередь BFS тут свободна
+  incons.clear();
+
+  ctx.beginSearch();
+  ctx.dist_matrix[start_id] = 0.0;
+  ctx.search_epoch[start_id] = ctx.current_search_id;
+
+  double w = std::max(1.0, weight);
+  auto key = [&](int id, double g) {
+    return g + w * calculateHeuristic(id, goal_id, h_type);
+  };
+  open_set.push({start_id, key(start_id, 0.0), 0.0});
+  stats.pushed(open_set.size());
+  stats.touched();
+
+  int expanded_nodes = 0;
+  BudgetGuard guard(budget);
+  bool stopped = false;
+  int frontier = -1;  // Лучшая клетка фронта, если бюджет кончился до первого пути
+  double bound = inf;
+  std::vector<AnytimeSolution> solutions;
+  std::vector<Node> pending;
+  TraceRecorder trace(ctx.trace, ctx.trace_stride, ctx.cells);
+  stats.loop();
+
+  while (true) {
+    const int iteration = ++ctx.anytime_id;
+
+    // ImprovePath: раскрываем, пока в OPEN есть ключ меньше g(goal)
+    while (!open_set.empty()) {
+      Node current = open_set.pop();
+      if (current.g_score > ctx.getDistance(current.id) + 1e-9 ||
+          ctx.closed_epoch[current.id] == iteration) {
+        stats.stalePop();
+        continue;
+      }
+      if (ctx.getDistance(goal_id) <= current.f_score + 1e-9) {
+        open_set.push(current);  // Остается в OPEN на следующую итерацию
+        break;
+      }
+      if (guard.exhausted(expanded_nodes)) {
+        frontier = current.id;
+        stopped = true;
+        break;
+      }
+
+      ctx.closed_epoch[current.id] = iteration;
+      expanded_nodes++;
+      stats.expanded(ctx.expansion_marks, current.id);
+      trace.record(current.id, current.g_score, current.f_score);
+      getNeighbors(current.id, connectivity, ctx.neighbors_cache, ctx.costs_cache);
+      stats.generated(static_cast<int>(ctx.neighbors_cache.size()));
+      for (size_t i = 0; i < ctx.neighbors_cache.size(); ++i) {
+        int next = ctx.neighbors_cache[i];
+        double new_g = current.g_score + ctx.costs_cache[i];
+        if (new_g < ctx.getDistance(next) - 1e-9) {
+          stats.touched(ctx.search_epoch[next] != ctx.current_search_id);
+          ctx.dist_matrix[next] = new_g;
+          ctx.search_epoch[next] = ctx.current_search_id;
+          ctx.came_from[next] = current.id;
+          if (ctx.closed_epoch[next] != iteration) {
+            open_set.push({next, key(next, new_g), new_g});
+            stats.pushed(open_set.size());
+          } else if (ctx.incons_epoch[next] != iteration) {
+            ctx.incons_epoch[next] = iteration;
+            incons.push_back(next);
+          }
+        }
+      }
+    }
+
+    const double goal_g = ctx.getDistance(goal_id);
+    if (stopped || goal_g == inf) break;  // Бюджет или пути нет (OPEN пуст)
+
+    // OPEN ∪ INCONS без устаревших записей, заодно min(g + h) для границы
+    pending.clear();
+    double min_f = goal_g;
+    auto collect = [&](int id) {
+      double g = ctx.getDistance(id);
+      min_f = std::min(min_f, g + calculateHeuristic(id, goal_id, h_type));
+      pending.push_back({id, 0.0, g});
+    };
+    while (!open_set.empty()) {
+      Node node = open_set.pop();
+      if (node.g_score > ctx.getDistance(node.id) + 1e-9 ||
+          ctx.closed_epoch[node.id] == iteration ||
+          ctx.incons_epoch[node.id] == -iteration)
+        continue;
+      ctx.incons_epoch[node.id] = -iteration;  // Уже собрана
+      collect(node.id);
+    }
+    for (int id : incons) {
+      if (ctx.incons_epoch[id] == -iteration) continue;
+      ctx.incons_epoch[id] = -iteration;
+      collect(id);
+    }
+    incons.clear();
+
+    bound = std::min(w, goal_g / std::max(min_f, 1e-12));
+    solutions.push_back({elapsed(), goal_g, bound});
+    if (bound <= 1.0 + 1e-9 || w <= 1.0) break;
+
+    // Следующая итерация: меньший вес, CLOSED пуст (новый номер итерации)
+    w = std::max(1.0, std::min(w - kWeightStep, bound));
+    for (Node& node : pending) {
+      node.f_score = key(node.id, node.g_score);
+      open_set.push(node);
+      stats.pushed(open_set.size());
+    }
+  }
+
+  stats.reconstruct();
+
+  // Реконструкция по предкам (g вдоль цепочки только убывает — циклов нет)
+  const bool found = ctx.getDistance(goal_id) < inf;
+  const int target = found ? goal_id : frontier;
+  std::vector<std::pair<int, int>> path;
+  double path_length = 0.0;
+  if (target >= 0) {
+    for (int curr = target; curr != start_id; curr = ctx.came_from[curr]) {
+      if (ctx.keep_path) path.push_back(toCoord(curr));
+      int prev = ctx.came_from[curr];
+      bool diag = curr % width_ != prev % width_ && curr / width_ != prev / width_;
+      path_length += diag ? DIAG_COST : 1.0;
+    }
+    if (ctx.keep_path) {
+      path.push_back(toCoord(start_id));
+      std::reverse(path.begin(), path.end());
+    }
+    // Прерванная итерация могла улучшить путь. Граница для него — прежняя
+    // (до конца первой итерации граница не доказана: inf)
+    if (found && (solutions.empty() || path_length < solutions.back().cost - 1e-9))
+      solutions.push_back({elapsed(), path_length, bound});
+  }
+
+  SearchResult result;
+  result.path = std::move(path);
+  result.found = found;
+  result.expanded_nodes = expanded_nodes;
+  result.path_length = path_length;
+  result.execution_time = elapsed();
+  result.solutions = std::move(solutions);
+  result.stop_reason = guard.reason();
+  stats.finish(result.stats);
+  return result;
+}
+
+// findPathImpl выбирает очередь в рантайме — инстанцируем все варианты
+template SearchResult PathPlanner::runARA(SearchContext&, BinaryHeapQueue&, int,
+                                          int, HeuristicType, double, int,
+                                          const SearchBudget&) const;
+template SearchResult PathPlanner::runARA(SearchContext&, IndexedDAryHeap&, int,
+                                          int, HeuristicType, double, int,
+                                          const SearchBudget&) const;
+template SearchResult PathPlanner::runARA(SearchContext&, BucketQueue&, int, int,
+                                          HeuristicType, double, int,
+                                          const SearchBudget&) const;
+template SearchResult PathPlanner::runARA(SearchContext&, RadixHeap&, int, int,
+                                          HeuristicType, double, int,
+                                          const SearchBudget&) const;
@@ -0,0 +1,184 @@
+#include <chrono>
+
+#include "PathPlanner.h"
+
+// Двунаправленный A* / Dijkstra.
+//
+// Прямой поиск идет от старта, обратный — от цели (сетка неориентированная,
+// поэтому обратный поиск использует тот же getNeighbors). Чтобы критерий
+// остановки был простым и точным, обе стороны работают с усредненными
+// потенциалами (Ikeda et al.):
+//   p(v) = (h(v, goal) - h(v, start)) / 2,
+//   ключ прямого поиска  k_f(v) = g_f(v) + p(v),
+//   ключ обратного поиска k_b(v) = g_b(v) - p(v).
+// При согласованной эвристике приведенные веса ребер неотрицательны, ключи
+// каждой стороны не убывают, и поиск можно остановить, как только
+// k_f(top) + k_b(top) >= mu (mu — лучший найденный путь через точку встречи).
+// Для Dijkstra p = 0 и это обычный критерий двунаправленной Дейкстры.
+// Критерию нужен точный порядок извлечения, поэтому Bucket (порядок внутри
+// корзины произвольный) заменяется на Radix в resolveQueue.
+// Вес WA* не применяется: режим всегда оптимальный.
+
+template <class OpenList>
+SearchResult PathPlanner::runBidirectional(SearchContext& fwd,
+                                           SearchContext& bwd,
+                                           OpenList& open_f, OpenList& open_b,
+                                           int start_id, int goal_id,
+                                           HeuristicType h_type,
+                                           int connectivity,
+                                           const SearchBudget& budget) const {
+  auto start_time = std::chrono::high_resolution_clock::now();
+  // Счетчики по обеим сторонам вместе, открытый список — сумма двух
+  StatsCollector stats;
+  stats.track(fwd.expansion_marks, fwd.cells);
+  stats.track(bwd.expansion_marks, bwd.cells);
+
+  auto potential = [&](int id) {
+    if (h_type == HeuristicType::Zero) return 0.0;
+    return 0.5 * (calculateHeuristic(id, goal_id, h_type) -
+                  calculateHeuristic(id, start_id, h_type));
+  };
+
+  fwd.beginSearch();
+  fwd.dist_matrix[start_id] = 0.0;
+  fwd.search_epoch[start_id] = fwd.current_search_id;
+  bwd.beginSearch();
+  bwd.dist_matrix[goal_id] = 0.0;
+  bwd.search_epoch[goal_id] = bwd.current_search_id;
+
+  // Последний извлеченный ключ стороны — нижняя граница ее открытого списка.
+  // 0.0 - p, а не -p: ключ -0.0 сломал бы RadixHeap (битовое сравнение)
+  double last_f = potential(start_id);
+  double last_b = 0.0 - potential(goal_id);
+  open_f.push({start_id, last_f, 0.0});
+  open_b.push({goal_id, last_b, 0.0});
+  stats.pushed(1);
+  stats.pushed(2);
+  stats.touched();
+  stats.touched();
+
+  double mu = std::numeric_limits<double>::infinity();
+  int meeting = -1;
+  if (start_id == goal_id) {
+    mu = 0.0;
+    meeting = start_id;
+  }
+
+  int expanded_nodes = 0;
+  BudgetGuard guard(budget);
+  int frontier = -1;  // Клетка прямого фронта, если бюджет кончился до встречи
+  // Обе стороны пишут в одну трассу (g — своей стороны)
+  TraceRecorder trace(fwd.trace, fwd.trace_stride, fwd.cells);
+  stats.loop();
+
+  while (!open_f.empty() && !open_b.empty()) {
+    // Раскрываем сторону с меньшим открытым списком
+    bool forward = open_f.size() <= open_b.size();
+    SearchContext& ctx = forward ? fwd : bwd;
+    SearchContext& other = forward ? bwd : fwd;
+    Node current = forward ? open_f.pop() : open_b.pop();
+
+    if (current.g_score > ctx.getDistance(current.id) + 1e-9) {
+      stats.stalePop();
+      continue;
+    }
+
+    double& last = forward ? last_f : last_b;
+    last = std::max(last, current.f_score);
+    if (last_f + last_b >= mu - 1e-9) break;
+
+    if (guard.exhausted(expanded_nodes)) {
+      // Точка встречи уже есть — отдаем путь через нее (без гарантии
+      // оптимальности). Иначе частичный путь ведет к лучшей клетке прямого фронта
+      if (meeting < 0) {
+        if (forward) {
+          frontier = current.id;
+        } else {
+          while (!open_f.empty() && frontier < 0) {
+            Node node = open_f.pop();
+            if (node.g_score <= fwd.getDistance(node.id) + 1e-9) frontier = node.id;
+          }
+        }
+      }
+      break;
+    }
+
+    expanded_nodes++;
+    stats.expanded(ctx.expansion_marks, current.id);
+    trace.record(current.id, current.g_score, current.f_score);
+    getNeighbors(current.id, connectivity, ctx.neighbors_cache, ctx.costs_cache);
+    stats.generated(static_cast<int>(ctx.neighbors_cache.size()));
+
+    for (size_t i = 0; i < ctx.neighbors_cache.size(); ++i) {
+      int next = ctx.neighbors_cache[i];
+      double new_g = ctx.getDistance(current.id) + ctx.costs_cache[i];
+
+      if (new_g < ctx.getDistance(next)) {
+        stats.touched(ctx.search_epoch[next] != ctx.current_search_id);
+        ctx.dist_matrix[next] = new_g;
+        ctx.search_epoch[next] = ctx.current_search_id;
+        ctx.came_from[next] = current.id;
+
+        double p = potential(next);
+        (forward ? open_f : open_b).push({next, forward ? new_g + p : new_g - p, new_g});
+        stats.pushed(open_f.size() + open_b.size());
+
+        // Другая сторона уже была здесь — кандидат на кратчайший путь
+        double through = new_g + other.getDistance(next);
+        if (through < mu) {
+          mu = through;
+          meeting = next;
+        }
+      }
+    }
+  }
+
+  stats.reconstruct();
+
+  // Реконструкция: старт -> точка встречи по fwd, точка встречи -> цель по bwd
+  bool found = meeting >= 0;
+  std::vector<std::pair<int, int>> path;
+  if (found && fwd.keep_path) {
+    for (int curr = meeting; curr != start_id; curr = fwd.came_from[curr])
+      path.push_back(toCoord(curr));
+    path.push_back(toCoord(start_id));
+    std::reverse(path.begin(), path.end());
+    for (int curr = meeting; curr != goal_id;) {
+      curr = bwd.came_from[curr];
+      path.push_back(toCoord(curr));
+    }
+  } else if (frontier >= 0 && fwd.keep_path) {
+    for (int curr = frontier; curr != start_id; curr = fwd.came_from[curr])
+      path.push_back(toCoord(curr));
+    path.push_back(toCoord(start_id));
+    std::reverse(path.begin(), path.end());
+  }
+
+  auto end_time = std::chrono::high_resolution_clock::now();
+  std::chrono::duration<double> duration = end_time - start_time;
+
+  double length = found ? mu : (frontier >= 0 ? fwd.getDistance(frontier) : 0.0);
+  SearchResult result;
+  result.path = std::move(path);
+  result.found = found;
+  result.expanded_nodes = expanded_nodes;
+  result.path_length = length;
+  result.execution_time = duration.count();
+  result.stop_reason = guard.reason();
+  stats.finish(result.stats);
+  return result;
+}
+
+// findPathImpl выбирает очередь в рантайме — инстанцируем все варианты
+template SearchResult PathPlanner::runBidirectional(
+    SearchContext&, SearchContext&, BinaryHeapQueue&, BinaryHeapQueue&, int,
+    int, HeuristicType, int, const SearchBudget&) const;
+template SearchResult PathPlanner::runBidirectional(
+    SearchContext&, SearchContext&, IndexedDAryHeap&, IndexedDAryHeap&, int,
+    int, HeuristicType, int, const SearchBudget&) const;
+template SearchResult PathPlanner::runBidirectional(
+    SearchContext&, SearchContext&, BucketQueue&, BucketQueue&, int, int,
+    HeuristicType, int, const SearchBudget&) const;
+template SearchResult PathPlanner::runBidirectional(
+    SearchContext&, SearchContext&, RadixHeap&, RadixHeap&, int, int,
+    HeuristicType, int, const SearchBudget&) const;
@@ -0,0 +1,368 @@
+#include "CPD.h"
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <unistd.h>
+
+#include <atomic>
+#include <chrono>
+#include <cstring>
+#include <fstream>
+#include <stdexcept>
+#include <thread>
+
+#include "PathPlanner.h"
+
+namespace {
+
+// Смещение offsets в файле: после заголовка и rank, с выравниванием до 8 байт
+size_t offsetsPosition(int width, int height) {
+  size_t pos = sizeof(FirstMoveTable::Header) +
+               static_cast<size_t>(width) * height * sizeof(int32_t);
+  return (pos + 7) & ~size_t(7);
+}
+
+}  // namespace
+
+// --------------------------------------------------
+// FirstMoveTable
+// --------------------------------------------------
+
+void FirstMoveTable::assign(int connectivity, std::vector<int32_t> rank,
+                            const std::vector<std::vector<uint32_t>>& rows) {
+  reset();
+  connectivity_ = connectivity;
+  nodes_ = static_cast<int>(rows.size());
+  rank_storage_ = std::move(rank);
+
+  offset_storage_.assign(nodes_ + 1, 0);
+  for (int r = 0; r < nodes_; ++r)
+    offset_storage_[r + 1] = offset_storage_[r] + rows[r].size();
+  run_count_ = offset_storage_[nodes_];
+  run_storage_.reserve(run_count_);
+  for (const auto& row : rows)
+    run_storage_.insert(run_storage_.end(), row.begin(), row.end());
+
+  rank_ = rank_storage_.data();
+  offsets_ = offset_storage_.data();
+  runs_ = run_storage_.data();
+}
+
+void FirstMoveTable::save(const std::string& path, int width,
+                          int height) const {
+  if (empty()) throw std::runtime_error("Таблица первых ходов не построена");
+  std::ofstream out(path, std::ios::binary);
+  if (!out) throw std::runtime_error("Не удалось открыть " + path);
+  save(out, width, height);
+  if (!out) throw std::runtime_error("Ошибка записи " + path);
+}
+
+void FirstMoveTable::save(std::ostream& out, int width, int height) const {
+  Header header{{'P', 'F', 'C', 'P'}, kVersion, width, height, connectivity_,
+                nodes_, run_count_};
+  out.write(reinterpret_cast<const char*>(&header), sizeof(header));
+  const size_t cells = static_cast<size_t>(width) * height;
+  out.write(reinterpret_cast<const char*>(rank_), cells * sizeof(int32_t));
+  const size_t padding =
+      offsetsPosition(width, height) - sizeof(header) - cells * sizeof(int32_t);
+  const char zeros[8] = {};
+  out.write(zeros, padding);
+  out.write(reinterpret_cast<const char*>(offsets_),
+            (static_cast<size_t>(nodes_) + 1) * sizeof(uint64_t));
+  out.write(reinterpret_cast<const char*>(runs_), run_count_ * sizeof(uint32_t));
+}
+
+void FirstMoveTable::load(const std::string& path, int width, int height,
+                          bool use_mmap) {
+  std::ifstream in(path, std::ios::binary | std::ios::ate);
+  if (!in) throw std::runtime_error("Не удалось открыть " + path);
+  size_t file_size = static_cast<size_t>(in.tellg());
+  in.seekg(0);
+
+  Header header;
+  if (file_size < sizeof(header) ||
+      !in.read(reinterpret_cast<char*>(&header), sizeof(header)) ||
+      std::memcmp(header.magic, "PFCP", 4) != 0) {
+    throw std::runtime_error("Файл не является таблицей первых ходов: " + path);
+  }
+  if (header.version != kVersion)
+    throw std::runtime_error("Неподдерживаемая версия таблицы первых ходов");
+  if (header.width != width || header.height != height || header.nodes < 0)
+    throw std::runtime_error("Таблица первых ходов построена для другой карты");
+
+  const size_t cells = static_cast<size_t>(width) * height;
+  const size_t offsets_pos = offsetsPosition(width, height);
+  const size_t runs_pos =
+      offsets_pos + (static_cast<size_t>(header.nodes) + 1) * sizeof(uint64_t);
+  if (file_size != runs_pos + header.runs * sizeof(uint32_t))
+    throw std::runtime_error("Поврежденный файл первых ходов: " + path);
+
+  reset();
+  if (use_mmap) {
+    int fd = ::open(path.c_str(), O_RDONLY);
+    if (fd < 0) throw std::runtime_error("Не удалось открыть " + path);
+    void* addr = ::mmap(nullptr, file_size, PROT_READ, MAP_SHARED, fd, 0);
+    ::close(fd);
+    if (addr == MAP_FAILED) throw std::runtime_error("mmap не удался: " + path);
+    map_addr_ = addr;
+    map_size_ = file_size;
+    const char* base = static_cast<const char*>(addr);
+    rank_ = reinterpret_cast<const int32_t*>(base + sizeof(header));
+    offsets_ = reinterpret_cast<const uint64_t*>(base + offsets_pos);
+    runs_ = reinterpret_cast<const uint32_t*>(base + runs_pos);
+  } else {
+    rank_storage_.resize(cells);
+    offset_storage_.resize(static_cast<size_t>(header.nodes) + 1);
+    run_storage_.resize(header.runs);
+    in.read(reinterpret_cast<char*>(rank_storage_.data()), cells * sizeof(int32_t));
+    in.seekg(static_cast<std::streamoff>(offsets_pos));
+    in.read(reinterpret_cast<char*>(offset_storage_.data()),
+            offset_storage_.size() * sizeof(uint64_t));
+    in.read(reinterpret_cast<char*>(run_storage_.data()),
+            run_storage_.size() * sizeof(uint32_t));
+    if (!in) throw std::runtime_error("Ошибка чтения " + path);
+    rank_ = rank_storage_.data();
+    offsets_ = offset_storage_.data();
+    runs_ = run_storage_.data();
+  }
+
+  connectivity_ = header.connectivity;
+  nodes_ = header.nodes;
+  run_count_ = header.runs;
+}
+
+void FirstMoveTable::attach(const char* base, size_t size, int width,
+                            int height) {
+  Header header;
+  if (size < sizeof(header)) throw std::runtime_error("Поврежденная таблица первых ходов");
+  std::memcpy(&header, base, sizeof(header));
+  if (std::memcmp(header.magic, "PFCP", 4) != 0 || header.version != kVersion)
+    throw std::runtime_error("Неподдерживаемая таблица первых ходов");
+  if (header.width != width || header.height != height || header.nodes < 0)
+    throw std::runtime_error("Таблица первых ходов построена для другой карты");
+  const size_t offsets_pos = offsetsPosition(width, height);
+  const size_t runs_pos =
+      offsets_pos + (static_cast<size_t>(header.nodes) + 1) * sizeof(uint64_t);
+  if (size != runs_pos + header.runs * sizeof(uint32_t))
+    throw std::runtime_error("Поврежденная таблица первых ходов");
+
+  reset();
+  rank_ = reinterpret_cast<const int32_t*>(base + sizeof(header));
+  offsets_ = reinterpret_cast<const uint64_t*>(base + offsets_pos);
+  runs_ = reinterpret_cast<const uint32_t*>(base + runs_pos);
+  connectivity_ = header.connectivity;
+  nodes_ = header.nodes;
+  run_count_ = header.runs;
+  map_size_ = size;
+  attached_ = true;
+}
+
+size_t FirstMoveTable::bytes() const {
+  if (mapped()) return map_size_;
+  return rank_storage_.size() * sizeof(int32_t) +
+         offset_storage_.size() * sizeof(uint64_t) +
+         run_storage_.size() * sizeof(uint32_t);
+}
+
+void FirstMoveTable::reset() {
+  if (map_addr_) ::munmap(map_addr_, map_size_);
+  map_addr_ = nullptr;
+  map_size_ = 0;
+  attached_ = false;
+  rank_storage_.clear();
+  rank_storage_.shrink_to_fit();
+  offset_storage_.clear();
+  offset_storage_.shrink_to_fit();
+  run_storage_.clear();
+  run_storage_.shrink_to_fit();
+  rank_ = nullptr;
+  offsets_ = nullptr;
+  runs_ = nullptr;
+  connectivity_ = 0;
+  nodes_ = 0;
+  run_count_ = 0;
+}
+
+// --------------------------------------------------
+// Построение в PathPlanner
+// --------------------------------------------------
+
+// Дейкстра от source: first[v] — маска направлений первого шага всех
+// кратчайших путей в v (при равной длине маски объединяются — так строка
+// сжимается лучше). Достигнутые клетки отмечены эпохой ctx
+void PathPlanner::computeFirstMoves(SearchContext& ctx, int source,
+                                    int connectivity,
+                                    std::vector<uint8_t>& first) const {
+  ctx.beginSearch();
+  ctx.dist_matrix[source] = 0.0;
+  ctx.search_epoch[source] = ctx.current_search_id;
+  const unsigned dir_mask = connectivity == 8 ? 0xFF : 0x0F;
+
+  // Ребра >= 1, поэтому корзины Dial ширины 1 отдают клетку только после
+  // всех ее предков на кратчайших путях — маска к этому моменту полная
+  ctx.withOpenList(QueueType::Bucket, [&](auto& open_set) {
+    open_set.push({source, 0.0, 0.0});
+    while (!open_set.empty()) {
+      Node current = open_set.pop();
+      if (current.g_score > ctx.getDistance(current.id) + 1e-9) continue;
+
+      unsigned mask = neighbor_masks_[current.id] & dir_mask;
+      while (mask) {
+        int d = __builtin_ctz(mask);
+        mask &= mask - 1;
+        int next = current.id + dir_offset_[d];
+        uint8_t moves = current.id == source ? uint8_t(1u << d) : first[current.id];
+        double new_dist = current.g_score + (d < 4 ? 1.0 : DIAG_COST);
+        double old_dist = ctx.getDistance(next);
+        if (new_dist < old_dist - 1e-9) {
+          ctx.dist_matrix[next] = new_dist;
+          ctx.search_epoch[next] = ctx.current_search_id;
+          first[next] = moves;
+          open_set.push({next, new_dist, new_dist});
+        } else if (new_dist <= old_dist + 1e-9) {
+          first[next] |= moves;  // Еще один кратчайший путь
+        }
+      }
+    }
+  });
+}
+
+void PathPlanner::buildCPD(int connectivity, int threads) {
+  const int n = width_ * height_;
+  const unsigned dir_mask = connectivity == 8 ? 0xFF : 0x0F;
+
+  // 1. Порядок клеток — обход в глубину: соседние клетки получают
+  // близкие номера, и строки сжимаются в длинные отрезки
+  std::vector<int32_t> rank(n, -1);
+  std::vector<int> order;
+  std::vector<int> stack;
+  for (int seed = 0; seed < n; ++seed) {
+    if (rank[seed] >= 0 || isBlocked(seed)) continue;
+    stack.push_back(seed);
+    while (!stack.empty()) {
+      int id = stack.back();
+      stack.pop_back();
+      if (rank[id] >= 0) continue;
+      rank[id] = static_cast<int32_t>(order.size());
+      order.push_back(id);
+      unsigned mask = neighbor_masks_[id] & dir_mask;
+      while (mask) {
+        int d = 31 - __builtin_clz(mask);  // С конца, чтобы первым шел Right
+        mask &= ~(1u << d);
+        int next = id + dir_offset_[d];
+        if (rank[next] < 0) stack.push_back(next);
+      }
+    }
+  }
+  const int nodes = static_cast<int>(order.size());
+  if (nodes >= (1 << 29))
+    throw std::runtime_error("Слишком много свободных клеток для таблицы первых ходов");
+
+  // 2. Строки: по одной Дейкстре на клетку, клетки раздаются потокам
+  if (threads <= 0) threads = std::max(1u, std::thread::hardware_concurrency());
+  threads = std::max(1, std::min(threads, nodes));
+  ensureWorkerContexts(threads - 1);
+
+  std::vector<std::vector<uint32_t>> rows(nodes);
+  std::atomic<int> next_row{0};
+  auto worker = [&](SearchContext& ctx) {
+    std::vector<uint8_t> first(n, 0);
+    int r;
+    while ((r = next_row.fetch_add(1, std::memory_order_relaxed)) < nodes) {
+      const int source = order[r];
+      computeFirstMoves(ctx, source, connectivity, first);
+
+      // Жадно: отрезок тянется, пока у его клеток есть общий допустимый ход
+      std::vector<uint32_t>& row = rows[r];
+      unsigned allowed = 0xFF;
+      uint32_t begin = 0;
+      for (int t = 0; t < nodes; ++t) {
+        const int cell = order[t];
+        // Сама клетка и недостижимые — любой ход
+        if (cell == source || ctx.search_epoch[cell] != ctx.current_search_id)
+          continue;
+        if (allowed & first[cell]) {
+          allowed &= first[cell];
+          continue;
+        }
+        row.push_back((begin << 3) | __builtin_ctz(allowed));
+        begin = static_cast<uint32_t>(t);
+        allowed = first[cell];
+      }
+      row.push_back((begin << 3) | __builtin_ctz(allowed));
+      row.shrink_to_fit();
+    }
+  };
+
+  std::vector<std::thread> pool;
+  pool.reserve(threads - 1);
+  for (int t = 0; t < threads - 1; ++t)
+    pool.emplace_back(worker, std::ref(*worker_contexts_[t]));
+  worker(ctx_);
+  for (auto& th : pool) th.join();
+
+  cpd_.assign(connectivity, std::move(rank), rows);
+}
+
+void PathPlanner::saveCPD(const std::string& path) const {
+  cpd_.save(path, width_, height_);
+}
+
+void PathPlanner::loadCPD(const std::string& path, bool use_mmap) {
+  cpd_.load(path, width_, height_, use_mmap);
+  // Нумерация должна совпадать со стенами этой карты, иначе путь уйдет в стену
+  const int32_t* rank = cpd_.rank();
+  for (int i = 0; i < width_ * height_; ++i) {
+    if ((rank[i] < 0) != isBlocked(i) || rank[i] >= cpd_.nodes()) {
+      cpd_.reset();
+      throw std::runtime_error("Таблица первых ходов построена для другой карты");
+    }
+  }
+}
+
+// --------------------------------------------------
+// Запрос
+// --------------------------------------------------
+
+// Путь по таблице: на каждом шаге — первый ход из текущей клетки к цели
+SearchResult PathPlanner::runCPD(int start_id, int goal_id,
+                                 bool keep_path) const {
+  auto start_time = std::chrono::high_resolution_clock::now();
+  // Подготовки нет, проход по таблице и есть поиск
+  StatsCollector stats;
+  stats.countersUntracked();
+  stats.loop();
+
+  std::vector<std::pair<int, int>> path;
+  if (keep_path) path.push_back(toCoord(start_id));
+  double path_length = 0.0;
+  bool found = true;
+  const int max_steps = cpd_.nodes();
+  int id = start_id;
+  for (int step = 0; id != goal_id; ++step) {
+    if (step >= max_steps) {  // Защита от испорченной таблицы
+      found = false;
+      break;
+    }
+    int d = cpd_.firstMove(id, goal_id);
+    id += dir_offset_[d];
+    path_length += d < 4 ? 1.0 : DIAG_COST;
+    if (keep_path) path.push_back(toCoord(id));
+  }
+  if (!found) {
+    path.clear();
+    path_length = 0.0;
+  }
+  stats.reconstruct();
+
+  auto end_time = std::chrono::high_resolution_clock::now();
+  std::chrono::duration<double> duration = end_time - start_time;
+
+  SearchResult result;
+  result.path = std::move(path);
+  result.found = found;
+  result.path_length = path_length;
+  result.execution_time = duration.count();
+  stats.finish(result.stats);
+  return result;
+}
@@ -0,0 +1,331 @@
+#include <chrono>
+#include <stdexcept>
+#include <string>
+
+#include "PathPlanner.h"
+
+// Компактный режим для карт 4096² – 8192².
+//
+// Обычный контекст держит на клетку double g + int предок + int эпоха
+// (16 байт), запись кучи — 24 байта. Здесь:
+//   g        — uint32 в единицах 1/scale: ортогональный шаг = scale,
+//              диагональ = round(scale * sqrt(2)). Масштаб выбирается так,
+//              чтобы g любой клетки самой большой компоненты влез в uint32;
+//   метка    — uint32: (эпоха << 3) | направление шага из предка. Предок
+//              восстанавливается как клетка - dir_offset_[направление];
+//   запись   — CompactNode {f, g, id}, 12 байт.
+// Итого 8 байт на клетку (12 — если предок хранится индексом int32).
+// Длина пути в результате считается по настоящим стоимостям {1, sqrt(2)}.
+
+namespace {
+
+// Наибольший масштаб по умолчанию: диагональ 1448 / 1024 = 1.41406
+constexpr uint32_t kMaxAutoScale = 1024;
+constexpr uint32_t kMaxCost = std::numeric_limits<uint32_t>::max() - 1;
+
+inline uint32_t diagUnits(uint32_t scale) {
+  return static_cast<uint32_t>(std::lround(scale * std::sqrt(2.0)));
+}
+
+}  // namespace
+
+void PathPlanner::setCompactMode(bool enabled, bool direction_parents,
+                                 int scale) {
+  if (enabled) {
+    // Самый длинный кратчайший путь не длиннее числа клеток компоненты
+    // (8-связные компоненты включают 4-связные)
+    const std::vector<int>& sizes = component_sizes_[1];
+    const uint64_t max_steps =
+        sizes.empty() ? 1 : std::max(1, *std::max_element(sizes.begin(), sizes.end()));
+    auto fits = [&](uint32_t s) {
+      return s > 0 && max_steps * diagUnits(s) <= kMaxCost;
+    };
+
+    uint32_t s;
+    if (scale > 0) {
+      s = static_cast<uint32_t>(scale);
+      if (!fits(s))
+        throw std::invalid_argument(
+            "scale " + std::to_string(scale) +
+            " слишком большой для этой карты: g может переполнить uint32");
+    } else {
+      s = static_cast<uint32_t>(std::min<uint64_t>(
+          kMaxAutoScale, kMaxCost / (max_steps * 3 / 2 + 1)));
+      while (s > 0 && !fits(s)) s--;
+      if (s == 0)
+        throw std::invalid_argument("Карта слишком большая для компактного режима");
+    }
+    compact_.scale = s;
+    compact_.diag = diagUnits(s);
+    // h * h_scale не больше целой стоимости любого пути: оба шага
+    // масштабируются не сильнее, чем scale и diag
+    compact_.h_scale =
+        std::min<double>(s, compact_.diag / std::sqrt(2.0)) * (1.0 - 1e-12);
+  }
+
+  if (enabled != compact_.enabled ||
+      direction_parents != compact_.direction_parents) {
+    auto release = [&](SearchContext& ctx) {
+      if (enabled)
+        ctx.releaseStandard();
+      else
+        ctx.releaseCompact();
+    };
+    release(ctx_);
+    for (auto& ctx : worker_contexts_) release(*ctx);
+  }
+  compact_.enabled = enabled;
+  compact_.direction_parents = direction_parents;
+}
+
+void PathPlanner::refreshCompactScale() {
+  if (!compact_.enabled) return;
+  const std::vector<int>& sizes = component_sizes_[1];
+  const uint64_t max_steps =
+      sizes.empty() ? 1 : std::max(1, *std::max_element(sizes.begin(), sizes.end()));
+  if (max_steps * compact_.diag > kMaxCost)
+    setCompactMode(true, compact_.direction_parents, 0);
+}
+
+void PathPlanner::traceCompactPath(const SearchContext& ctx, int start_id,
+                                   int target,
+                                   std::vector<std::pair<int, int>>& path,
+                                   double& length) const {
+  length = 0.0;
+  int curr = target;
+  while (curr != start_id) {
+    if (ctx.keep_path) path.push_back(toCoord(curr));
+    int prev;
+    if (compact_.direction_parents) {
+      prev = curr - dir_offset_[ctx.compact_stamp[curr] & 7];
+    } else {
+      prev = ctx.compact_parent[curr];
+    }
+    bool diag = (curr % width_ != prev % width_) && (curr / width_ != prev / width_);
+    length += diag ? DIAG_COST : 1.0;
+    curr = prev;
+  }
+  if (!ctx.keep_path) return;
+  path.push_back(toCoord(start_id));
+  std::reverse(path.begin(), path.end());
+}
+
+// A* / WA* / Dijkstra (weight = 0) на целых стоимостях
+SearchResult PathPlanner::runCompact(SearchContext& ctx, int start_id,
+                                     int goal_id, HeuristicType h_type,
+                                     double weight, int connectivity,
+                                     const SearchBudget& budget) const {
+  auto start_time = std::chrono::high_resolution_clock::now();
+  StatsCollector stats;
+  stats.track(ctx.expansion_marks, ctx.cells);
+
+  const bool dir_parents = compact_.direction_parents;
+  const uint32_t step_cost[2] = {compact_.scale, compact_.diag};
+  ctx.beginCompactSearch(dir_parents);
+  const uint32_t tag = ctx.compact_epoch << 3;
+  uint32_t* g = ctx.compact_g.data();
+  uint32_t* stamp = ctx.compact_stamp.data();
+  int32_t* parent = dir_parents ? nullptr : ctx.compact_parent.data();
+
+  const bool zero_h = h_type == HeuristicType::Zero || weight == 0.0;
+  auto key = [&](int id, uint32_t g_value) -> uint32_t {
+    if (zero_h) return g_value;
+    double h = std::floor(calculateHeuristic(id, goal_id, h_type) * compact_.h_scale);
+    uint64_t f = g_value + static_cast<uint64_t>(weight * h);
+    return static_cast<uint32_t>(std::min<uint64_t>(f, kMaxCost));
+  };
+
+  CompactHeap& open_set = ctx.compact_open;
+  open_set.clear();
+  g[start_id] = 0;
+  stamp[start_id] = tag;
+  open_set.push({key(start_id, 0), 0, start_id});
+  stats.pushed(open_set.size());
+  stats.touched();
+
+  const unsigned dir_mask = connectivity == 8 ? 0xFF : 0x0F;
+  int expanded_nodes = 0;
+  bool found = false;
+  BudgetGuard guard(budget);
+  int frontier = -1;
+  TraceRecorder trace(ctx.trace, ctx.trace_stride, ctx.cells);
+  stats.loop();
+
+  while (!open_set.empty()) {
+    CompactNode current = open_set.pop();
+    if (current.g > g[current.id]) {  // Устаревшая запись
+      stats.stalePop();
+      continue;
+    }
+
+    if (current.id == goal_id) {
+      found = true;
+      break;
+    }
+    if (guard.exhausted(expanded_nodes)) {
+      frontier = current.id;
+      break;
+    }
+
+    expanded_nodes++;
+    stats.expanded(ctx.expansion_marks, current.id);
+    trace.record(current.id, current.g / double(compact_.scale),
+                 current.f / double(compact_.scale));
+    unsigned mask = neighbor_masks_[current.id] & dir_mask;
+    stats.generated(__builtin_popcount(mask));
+    while (mask) {
+      int d = __builtin_ctz(mask);
+      mask &= mask - 1;
+      int next = current.id + dir_offset_[d];
+      uint32_t new_g = current.g + step_cost[d >> 2];
+      // Клетка из прошлого поиска (другая эпоха) — как будто g = inf
+      const bool fresh = (stamp[next] & ~7u) != tag;
+      if (fresh || new_g < g[next]) {
+        stats.touched(fresh);
+        g[next] = new_g;
+        stamp[next] = tag | d;
+        if (parent) parent[next] = current.id;
+        open_set.push({key(next, new_g), new_g, next});
+        stats.pushed(open_set.size());
+      }
+    }
+  }
+  stats.reconstruct();
+
+  const int target = found ? goal_id : frontier;
+  std::vector<std::pair<int, int>> path;
+  double path_length = 0.0;
+  if (target >= 0) traceCompactPath(ctx, start_id, target, path, path_length);
+
+  auto end_time = std::chrono::high_resolution_clock::now();
+  std::chrono::duration<double> duration = end_time - start_time;
+
+  SearchResult result;
+  result.path = std::move(path);
+  result.found = found;
+  result.expanded_nodes = expanded_nodes;
+  result.path_length = path_length;
+  result.execution_time = duration.count();
+  result.stop_reason = guard.reason();
+  stats.finish(result.stats);
+  return result;
+}
+
+// BFS: g не нужен, только метка посещения с направлением
+SearchResult PathPlanner::runCompactBFS(SearchContext& ctx, int start_id,
+                                        int goal_id, int connectivity,
+                                        const SearchBudget& budget) const {
+  auto start_time = std::chrono::high_resolution_clock::now();
+  StatsCollector stats;
+
+  ctx.beginCompactSearch(compact_.direction_parents);
+  const uint32_t tag = ctx.compact_epoch << 3;
+  uint32_t* stamp = ctx.compact_stamp.data();
+  int32_t* parent =
+      compact_.direction_parents ? nullptr : ctx.compact_parent.data();
+
+  std::vector<int>& q = ctx.fifo;
+  q.clear();
+  q.push_back(start_id);
+  stamp[start_id] = tag;
+  size_t head = 0;
+  stats.pushed(1);
+  stats.touched();
+
+  const unsigned dir_mask = connectivity == 8 ? 0xFF : 0x0F;
+  int expanded_nodes = 0;
+  bool found = false;
+  BudgetGuard guard(budget);
+  int frontier = -1;
+  TraceRecorder trace(ctx.trace, ctx.trace_stride, ctx.cells);
+  stats.loop();
+
+  while (head < q.size()) {
+    int current = q[head++];
+
+    if (current == goal_id) {
+      expanded_nodes++;
+      found = true;
+      break;
+    }
+    if (guard.exhausted(expanded_nodes)) {
+      frontier = current;
+      break;
+    }
+    expanded_nodes++;
+    trace.record(current);
+
+    unsigned mask = neighbor_masks_[current] & dir_mask;
+    stats.generated(__builtin_popcount(mask));
+    while (mask) {
+      int d = __builtin_ctz(mask);
+      mask &= mask - 1;
+      int next = current + dir_offset_[d];
+      if ((stamp[next] & ~7u) != tag) {
+        stamp[next] = tag | d;
+        if (parent) parent[next] = current;
+        q.push_back(next);
+        stats.pushed(q.size() - head);
+        stats.touched();
+      }
+    }
+  }
+  stats.reconstruct();
+
+  const int target = found ? goal_id : frontier;
+  std::vector<std::pair<int, int>> path;
+  double path_length = 0.0;
+  if (target >= 0) traceCompactPath(ctx, start_id, target, path, path_length);
+
+  auto end_time = std::chrono::high_resolution_clock::now();
+  std::chrono::duration<double> duration = end_time - start_time;
+
+  SearchResult result;
+  result.path = std::move(path);
+  result.found = found;
+  result.expanded_nodes = expanded_nodes;
+  result.path_length = path_length;
+  result.execution_time = duration.count();
+  result.stop_reason = guard.reason();
+  stats.finish(result.stats);
+  return result;
+}
+
+size_t SearchContext::bytes() const {
+  size_t total = dist_matrix.capacity() * sizeof(double) +
+                 (came_from.capacity() + search_epoch.capacity() +
+                  closed_epoch.capacity() + incons_epoch.capacity() +
+                  fifo.capacity()) * sizeof(int) +
+                 binary_heap.bytes() + dary_heap.bytes() +
+                 bucket_queue.bytes() + radix_heap.bytes() +
+                 (compact_g.capacity() + compact_stamp.capacity()) * sizeof(uint32_t) +
+                 compact_parent.capacity() * sizeof(int32_t) +
+                 compact_open.bytes() +
+                 expansion_marks.epoch_of.capacity() * sizeof(int);
+  if (backward) total += backward->bytes();
+  if (dstar) total += dstar->bytes();
+  return total;
+}
+
+MemoryFootprint PathPlanner::memoryFootprint() const {
+  const size_t cells = static_cast<size_t>(width_) * height_;
+  MemoryFootprint m;
+  m.grid = obstacles_.bytes() + neighbor_masks_.bytes();
+  for (int c = 0; c < 2; ++c)
+    m.components += components_[c].bytes() +
+                    (component_sizes_[c].capacity() + free_labels_[c].capacity()) * sizeof(int);
+  m.components += (relabel_epoch_.capacity() + relabel_group_.capacity()) * sizeof(int);
+  m.search = ctx_.bytes();
+  for (const auto& ctx : worker_contexts_) m.search += ctx->bytes();
+  m.cost2go_cache = cost2go_cache_.stats().bytes;
+  m.landmarks = landmarks_.attached() ? 0 : landmarks_.bytes();
+  m.cpd = cpd_.attached() ? 0 : cpd_.bytes();
+  m.jump_table = jump_table_.bytes();
+  for (const auto& graph : hierarchies_)
+    if (graph) m.hierarchy += graph->bytes();
+  m.snapshot = snapshot_.size();
+  m.context_standard = cells * (sizeof(double) + 2 * sizeof(int));
+  m.context_compact = cells * (2 * sizeof(uint32_t) + sizeof(int32_t));
+  m.context_compact_dir = cells * 2 * sizeof(uint32_t);
+  return m;
+}
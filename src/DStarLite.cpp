@@ -0,0 +1,236 @@
+#include <chrono>
+
+#include "PathPlanner.h"
+
+// D* Lite (Koenig, Likhachev 2002), оптимизированная версия.
+//
+// Поиск идет от цели к старту: g(s) — расстояние от s до цели, rhs(s) —
+// оценка на шаг вперед (min по соседям cost + g). Клетка согласована, если
+// g == rhs; в куче лежат несогласованные клетки с ключом
+//   (min(g, rhs) + h(start, s) + km, min(g, rhs)).
+// Решение живет в SearchContext::dstar между запросами. Следующий запрос к
+// той же цели (связность и эвристика те же):
+//   - сдвиг старта копится в km вместо пересчета ключей всей кучи;
+//   - у клеток из pending (их задел setCells) пересчитывается rhs;
+//   - цикл раскрывает только клетки, оценки которых реально поменялись.
+// Другая цель — решение строится заново. При остановке бюджетом пути нет
+// (в отличие от прямых поисков, частичного пути от старта не бывает: фронт
+// растет от цели, а g у клеток возле старта еще бесконечны), но состояние
+// согласовано: следующий запрос продолжит с того же места.
+// Landmark работает как Octile: таблица ориентиров сбрасывается правками карты
+
+namespace {
+
+constexpr double kInf = std::numeric_limits<double>::infinity();
+
+inline bool keyLess(double a1, double a2, double b1, double b2) {
+  return a1 < b1 || (a1 == b1 && a2 < b2);
+}
+
+// Для std::*_heap: наверху минимальный ключ
+struct EntryAfter {
+  bool operator()(const DStarEntry& a, const DStarEntry& b) const {
+    return keyLess(b.k1, b.k2, a.k1, a.k2);
+  }
+};
+
+}  // namespace
+
+SearchResult PathPlanner::runDStarLite(SearchContext& ctx, int start_id,
+                                       int goal_id, HeuristicType h_type,
+                                       int connectivity,
+                                       const SearchBudget& budget) const {
+  auto start_time = std::chrono::high_resolution_clock::now();
+  StatsCollector stats;
+  stats.track(ctx.expansion_marks, ctx.cells);
+  // Решение живет между запросами, "впервые затронутых в этом поиске" клеток нет
+  stats.untracked(&SearchStats::touched);
+
+  if (h_type == HeuristicType::Landmark) h_type = HeuristicType::Octile;
+  if (!ctx.dstar) ctx.dstar = std::make_unique<DStarLiteState>();
+  DStarLiteState& s = *ctx.dstar;
+  std::vector<double>& g = s.g;
+  std::vector<double>& rhs = s.rhs;
+  std::vector<DStarEntry>& open = s.open;
+  const unsigned dir_mask = connectivity == 8 ? 0xFF : 0x0F;
+  auto stepCost = [](int d) { return d < 4 ? 1.0 : DIAG_COST; };
+
+  auto key = [&](int id, double& k1, double& k2) {
+    k2 = std::min(g[id], rhs[id]);
+    k1 = k2 + calculateHeuristic(start_id, id, h_type) + s.km;
+  };
+  auto push = [&](int id) {
+    double k1, k2;
+    key(id, k1, k2);
+    open.push_back({k1, k2, id, ++s.version[id]});
+    std::push_heap(open.begin(), open.end(), EntryAfter());
+    stats.pushed(open.size());
+  };
+  // Несогласованная клетка (пере)вставляется, согласованная убирается из кучи
+  auto updateVertex = [&](int id) {
+    if (g[id] != rhs[id]) {
+      push(id);
+    } else {
+      s.version[id]++;
+    }
+  };
+  auto bestSuccessor = [&](int id) {
+    double best = kInf;
+    unsigned mask = neighbor_masks_[id] & dir_mask;
+    while (mask) {
+      int d = __builtin_ctz(mask);
+      mask &= mask - 1;
+      best = std::min(best, stepCost(d) + g[id + dir_offset_[d]]);
+    }
+    return best;
+  };
+
+  const bool fresh = s.goal != goal_id || s.connectivity != connectivity ||
+                     s.heuristic != h_type ||
+                     g.size() != static_cast<size_t>(ctx.cells);
+  if (fresh) {
+    s.goal = goal_id;
+    s.connectivity = connectivity;
+    s.heuristic = h_type;
+    s.km = 0.0;
+    g.assign(ctx.cells, kInf);
+    rhs.assign(ctx.cells, kInf);
+    s.version.assign(ctx.cells, 0);
+    open.clear();
+    s.pending.clear();
+    rhs[goal_id] = 0.0;
+    push(goal_id);
+  } else {
+    // Старт сдвинулся: ключи в куче занижены не больше чем на h(старый, новый)
+    if (s.last_start != start_id)
+      s.km += calculateHeuristic(s.last_start, start_id, h_type);
+    std::vector<int>& pending = s.pending;
+    std::sort(pending.begin(), pending.end());
+    pending.erase(std::unique(pending.begin(), pending.end()), pending.end());
+    for (int id : pending) {
+      if (id == goal_id) continue;
+      rhs[id] = bestSuccessor(id);
+      updateVertex(id);
+    }
+    pending.clear();
+  }
+  s.last_start = start_id;
+
+  int expanded_nodes = 0;
+  BudgetGuard guard(budget);
+  bool stopped = false;
+  TraceRecorder trace(ctx.trace, ctx.trace_stride, ctx.cells);
+  stats.loop();
+
+  while (!open.empty()) {
+    const DStarEntry top = open.front();
+    if (top.version != s.version[top.id]) {  // Клетку вставили позже или убрали
+      std::pop_heap(open.begin(), open.end(), EntryAfter());
+      open.pop_back();
+      stats.stalePop();
+      continue;
+    }
+    double start_k1, start_k2;
+    key(start_id, start_k1, start_k2);
+    if (!keyLess(top.k1, top.k2, start_k1, start_k2) &&
+        g[start_id] == rhs[start_id])
+      break;
+    if (guard.exhausted(expanded_nodes)) {
+      stopped = true;
+      break;
+    }
+
+    const int u = top.id;
+    std::pop_heap(open.begin(), open.end(), EntryAfter());
+    open.pop_back();
+    double k1, k2;
+    key(u, k1, k2);
+    if (keyLess(top.k1, top.k2, k1, k2)) {  // Ключ устарел после сдвига старта
+      push(u);
+      continue;
+    }
+
+    expanded_nodes++;
+    stats.expanded(ctx.expansion_marks, u);
+    trace.record(u, k2, k1);
+    unsigned mask = neighbor_masks_[u] & dir_mask;
+    stats.generated(__builtin_popcount(mask));
+
+    if (g[u] > rhs[u]) {
+      // Оценка улучшилась: фиксируем и предлагаем ее соседям
+      g[u] = rhs[u];
+      while (mask) {
+        int d = __builtin_ctz(mask);
+        mask &= mask - 1;
+        int v = u + dir_offset_[d];
+        if (v == goal_id) continue;
+        double candidate = g[u] + stepCost(d);
+        if (candidate < rhs[v]) {
+          rhs[v] = candidate;
+          updateVertex(v);
+        }
+      }
+    } else {
+      // Оценка ухудшилась: пересчитать тех, кто на нее опирался
+      const double g_old = g[u];
+      g[u] = kInf;
+      while (mask) {
+        int d = __builtin_ctz(mask);
+        mask &= mask - 1;
+        int v = u + dir_offset_[d];
+        if (v == goal_id || rhs[v] != g_old + stepCost(d)) continue;
+        rhs[v] = bestSuccessor(v);
+        updateVertex(v);
+      }
+      if (u != goal_id) rhs[u] = bestSuccessor(u);
+      updateVertex(u);
+    }
+  }
+  stats.reconstruct();
+
+  // Путь: от старта каждый раз к соседу с минимальным cost + g
+  std::vector<std::pair<int, int>> path;
+  double path_length = 0.0;
+  bool found = !stopped && rhs[start_id] < kInf;
+  if (found) {
+    int curr = start_id;
+    if (ctx.keep_path) path.push_back(toCoord(curr));
+    for (int steps = 0; curr != goal_id; ++steps) {
+      int next = -1;
+      double best = kInf, cost = 0.0;
+      unsigned mask = neighbor_masks_[curr] & dir_mask;
+      while (mask) {
+        int d = __builtin_ctz(mask);
+        mask &= mask - 1;
+        int v = curr + dir_offset_[d];
+        if (stepCost(d) + g[v] < best) {
+          best = stepCost(d) + g[v];
+          cost = stepCost(d);
+          next = v;
+        }
+      }
+      if (next < 0 || steps >= ctx.cells) {  // Не должно случаться: оценки согласованы
+        found = false;
+        path.clear();
+        path_length = 0.0;
+        break;
+      }
+      path_length += cost;
+      curr = next;
+      if (ctx.keep_path) path.push_back(toCoord(curr));
+    }
+  }
+
+  auto end_time = std::chrono::high_resolution_clock::now();
+  std::chrono::duration<double> duration = end_time - start_time;
+
+  SearchResult result;
+  result.path = std::move(path);
+  result.found = found;
+  result.expanded_nodes = expanded_nodes;
+  result.path_length = path_length;
+  result.execution_time = duration.count();
+  result.stop_reason = guard.reason();
+  stats.finish(result.stats);
+  return result;
+}
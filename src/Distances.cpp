@@ -0,0 +1,117 @@
+#include <stdexcept>
+#include <string>
+
+#include "PathPlanner.h"
+
+// Расстояния от одной клетки до многих: одна Дейкстра вместо find_path на
+// каждую пару. Граф неориентированный, поэтому это же и расстояния
+// "многие к одной" (до source).
+//
+// Очередь — Dial (BucketQueue): ребра {1, sqrt(2)} не короче ширины корзины,
+// так что клетка из текущей корзины уже не улучшится и ее расстояние
+// окончательное в момент извлечения. На этом держится ранняя остановка
+// distancesToMany.
+
+template <class Settle>
+int PathPlanner::dijkstraFrom(SearchContext& ctx, int source, int connectivity,
+                              double max_cost, Settle&& settle) const {
+  ctx.beginSearch();
+  ctx.dist_matrix[source] = 0.0;
+  ctx.search_epoch[source] = ctx.current_search_id;
+  const unsigned dir_mask = connectivity == 8 ? 0xFF : 0x0F;
+  int expanded_nodes = 0;
+
+  ctx.withOpenList(QueueType::Bucket, [&](auto& open_set) {
+    open_set.push({source, 0.0, 0.0});
+    while (!open_set.empty()) {
+      Node current = open_set.pop();
+      if (current.g_score > ctx.getDistance(current.id)) continue;  // Устаревшая запись
+      expanded_nodes++;
+      if (!settle(current.id, current.g_score)) return;
+
+      unsigned mask = neighbor_masks_[current.id] & dir_mask;
+      while (mask) {
+        int d = __builtin_ctz(mask);
+        mask &= mask - 1;
+        int next = current.id + dir_offset_[d];
+        double new_dist = current.g_score + (d < 4 ? 1.0 : DIAG_COST);
+        // Клетки дальше max_cost в очередь не попадают
+        if (new_dist > max_cost) continue;
+        if (new_dist < ctx.getDistance(next)) {
+          ctx.dist_matrix[next] = new_dist;
+          ctx.search_epoch[next] = ctx.current_search_id;
+          open_set.push({next, new_dist, new_dist});
+        }
+      }
+    }
+  });
+  return expanded_nodes;
+}
+
+// Полная Дейкстра от source: out[cell] = расстояние или inf (для ориентиров ALT)
+void PathPlanner::computeDistanceField(SearchContext& ctx, int source,
+                                       int connectivity,
+                                       std::vector<double>& out) const {
+  const double inf = std::numeric_limits<double>::infinity();
+  out.assign(static_cast<size_t>(width_) * height_, inf);
+  dijkstraFrom(ctx, source, connectivity, inf, [&](int id, double dist) {
+    out[id] = dist;
+    return true;
+  });
+}
+
+int PathPlanner::distanceField(int source_x, int source_y, int connectivity,
+                               double max_cost, float* out) {
+  if (source_x < 0 || source_x >= width_ || source_y < 0 || source_y >= height_)
+    throw std::invalid_argument("source вне карты");
+  const size_t n = static_cast<size_t>(width_) * height_;
+  std::fill(out, out + n, std::numeric_limits<float>::infinity());
+  const int source = toIndex(source_x, source_y);
+  if (isBlocked(source)) return 0;
+
+  return dijkstraFrom(ctx_, source, connectivity, max_cost,
+                      [&](int id, double dist) {
+                        out[id] = static_cast<float>(dist);
+                        return true;
+                      });
+}
+
+int PathPlanner::distancesToMany(int source_x, int source_y, const int* targets,
+                                 int count, int connectivity, double max_cost,
+                                 double* out) {
+  if (source_x < 0 || source_x >= width_ || source_y < 0 || source_y >= height_)
+    throw std::invalid_argument("source вне карты");
+  for (int i = 0; i < count; ++i) {
+    int x = targets[2 * i], y = targets[2 * i + 1];
+    if (x < 0 || x >= width_ || y < 0 || y >= height_)
+      throw std::invalid_argument("Цель (" + std::to_string(x) + ", " +
+                                  std::to_string(y) + ") вне карты");
+  }
+  std::fill(out, out + count, std::numeric_limits<double>::infinity());
+  const int source = toIndex(source_x, source_y);
+  if (isBlocked(source) || count == 0) return 0;
+
+  // Цели по клеткам: повторы считаются один раз, цели из других компонент
+  // (и стены) не ждем — иначе Дейкстра зальет всю компоненту зря
+  std::vector<std::pair<int, int>> wanted;  // (клетка, номер цели)
+  for (int i = 0; i < count; ++i) {
+    int id = toIndex(targets[2 * i], targets[2 * i + 1]);
+    if (!isBlocked(id) && sameComponent(source, id, connectivity))
+      wanted.push_back({id, i});
+  }
+  std::sort(wanted.begin(), wanted.end());
+  int remaining = 0;
+  for (size_t i = 0; i < wanted.size(); ++i)
+    if (i == 0 || wanted[i].first != wanted[i - 1].first) remaining++;
+  if (remaining == 0) return 0;
+
+  return dijkstraFrom(ctx_, source, connectivity, max_cost,
+                      [&](int id, double dist) {
+                        auto it = std::lower_bound(wanted.begin(), wanted.end(),
+                                                   std::make_pair(id, -1));
+                        if (it == wanted.end() || it->first != id) return true;
+                        for (; it != wanted.end() && it->first == id; ++it)
+                          out[it->second] = dist;
+                        return --remaining > 0;
+                      });
+}
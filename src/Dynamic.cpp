@@ -0,0 +1,317 @@
+#include <algorithm>
+#include <stdexcept>
+#include <string>
+
+#include "PathPlanner.h"
+
+// Правки карты на лету (двери открываются, клетки занимаются).
+//
+// Меняются биты препятствий, а производные структуры чинятся только вокруг
+// правок:
+//   маски соседей — у самих клеток и их 8 соседей (маска клетки зависит
+//                   только от клеток на расстоянии 1);
+//   компоненты    — локальная переразметка, см. updateComponents;
+//   HPA*          — кластеры вокруг правок (rebuildHierarchy);
+//   D* Lite       — задетые клетки копятся в pending каждого решения и
+//                   обрабатываются следующим запросом к той же цели.
+// Ориентиры, CPD и таблица JPS+ описывают карту целиком и локально не
+// чинятся: они сбрасываются (Landmark -> Octile, CPD -> A*, JPS+ строит
+// таблицу заново при следующем запросе). Кэш cost2go очищается.
+
+int PathPlanner::setCells(const int* xs, const int* ys, const uint8_t* values,
+                          int count) {
+  for (int i = 0; i < count; ++i) {
+    if (xs[i] < 0 || xs[i] >= width_ || ys[i] < 0 || ys[i] >= height_)
+      throw std::invalid_argument("Клетка (" + std::to_string(xs[i]) + ", " +
+                                  std::to_string(ys[i]) + ") вне карты");
+  }
+
+  // Клетка может встретиться в пакете несколько раз — действует последнее значение
+  std::vector<std::pair<int, int>> order(count);  // (клетка, номер в пакете)
+  for (int i = 0; i < count; ++i) order[i] = {toIndex(xs[i], ys[i]), i};
+  std::sort(order.begin(), order.end());
+  std::vector<int> changed;
+  for (size_t i = 0; i < order.size(); ++i) {
+    if (i + 1 < order.size() && order[i + 1].first == order[i].first) continue;
+    auto [id, k] = order[i];
+    if ((values[k] != 0) != isBlocked(id)) changed.push_back(id);
+  }
+  if (changed.empty()) return 0;
+
+  // Клетки применяются по одной: маска клетки зависит только от соседей на
+  // расстоянии 1, поэтому чинятся маски квадрата 3x3, а переразметке
+  // компонент хватает обходов, которые замыкаются вокруг одной клетки
+  std::vector<int> touched;  // Клетки, у которых могла поменяться маска
+  touched.reserve(changed.size() * 9);
+  // Массивы снимка копируются в память процесса при первой правке
+  uint64_t* bits = obstacles_.mutableData();
+  uint8_t* masks = neighbor_masks_.mutableData();
+  std::vector<int> ring;
+  for (int id : changed) {
+    bits[id >> 6] ^= uint64_t(1) << (id & 63);
+    auto [cx, cy] = toCoord(id);
+    ring.clear();
+    for (int dy = -1; dy <= 1; ++dy)
+      for (int dx = -1; dx <= 1; ++dx) {
+        int nx = cx + dx, ny = cy + dy;
+        if (nx >= 0 && nx < width_ && ny >= 0 && ny < height_)
+          ring.push_back(toIndex(nx, ny));
+      }
+    for (int cell : ring) masks[cell] = cellMask(cell);
+    for (int c = 0; c < 2; ++c) updateComponents(c, id, ring);
+    touched.insert(touched.end(), ring.begin(), ring.end());
+  }
+  std::sort(touched.begin(), touched.end());
+  touched.erase(std::unique(touched.begin(), touched.end()), touched.end());
+
+  cost2go_cache_.clear();
+  if (!landmarks_.empty()) landmarks_.reset();
+  if (!cpd_.empty()) cpd_.reset();
+  jump_table_ready_ = false;
+
+  // HPA*: кластеры всех клеток с новыми масками, каждый по одному разу
+  // (у разбросанных правок общий прямоугольник был бы почти всей картой)
+  rebuildClusters(touched);
+  refreshCompactScale();
+
+  // Решениям D* Lite — список задетых клеток. Если правок накопилось больше
+  // четверти карты, дешевле спланировать заново
+  auto notify = [&](SearchContext& ctx) {
+    if (!ctx.dstar || ctx.dstar->goal < 0) return;
+    DStarLiteState& state = *ctx.dstar;
+    if (state.pending.size() + touched.size() > static_cast<size_t>(ctx.cells / 4)) {
+      state.goal = -1;
+      state.pending.clear();
+      return;
+    }
+    state.pending.insert(state.pending.end(), touched.begin(), touched.end());
+  };
+  notify(ctx_);
+  for (auto& ctx : worker_contexts_) notify(*ctx);
+
+  return static_cast<int>(changed.size());
+}
+
+// Локальная переразметка компонент одной связности (c = 0 — 4, 1 — 8)
+// после правки клетки cell; ring — она и ее соседи (маски уже новые).
+//
+// Ставшая стеной клетка теряет метку. Из каждой свободной клетки ring
+// (затравки) идет свой обход в ширину; обходы делают по одному шагу по
+// очереди, встретившиеся обходы сливаются в группу (union-find). Когда
+// активной осталась одна группа, все остальные уже обошли свои компоненты
+// целиком — это отколовшиеся куски или новые области, им выдаются метки.
+// Последняя группа — остаток большой компоненты: ее до конца не обходим, а
+// только сливаем встреченные в ней старые метки (перекрашивается меньшая).
+// Обычно затравки встречаются в паре шагов вокруг клетки; цена — размер
+// отколовшихся кусков (и меньшей из сливаемых компонент), а не размер карты
+void PathPlanner::updateComponents(int c, int cell, const std::vector<int>& ring) {
+  const unsigned dir_mask = c == 1 ? 0xFF : 0x0F;
+  int* labels = components_[c].mutableData();
+  std::vector<int>& sizes = component_sizes_[c];
+  std::vector<int> emptied;  // Метки, у которых могли кончиться клетки
+
+  if (isBlocked(cell) && labels[cell] >= 0) {
+    sizes[labels[cell]]--;
+    emptied.push_back(labels[cell]);
+    labels[cell] = -1;
+  }
+
+  auto newLabel = [&]() {
+    if (!free_labels_[c].empty()) {
+      int label = free_labels_[c].back();
+      free_labels_[c].pop_back();
+      return label;
+    }
+    sizes.push_back(0);
+    return static_cast<int>(sizes.size()) - 1;
+  };
+
+  // relabel_epoch_[id] == epoch — клетку уже забрала группа relabel_group_[id]
+  const int n = width_ * height_;
+  if (relabel_epoch_.empty()) {
+    relabel_epoch_.assign(n, 0);
+    relabel_group_.resize(n);
+  }
+  if (relabel_id_ == std::numeric_limits<int>::max()) {
+    std::fill(relabel_epoch_.begin(), relabel_epoch_.end(), 0);
+    relabel_id_ = 0;
+  }
+  const int epoch = ++relabel_id_;
+
+  // Группа = обход из одной затравки. Список клеток группы — он же ее очередь
+  std::vector<std::vector<int>> cells;
+  std::vector<size_t> head;
+  std::vector<int> parent;
+  std::vector<int> live;  // У корня: сколько групп с непустой очередью
+  for (int id : ring) {
+    if (isBlocked(id)) continue;
+    int g = static_cast<int>(cells.size());
+    cells.push_back({id});
+    head.push_back(0);
+    parent.push_back(g);
+    live.push_back(1);
+    relabel_epoch_[id] = epoch;
+    relabel_group_[id] = g;
+  }
+  const int groups = static_cast<int>(cells.size());
+  if (groups == 0) {
+    for (int label : emptied)
+      if (sizes[label] == 0) free_labels_[c].push_back(label);
+    return;
+  }
+
+  auto find = [&](int g) {
+    while (parent[g] != g) {
+      parent[g] = parent[parent[g]];
+      g = parent[g];
+    }
+    return g;
+  };
+  int active = groups;  // Корней с непустой очередью
+  auto unite = [&](int a, int b) {
+    a = find(a);
+    b = find(b);
+    if (a == b) return;
+    if (live[a] > 0 && live[b] > 0) active--;
+    parent[b] = a;
+    live[a] += live[b];
+  };
+
+  std::vector<int> order(groups);
+  for (int g = 0; g < groups; ++g) order[g] = g;
+  while (active > 1) {
+    for (size_t i = 0; i < order.size() && active > 1;) {
+      int g = order[i];
+      int id = cells[g][head[g]++];
+      unsigned mask = neighbor_masks_[id] & dir_mask;
+      while (mask) {
+        int d = __builtin_ctz(mask);
+        mask &= mask - 1;
+        int next = id + dir_offset_[d];
+        if (relabel_epoch_[next] != epoch) {
+          relabel_epoch_[next] = epoch;
+          relabel_group_[next] = g;
+          cells[g].push_back(next);
+        } else {
+          unite(g, relabel_group_[next]);
+        }
+      }
+      if (head[g] == cells[g].size()) {
+        if (--live[find(g)] == 0) active--;
+        order[i] = order.back();
+        order.pop_back();
+      } else {
+        ++i;
+      }
+    }
+  }
+
+  // Группы по корням
+  std::vector<std::pair<int, int>> by_root(groups);
+  for (int g = 0; g < groups; ++g) by_root[g] = {find(g), g};
+  std::sort(by_root.begin(), by_root.end());
+
+  std::vector<int> old_labels;
+  std::vector<int> rest;  // Группы оставшейся активной компоненты
+  for (size_t i = 0; i < by_root.size();) {
+    size_t j = i;
+    while (j < by_root.size() && by_root[j].first == by_root[i].first) ++j;
+    if (live[by_root[i].first] > 0) {
+      for (size_t k = i; k < j; ++k) rest.push_back(by_root[k].second);
+      i = j;
+      continue;
+    }
+
+    // Компонента обойдена целиком. Старую метку сохраняет та, что целиком
+    // лежит внутри (иначе — новая метка), остальные клетки перекрашиваются
+    old_labels.clear();
+    for (size_t k = i; k < j; ++k)
+      for (int id : cells[by_root[k].second])
+        if (labels[id] >= 0) old_labels.push_back(labels[id]);
+    std::sort(old_labels.begin(), old_labels.end());
+    int keeper = -1;
+    for (size_t a = 0; a < old_labels.size();) {
+      size_t b = a;
+      while (b < old_labels.size() && old_labels[b] == old_labels[a]) ++b;
+      int label = old_labels[a];
+      if (static_cast<int>(b - a) == sizes[label] &&
+          (keeper < 0 || sizes[label] > sizes[keeper]))
+        keeper = label;
+      a = b;
+    }
+    if (keeper < 0) keeper = newLabel();
+    for (size_t k = i; k < j; ++k) {
+      for (int id : cells[by_root[k].second]) {
+        if (labels[id] == keeper) continue;
+        if (labels[id] >= 0) {
+          sizes[labels[id]]--;
+          emptied.push_back(labels[id]);
+        }
+        labels[id] = keeper;
+        sizes[keeper]++;
+      }
+    }
+    i = j;
+  }
+
+  if (!rest.empty()) {
+    // Остаток большой компоненты: новые клетки и все встреченные старые
+    // метки сливаются в самую большую из них
+    old_labels.clear();
+    for (int g : rest)
+      for (int id : cells[g])
+        if (labels[id] >= 0) old_labels.push_back(labels[id]);
+    std::sort(old_labels.begin(), old_labels.end());
+    old_labels.erase(std::unique(old_labels.begin(), old_labels.end()),
+                     old_labels.end());
+    int keeper = -1;
+    for (int label : old_labels)
+      if (keeper < 0 || sizes[label] > sizes[keeper]) keeper = label;
+    if (keeper < 0) keeper = newLabel();
+
+    for (int g : rest)
+      for (int id : cells[g])
+        if (labels[id] < 0) {
+          labels[id] = keeper;
+          sizes[keeper]++;
+        }
+
+    // Куски меньших компонент могли отделиться друг от друга, но каждый
+    // касается правок, то есть содержит обойденную клетку: заливка идет
+    // сразу из всех обойденных клеток с этой меткой
+    std::vector<int> stack;
+    for (int label : old_labels) {
+      if (label == keeper) continue;
+      int moved = 0;
+      for (int g : rest)
+        for (int id : cells[g])
+          if (labels[id] == label) {
+            labels[id] = keeper;
+            stack.push_back(id);
+          }
+      while (!stack.empty()) {
+        int id = stack.back();
+        stack.pop_back();
+        moved++;
+        unsigned mask = neighbor_masks_[id] & dir_mask;
+        while (mask) {
+          int d = __builtin_ctz(mask);
+          mask &= mask - 1;
+          int next = id + dir_offset_[d];
+          if (labels[next] == label) {
+            labels[next] = keeper;
+            stack.push_back(next);
+          }
+        }
+      }
+      sizes[label] -= moved;
+      sizes[keeper] += moved;
+      emptied.push_back(label);
+    }
+  }
+
+  std::sort(emptied.begin(), emptied.end());
+  emptied.erase(std::unique(emptied.begin(), emptied.end()), emptied.end());
+  for (int label : emptied)
+    if (sizes[label] == 0) free_labels_[c].push_back(label);
+}
@@ -0,0 +1,534 @@
+#include <chrono>
+
+#include "PathPlanner.h"
+
+// HPA* (Hierarchical Path-Finding A*): поиск по абстрактному графу кластеров
+// и переходов (Hierarchy.h), затем уточнение каждого абстрактного ребра до
+// пути по клеткам поиском внутри одного кластера. Путь почти оптимален
+// (отклонение обычно в пределах нескольких процентов); сглаживание убирает
+// часть лишних изломов на границах кластеров.
+
+namespace {
+
+// Отрезок границы короче этого дает один переход (в середине), длиннее — два
+constexpr int kEntranceSplit = 6;
+
+inline int sign(int v) { return (v > 0) - (v < 0); }
+
+}  // namespace
+
+void PathPlanner::setHierarchyOptions(int cluster_size, bool smooth) {
+  if (cluster_size < 2)
+    throw std::invalid_argument("cluster_size должен быть >= 2");
+  if (cluster_size != hpa_cluster_size_) {
+    hierarchies_[0].reset();
+    hierarchies_[1].reset();
+  }
+  hpa_cluster_size_ = cluster_size;
+  hpa_smooth_ = smooth;
+}
+
+const HierarchyGraph* PathPlanner::hierarchy(int connectivity) const {
+  return hierarchies_[connectivity == 8].get();
+}
+
+inline int PathPlanner::clusterOf(const HierarchyGraph& graph, int cell) const {
+  return (cell / width_ / graph.cluster_size) * graph.clusters_x +
+         (cell % width_) / graph.cluster_size;
+}
+
+// --------------------------------------------------
+// Узлы и границы
+// --------------------------------------------------
+
+int PathPlanner::acquireNode(HierarchyGraph& graph, int cell) {
+  auto it = graph.cell_node.find(cell);
+  if (it != graph.cell_node.end()) {
+    graph.node_refs[it->second]++;
+    return it->second;
+  }
+  int node;
+  if (!graph.free_slots.empty()) {
+    node = graph.free_slots.back();
+    graph.free_slots.pop_back();
+  } else {
+    node = static_cast<int>(graph.node_cell.size());
+    graph.node_cell.push_back(-1);
+    graph.node_refs.push_back(0);
+    graph.edges.emplace_back();
+  }
+  graph.node_cell[node] = cell;
+  graph.node_refs[node] = 1;
+  graph.edges[node].clear();
+  graph.cell_node[cell] = node;
+  graph.cluster_nodes[clusterOf(graph, cell)].push_back(node);
+  return node;
+}
+
+void PathPlanner::releaseNode(HierarchyGraph& graph, int node) {
+  if (--graph.node_refs[node] > 0) return;
+  int cell = graph.node_cell[node];
+  auto& members = graph.cluster_nodes[clusterOf(graph, cell)];
+  members.erase(std::find(members.begin(), members.end(), node));
+  // Внутренние ребра соседей по кластеру на этот узел больше не действуют
+  for (int other : members) {
+    auto& list = graph.edges[other];
+    list.erase(std::remove_if(list.begin(), list.end(),
+                              [&](const AbstractEdge& e) { return e.to == node; }),
+               list.end());
+  }
+  graph.edges[node].clear();
+  graph.cell_node.erase(cell);
+  graph.node_cell[node] = -1;
+  graph.free_slots.push_back(node);
+}
+
+void PathPlanner::clearBorder(HierarchyGraph& graph, int border) {
+  for (auto [u, v] : graph.border_links[border]) {
+    for (auto [from, to] : {std::make_pair(u, v), std::make_pair(v, u)}) {
+      auto& list = graph.edges[from];
+      auto it = std::find_if(list.begin(), list.end(), [&](const AbstractEdge& e) {
+        return e.inter && e.to == to;
+      });
+      if (it != list.end()) list.erase(it);
+    }
+    releaseNode(graph, u);
+    releaseNode(graph, v);
+  }
+  graph.border_links[border].clear();
+}
+
+// Переходы через правую (side 0) или нижнюю (side 1) границу кластера
+void PathPlanner::buildBorder(HierarchyGraph& graph, int border) {
+  const int C = graph.cluster_size;
+  const int cluster = border / 2, side = border % 2;
+  const int cx = cluster % graph.clusters_x, cy = cluster / graph.clusters_x;
+  if (side == 0 && cx + 1 >= graph.clusters_x) return;
+  if (side == 1 && cy + 1 >= graph.clusters_y) return;
+
+  // Вдоль границы: для правой — по y в столбце x, для нижней — по x в строке y
+  const int dir = side == 0 ? 0 : 1;  // Right или Down
+  const int len = side == 0 ? std::min(C, height_ - cy * C)
+                            : std::min(C, width_ - cx * C);
+  auto cellAt = [&](int k) {
+    return side == 0 ? toIndex(cx * C + C - 1, cy * C + k)
+                     : toIndex(cx * C + k, cy * C + C - 1);
+  };
+  auto open = [&](int k) { return (neighbor_masks_[cellAt(k)] >> dir & 1) != 0; };
+
+  auto link = [&](int k) {
+    int a = cellAt(k);
+    int b = a + dir_offset_[dir];
+    int u = acquireNode(graph, a);
+    int v = acquireNode(graph, b);
+    graph.edges[u].push_back({v, 1.0, true});
+    graph.edges[v].push_back({u, 1.0, true});
+    graph.border_links[border].push_back({u, v});
+  };
+
+  int k = 0;
+  while (k < len) {
+    if (!open(k)) {
+      k++;
+      continue;
+    }
+    int begin = k;
+    while (k < len && open(k)) k++;
+    int end = k - 1;
+    if (end - begin + 1 < kEntranceSplit) {
+      link((begin + end) / 2);
+    } else {
+      link(begin);
+      link(end);
+    }
+  }
+}
+
+// Кратчайшие расстояния между узлами кластера без выхода за его пределы
+void PathPlanner::buildIntraEdges(HierarchyGraph& graph, int cluster,
+                                  SearchContext& ctx) const {
+  const auto& members = graph.cluster_nodes[cluster];
+  for (int u : members) {
+    auto& list = graph.edges[u];
+    list.erase(std::remove_if(list.begin(), list.end(),
+                              [](const AbstractEdge& e) { return !e.inter; }),
+               list.end());
+  }
+  int unused = 0;
+  for (int u : members) {
+    clusterSearch(ctx, graph, cluster, graph.node_cell[u], -1, unused);
+    for (int v : members) {
+      if (v == u) continue;
+      double d = ctx.getDistance(graph.node_cell[v]);
+      if (d < std::numeric_limits<double>::infinity())
+        graph.edges[u].push_back({v, d, false});
+    }
+  }
+}
+
+bool PathPlanner::ensureHierarchy(int connectivity) {
+  auto& slot = hierarchies_[connectivity == 8];
+  if (slot) return true;
+
+  auto start_time = std::chrono::high_resolution_clock::now();
+  auto graph = std::make_unique<HierarchyGraph>();
+  graph->connectivity = connectivity;
+  graph->cluster_size = hpa_cluster_size_;
+  graph->clusters_x = (width_ + hpa_cluster_size_ - 1) / hpa_cluster_size_;
+  graph->clusters_y = (height_ + hpa_cluster_size_ - 1) / hpa_cluster_size_;
+  const int clusters = graph->clusters_x * graph->clusters_y;
+  graph->cluster_nodes.resize(clusters);
+  graph->border_links.resize(2 * clusters);
+
+  for (int b = 0; b < 2 * clusters; ++b) buildBorder(*graph, b);
+  for (int c = 0; c < clusters; ++c) buildIntraEdges(*graph, c, ctx_);
+
+  std::chrono::duration<double> duration =
+      std::chrono::high_resolution_clock::now() - start_time;
+  graph->build_time = duration.count();
+  slot = std::move(graph);
+  return true;
+}
+
+void PathPlanner::rebuildHierarchy(int x0, int y0, int x1, int y1) {
+  // +1 клетка: правка на краю меняет маски соседей за границей
+  std::vector<int> cells;
+  for (int y = std::max(0, y0 - 1); y <= std::min(height_ - 1, y1 + 1); ++y)
+    for (int x = std::max(0, x0 - 1); x <= std::min(width_ - 1, x1 + 1); ++x)
+      cells.push_back(toIndex(x, y));
+  rebuildClusters(cells);
+}
+
+void PathPlanner::rebuildClusters(const std::vector<int>& cells) {
+  for (auto& slot : hierarchies_) {
+    if (!slot) continue;
+    HierarchyGraph& graph = *slot;
+    std::vector<int> clusters;
+    for (int cell : cells) clusters.push_back(clusterOf(graph, cell));
+    std::sort(clusters.begin(), clusters.end());
+    clusters.erase(std::unique(clusters.begin(), clusters.end()), clusters.end());
+
+    // Границы кластеров: правая/нижняя своя и левая/верхняя соседа
+    std::vector<int> borders;
+    // Узлы поменялись у самих кластеров и у соседей по этим границам
+    std::vector<int> intra;
+    for (int c : clusters) {
+      const int cx = c % graph.clusters_x, cy = c / graph.clusters_x;
+      borders.push_back(2 * c);
+      borders.push_back(2 * c + 1);
+      intra.push_back(c);
+      if (cx > 0) {
+        borders.push_back(2 * (c - 1));
+        intra.push_back(c - 1);
+      }
+      if (cy > 0) {
+        borders.push_back(2 * (c - graph.clusters_x) + 1);
+        intra.push_back(c - graph.clusters_x);
+      }
+      if (cx + 1 < graph.clusters_x) intra.push_back(c + 1);
+      if (cy + 1 < graph.clusters_y) intra.push_back(c + graph.clusters_x);
+    }
+    std::sort(borders.begin(), borders.end());
+    borders.erase(std::unique(borders.begin(), borders.end()), borders.end());
+    for (int b : borders) clearBorder(graph, b);
+    for (int b : borders) buildBorder(graph, b);
+
+    std::sort(intra.begin(), intra.end());
+    intra.erase(std::unique(intra.begin(), intra.end()), intra.end());
+    for (int c : intra) buildIntraEdges(graph, c, ctx_);
+  }
+}
+
+// --------------------------------------------------
+// Поиск внутри кластера
+// --------------------------------------------------
+
+// target < 0 — Дейкстра по всему кластеру (расстояния остаются в ctx),
+// иначе A* до target (путь — в ctx.came_from). Возвращает расстояние до target
+double PathPlanner::clusterSearch(SearchContext& ctx, const HierarchyGraph& graph,
+                                  int cluster, int source, int target,
+                                  int& expanded) const {
+  const int C = graph.cluster_size;
+  const int x0 = (cluster % graph.clusters_x) * C;
+  const int y0 = (cluster / graph.clusters_x) * C;
+  const int x1 = std::min(x0 + C, width_), y1 = std::min(y0 + C, height_);
+  const int connectivity = graph.connectivity;
+
+  ctx.beginSearch();
+  ctx.dist_matrix[source] = 0.0;
+  ctx.search_epoch[source] = ctx.current_search_id;
+
+  BinaryHeapQueue& open_set = ctx.binary_heap;
+  open_set.clear();
+  auto h = [&](int id) {
+    return target < 0 ? 0.0 : calculateHeuristic(id, target, HeuristicType::Octile);
+  };
+  open_set.push({source, h(source), 0.0});
+
+  while (!open_set.empty()) {
+    Node current = open_set.pop();
+    if (current.g_score > ctx.getDistance(current.id) + 1e-9) continue;
+    if (current.id == target) return current.g_score;
+    expanded++;
+
+    getNeighbors(current.id, connectivity, ctx.neighbors_cache, ctx.costs_cache);
+    for (size_t i = 0; i < ctx.neighbors_cache.size(); ++i) {
+      int next = ctx.neighbors_cache[i];
+      int nx = next % width_, ny = next / width_;
+      if (nx < x0 || nx >= x1 || ny < y0 || ny >= y1) continue;
+
+      double new_g = current.g_score + ctx.costs_cache[i];
+      if (new_g < ctx.getDistance(next)) {
+        ctx.dist_matrix[next] = new_g;
+        ctx.search_epoch[next] = ctx.current_search_id;
+        ctx.came_from[next] = current.id;
+        open_set.push({next, new_g + h(next), new_g});
+      }
+    }
+  }
+  return std::numeric_limits<double>::infinity();
+}
+
+// --------------------------------------------------
+// Сглаживание
+// --------------------------------------------------
+
+// Кратчайший "прямой" проход из a в b: диагонали + прямые (для 8-связности)
+// или две прямые (для 4-связности), в одном из двух порядков. Каждый шаг
+// проверяется по маске соседей. true — проход свободен, клетки в out (без a)
+bool PathPlanner::straightWalk(int a, int b, int connectivity,
+                               std::vector<int>& out) const {
+  auto [ax, ay] = toCoord(a);
+  auto [bx, by] = toCoord(b);
+  int dx = bx - ax, dy = by - ay;
+  int sx = sign(dx), sy = sign(dy);
+  int adx = std::abs(dx), ady = std::abs(dy);
+
+  // Направления DIR_DX/DIR_DY для шагов по x, по y и по диагонали
+  auto dirOf = [](int ddx, int ddy) {
+    for (int d = 0; d < 8; ++d)
+      if (DIR_DX[d] == ddx && DIR_DY[d] == ddy) return d;
+    return -1;
+  };
+  int dir_x = dirOf(sx, 0), dir_y = dirOf(0, sy), dir_diag = dirOf(sx, sy);
+
+  // Порядок шагов: (направление, сколько раз) — две фазы
+  std::pair<int, int> orders[2][2];
+  if (connectivity == 8) {
+    int diag = std::min(adx, ady);
+    int rest_dir = adx > ady ? dir_x : dir_y;
+    int rest = std::abs(adx - ady);
+    orders[0][0] = {dir_diag, diag}; orders[0][1] = {rest_dir, rest};
+    orders[1][0] = {rest_dir, rest}; orders[1][1] = {dir_diag, diag};
+  } else {
+    orders[0][0] = {dir_x, adx}; orders[0][1] = {dir_y, ady};
+    orders[1][0] = {dir_y, ady}; orders[1][1] = {dir_x, adx};
+  }
+
+  for (auto& order : orders) {
+    out.clear();
+    int id = a;
+    bool ok = true;
+    for (auto [dir, count] : order) {
+      for (int s = 0; s < count && ok; ++s) {
+        if (!(neighbor_masks_[id] >> dir & 1)) {
+          ok = false;
+          break;
+        }
+        id += dir_offset_[dir];
+        out.push_back(id);
+      }
+    }
+    if (ok) return true;
+  }
+  return false;
+}
+
+// Жадно заменяем участок пути прямым проходом, если он свободен и короче
+void PathPlanner::smoothPath(std::vector<int>& cells, int connectivity,
+                             int lookahead) const {
+  if (cells.size() < 3) return;
+
+  // prefix[i] — стоимость пути от cells[0] до cells[i]
+  std::vector<double> prefix(cells.size(), 0.0);
+  for (size_t i = 1; i < cells.size(); ++i) {
+    bool diag = (cells[i] % width_ != cells[i - 1] % width_) &&
+                (cells[i] / width_ != cells[i - 1] / width_);
+    prefix[i] = prefix[i - 1] + (diag ? DIAG_COST : 1.0);
+  }
+
+  std::vector<int> out{cells[0]};
+  std::vector<int> walk;
+  size_t i = 0;
+  while (i + 1 < cells.size()) {
+    size_t next = i + 1;
+    size_t far = std::min(cells.size() - 1, i + static_cast<size_t>(lookahead));
+    for (size_t j = far; j > i + 1; --j) {
+      double direct = calculateHeuristic(
+          cells[i], cells[j],
+          connectivity == 8 ? HeuristicType::Octile : HeuristicType::Manhattan);
+      if (direct >= prefix[j] - prefix[i] - 1e-9) continue;
+      if (straightWalk(cells[i], cells[j], connectivity, walk)) {
+        out.insert(out.end(), walk.begin(), walk.end());
+        next = j;
+        break;
+      }
+    }
+    if (next == i + 1) out.push_back(cells[i + 1]);
+    i = next;
+  }
+  cells.swap(out);
+}
+
+// --------------------------------------------------
+// Запрос
+// --------------------------------------------------
+
+SearchResult PathPlanner::runHPA(SearchContext& ctx, int start_id, int goal_id,
+                                 int connectivity) const {
+  auto start_time = std::chrono::high_resolution_clock::now();
+  const HierarchyGraph& graph = *hierarchies_[connectivity == 8];
+  const int S = static_cast<int>(graph.node_cell.size());
+  const int G = S + 1;
+  const double inf = std::numeric_limits<double>::infinity();
+
+  // Абстрактный поиск использует массивы контекста по номерам узлов
+  if (G >= width_ * height_) {
+    return ctx.withOpenList(QueueType::Binary, [&](auto& open_set) {
+      return runAStarLike(ctx, open_set, start_id, goal_id,
+                          HeuristicType::Octile, 1.0, connectivity, {});
+    });
+  }
+
+  // Фазы: подготовка — подключение старта и цели, поиск — абстрактный A*,
+  // реконструкция — уточнение по кластерам и сглаживание
+  StatsCollector stats;
+  stats.countersUntracked();
+  int expanded_nodes = 0;
+  const int cs = clusterOf(graph, start_id);
+  const int cg = clusterOf(graph, goal_id);
+
+  // 1. Временно подключаем старт и цель к узлам своих кластеров
+  std::vector<std::pair<int, double>> start_links, goal_links;
+  double direct = inf;
+  clusterSearch(ctx, graph, cs, start_id, -1, expanded_nodes);
+  for (int n : graph.cluster_nodes[cs]) {
+    double d = ctx.getDistance(graph.node_cell[n]);
+    if (d < inf) start_links.push_back({n, d});
+  }
+  if (cs == cg) direct = ctx.getDistance(goal_id);
+  clusterSearch(ctx, graph, cg, goal_id, -1, expanded_nodes);
+  for (int n : graph.cluster_nodes[cg]) {
+    double d = ctx.getDistance(graph.node_cell[n]);
+    if (d < inf) goal_links.push_back({n, d});
+  }
+
+  // 2. A* по абстрактному графу (S — старт, G — цель)
+  stats.loop();
+  auto cellOf = [&](int a) {
+    return a == S ? start_id : a == G ? goal_id : graph.node_cell[a];
+  };
+  ctx.beginSearch();
+  ctx.dist_matrix[S] = 0.0;
+  ctx.search_epoch[S] = ctx.current_search_id;
+  BinaryHeapQueue& open_set = ctx.binary_heap;
+  open_set.clear();
+  open_set.push({S, calculateHeuristic(start_id, goal_id, HeuristicType::Octile), 0.0});
+
+  auto relax = [&](int from, int to, double cost) {
+    double new_g = ctx.dist_matrix[from] + cost;
+    if (new_g < ctx.getDistance(to)) {
+      ctx.dist_matrix[to] = new_g;
+      ctx.search_epoch[to] = ctx.current_search_id;
+      ctx.came_from[to] = from;
+      double h = calculateHeuristic(cellOf(to), goal_id, HeuristicType::Octile);
+      open_set.push({to, new_g + h, new_g});
+    }
+  };
+
+  bool found = false;
+  while (!open_set.empty()) {
+    Node current = open_set.pop();
+    if (current.g_score > ctx.getDistance(current.id) + 1e-9) continue;
+    if (current.id == G) {
+      found = true;
+      break;
+    }
+    expanded_nodes++;
+
+    if (current.id == S) {
+      for (auto [n, d] : start_links) relax(S, n, d);
+      if (direct < inf) relax(S, G, direct);
+      continue;
+    }
+    for (const AbstractEdge& e : graph.edges[current.id])
+      relax(current.id, e.to, e.cost);
+    if (clusterOf(graph, graph.node_cell[current.id]) == cg) {
+      for (auto [n, d] : goal_links)
+        if (n == current.id) relax(current.id, G, d);
+    }
+  }
+
+  // Абстрактный граф не нашел путь (не должно случаться для одной
+  // компоненты) — страхуемся обычным A*
+  if (!found) {
+    SearchResult fallback = ctx.withOpenList(QueueType::Binary, [&](auto& open) {
+      return runAStarLike(ctx, open, start_id, goal_id, HeuristicType::Octile,
+                          1.0, connectivity, {});
+    });
+    fallback.expanded_nodes += expanded_nodes;
+    return fallback;
+  }
+
+  stats.reconstruct();
+  std::vector<int> abstract_path;
+  for (int a = G; a != S; a = ctx.came_from[a]) abstract_path.push_back(cellOf(a));
+  abstract_path.push_back(start_id);
+  std::reverse(abstract_path.begin(), abstract_path.end());
+
+  // 3. Уточнение: ребро внутри кластера — A* в этом кластере, переход — шаг
+  std::vector<int> cells{start_id};
+  std::vector<int> segment;
+  for (size_t k = 1; k < abstract_path.size(); ++k) {
+    int a = abstract_path[k - 1], b = abstract_path[k];
+    if (a == b) continue;
+    int cluster = clusterOf(graph, a);
+    if (cluster != clusterOf(graph, b)) {
+      cells.push_back(b);
+      continue;
+    }
+    clusterSearch(ctx, graph, cluster, a, b, expanded_nodes);
+    segment.clear();
+    for (int curr = b; curr != a; curr = ctx.came_from[curr]) segment.push_back(curr);
+    cells.insert(cells.end(), segment.rbegin(), segment.rend());
+  }
+
+  // 4. Сглаживание (по желанию)
+  if (hpa_smooth_) smoothPath(cells, connectivity, 2 * graph.cluster_size);
+
+  // Уточнение — часть алгоритма (и его раскрытий), поэтому клетки пути
+  // строятся всегда; без keep_path не копируются только координаты
+  std::vector<std::pair<int, int>> path;
+  if (ctx.keep_path) path.reserve(cells.size());
+  double path_length = 0.0;
+  for (size_t k = 0; k < cells.size(); ++k) {
+    if (ctx.keep_path) path.push_back(toCoord(cells[k]));
+    if (k > 0) {
+      int a = cells[k - 1], b = cells[k];
+      bool diag = a % width_ != b % width_ && a / width_ != b / width_;
+      path_length += diag ? DIAG_COST : 1.0;
+    }
+  }
+
+  auto end_time = std::chrono::high_resolution_clock::now();
+  std::chrono::duration<double> duration = end_time - start_time;
+
+  SearchResult result;
+  result.path = std::move(path);
+  result.found = true;
+  result.expanded_nodes = expanded_nodes;
+  result.path_length = path_length;
+  result.execution_time = duration.count();
+  stats.finish(result.stats);
+  return result;
+}
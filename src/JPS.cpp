@@ -0,0 +1,321 @@
+#include <chrono>
+
+#include "PathPlanner.h"
+
+// Jump Point Search для 8-связной сетки БЕЗ срезания углов.
+//
+// Правила отсечения (вариант Harabor & Grastien для no-corner-cutting):
+//  - диагональный шаг (dx, dy) разрешен, только если свободны (x+dx, y) и
+//    (x, y+dy) — то же правило, что и в getNeighbors;
+//  - у диагонального движения нет вынужденных соседей: клетка становится jump
+//    point, если из нее прямой прыжок по dx или по dy что-то находит;
+//  - при прямом движении по (dx, 0) клетка — jump point, если сбоку
+//    (x, y±1) свободно, а позади-сбоку (x-dx, y±1) стена.
+// Между двумя соседними jump point всегда чистая прямая или чистая диагональ,
+// поэтому полный путь восстанавливается простой интерполяцией.
+
+namespace {
+
+inline int sign(int v) { return (v > 0) - (v < 0); }
+
+inline int dirIndex(int dx, int dy) {
+  for (int d = 0; d < 8; ++d)
+    if (DIR_DX[d] == dx && DIR_DY[d] == dy) return d;
+  return -1;
+}
+
+// Стоимость отрезка между двумя jump point (прямая или диагональ)
+inline double segmentCost(int x1, int y1, int x2, int y2) {
+  int dx = std::abs(x1 - x2);
+  int dy = std::abs(y1 - y2);
+  return (dx != 0 && dy != 0) ? DIAG_COST * dx : static_cast<double>(dx + dy);
+}
+
+}  // namespace
+
+// Вынужденный сосед при прямом движении в клетку (x, y) по направлению (dx, dy)
+bool PathPlanner::isForcedStraight(int x, int y, int dx, int dy) const {
+  if (dx != 0) {
+    return (isFree(x, y + 1) && !isFree(x - dx, y + 1)) ||
+           (isFree(x, y - 1) && !isFree(x - dx, y - 1));
+  }
+  return (isFree(x + 1, y) && !isFree(x + 1, y - dy)) ||
+         (isFree(x - 1, y) && !isFree(x - 1, y - dy));
+}
+
+// Прыжок из (x, y) по направлению (dx, dy). Возвращает id jump point или -1
+int PathPlanner::jump(int x, int y, int dx, int dy, int goal_id) const {
+  const int dir = dirIndex(dx, dy);
+  int id = toIndex(x, y);
+  while (true) {
+    // Шаг разрешен маской соседей (стены, границы и corner cutting учтены)
+    if (!(neighbor_masks_[id] >> dir & 1)) return -1;
+
+    x += dx;
+    y += dy;
+    id += dir_offset_[dir];
+    if (id == goal_id) return id;
+
+    if (dx != 0 && dy != 0) {
+      if (jump(x, y, dx, 0, goal_id) != -1 || jump(x, y, 0, dy, goal_id) != -1)
+        return id;
+    } else if (isForcedStraight(x, y, dx, dy)) {
+      return id;
+    }
+  }
+}
+
+// Направления, которые нужно рассмотреть из id, если пришли из parent_id
+int PathPlanner::prunedDirections(int id, int parent_id, int out_dirs[8]) const {
+  if (parent_id < 0) {
+    for (int d = 0; d < 8; ++d) out_dirs[d] = d;
+    return 8;
+  }
+
+  auto [x, y] = toCoord(id);
+  auto [px, py] = toCoord(parent_id);
+  int dx = sign(x - px);
+  int dy = sign(y - py);
+
+  int n = 0;
+  if (dx != 0 && dy != 0) {
+    out_dirs[n++] = dirIndex(dx, 0);
+    out_dirs[n++] = dirIndex(0, dy);
+    out_dirs[n++] = dirIndex(dx, dy);
+  } else if (dx != 0) {
+    out_dirs[n++] = dirIndex(dx, 0);
+    for (int s : {1, -1}) {
+      if (isFree(x, y + s) && !isFree(x - dx, y + s)) {
+        out_dirs[n++] = dirIndex(0, s);
+        out_dirs[n++] = dirIndex(dx, s);
+      }
+    }
+  } else {
+    out_dirs[n++] = dirIndex(0, dy);
+    for (int s : {1, -1}) {
+      if (isFree(x + s, y) && !isFree(x + s, y - dy)) {
+        out_dirs[n++] = dirIndex(s, 0);
+        out_dirs[n++] = dirIndex(s, dy);
+      }
+    }
+  }
+  return n;
+}
+
+// --------------------------------------------------
+// JPS+: предпосчитанные дистанции прыжков (Rabin)
+// --------------------------------------------------
+
+bool PathPlanner::ensureJumpTable() {
+  if (jump_table_ready_) return true;
+  if (std::max(width_, height_) >= std::numeric_limits<int16_t>::max())
+    return false;
+
+  const int n = width_ * height_;
+  jump_table_.assign(static_cast<size_t>(n) * 8, 0);
+  int16_t* table = jump_table_.mutableData();
+
+  auto at = [&](int x, int y, int d) -> int16_t& {
+    return table[static_cast<size_t>(toIndex(x, y)) * 8 + d];
+  };
+
+  // 1. Прямые направления. Идем от дальнего края, чтобы сосед был уже посчитан
+  for (int d = 0; d < 4; ++d) {
+    int dx = DIR_DX[d], dy = DIR_DY[d];
+    for (int i = 0; i < n; ++i) {
+      // Порядок обхода: против направления движения
+      int y = (dy > 0) ? height_ - 1 - i / width_ : i / width_;
+      int x = (dx > 0) ? width_ - 1 - i % width_ : i % width_;
+      if (!isFree(x, y)) continue;
+
+      int nx = x + dx, ny = y + dy;
+      int16_t value = 0;
+      if (neighbor_masks_[toIndex(x, y)] >> d & 1) {
+        if (isForcedStraight(nx, ny, dx, dy)) {
+          value = 1;
+        } else {
+          int16_t next = at(nx, ny, d);
+          value = next > 0 ? next + 1 : next - 1;
+        }
+      }
+      at(x, y, d) = value;
+    }
+  }
+
+  // 2. Диагонали: jump point, если из следующей клетки прямой прыжок что-то находит
+  for (int d = 4; d < 8; ++d) {
+    int dx = DIR_DX[d], dy = DIR_DY[d];
+    int dx_dir = dirIndex(dx, 0), dy_dir = dirIndex(0, dy);
+    for (int i = 0; i < n; ++i) {
+      int y = (dy > 0) ? height_ - 1 - i / width_ : i / width_;
+      int x = (dx > 0) ? width_ - 1 - i % width_ : i % width_;
+      if (!isFree(x, y)) continue;
+
+      int nx = x + dx, ny = y + dy;
+      int16_t value = 0;
+      if (neighbor_masks_[toIndex(x, y)] >> d & 1) {
+        if (at(nx, ny, dx_dir) > 0 || at(nx, ny, dy_dir) > 0) {
+          value = 1;
+        } else {
+          int16_t next = at(nx, ny, d);
+          value = next > 0 ? next + 1 : next - 1;
+        }
+      }
+      at(x, y, d) = value;
+    }
+  }
+
+  jump_table_ready_ = true;
+  return true;
+}
+
+// Прыжок по таблице: учитываем цель, если она лежит на луче / в квадранте
+int PathPlanner::jumpPlus(int x, int y, int dir, int goal_x, int goal_y) const {
+  int dist = jump_table_[static_cast<size_t>(toIndex(x, y)) * 8 + dir];
+  int reach = std::abs(dist);
+  int dx = DIR_DX[dir], dy = DIR_DY[dir];
+  int gdx = goal_x - x, gdy = goal_y - y;
+
+  if (dir < 4) {
+    // Цель прямо по лучу и до нее не дальше, чем до стены/jump point
+    bool on_ray = (dx != 0) ? (gdy == 0 && sign(gdx) == dx)
+                            : (gdx == 0 && sign(gdy) == dy);
+    int goal_dist = std::abs(gdx) + std::abs(gdy);
+    if (on_ray && goal_dist <= reach) return toIndex(goal_x, goal_y);
+  } else if (sign(gdx) == dx && sign(gdy) == dy) {
+    // Цель в квадранте: останавливаемся на ее строке/столбце
+    int m = std::min(std::abs(gdx), std::abs(gdy));
+    if (m <= reach) return toIndex(x + dx * m, y + dy * m);
+  }
+
+  if (dist > 0) return toIndex(x + dx * dist, y + dy * dist);
+  return -1;
+}
+
+template <class OpenList>
+SearchResult PathPlanner::runJPS(SearchContext& ctx, OpenList& open_set,
+                                 int start_id, int goal_id,
+                                 HeuristicType h_type, double weight,
+                                 bool plus, const SearchBudget& budget) const {
+  auto start_time = std::chrono::high_resolution_clock::now();
+  StatsCollector stats;
+  stats.track(ctx.expansion_marks, ctx.cells);
+
+  // Таблицу строит findPath/findPaths заранее (ensureJumpTable).
+  // Если карта слишком большая для int16, работаем как обычный JPS
+  plus = plus && jump_table_ready_;
+
+  double h_start = calculateHeuristic(start_id, goal_id, h_type);
+  open_set.push({start_id, weight * h_start, 0.0});
+
+  ctx.beginSearch();
+  ctx.dist_matrix[start_id] = 0.0;
+  ctx.search_epoch[start_id] = ctx.current_search_id;
+  stats.pushed(open_set.size());
+  stats.touched();
+
+  auto [goal_x, goal_y] = toCoord(goal_id);
+  int expanded_nodes = 0;
+  bool found = false;
+  int dirs[8];
+  BudgetGuard guard(budget);
+  int frontier = -1;  // Лучший jump point фронта, если бюджет кончился
+  TraceRecorder trace(ctx.trace, ctx.trace_stride, ctx.cells);
+  stats.loop();
+
+  while (!open_set.empty()) {
+    Node current = open_set.pop();
+
+    if (current.g_score > ctx.getDistance(current.id) + 1e-9) {
+      stats.stalePop();
+      continue;
+    }
+
+    if (current.id == goal_id) {
+      found = true;
+      break;
+    }
+    if (guard.exhausted(expanded_nodes)) {
+      frontier = current.id;
+      break;
+    }
+
+    expanded_nodes++;
+    stats.expanded(ctx.expansion_marks, current.id);
+    trace.record(current.id, current.g_score, current.f_score);
+    auto [cx, cy] = toCoord(current.id);
+    int parent = (current.id == start_id) ? -1 : ctx.came_from[current.id];
+    int n_dirs = prunedDirections(current.id, parent, dirs);
+
+    for (int k = 0; k < n_dirs; ++k) {
+      int d = dirs[k];
+      int next = plus ? jumpPlus(cx, cy, d, goal_x, goal_y)
+                      : jump(cx, cy, DIR_DX[d], DIR_DY[d], goal_id);
+      if (next < 0) continue;
+      stats.generated();
+
+      auto [nx, ny] = toCoord(next);
+      double new_g = ctx.getDistance(current.id) + segmentCost(cx, cy, nx, ny);
+
+      if (new_g < ctx.getDistance(next)) {
+        stats.touched(ctx.search_epoch[next] != ctx.current_search_id);
+        ctx.dist_matrix[next] = new_g;
+        ctx.search_epoch[next] = ctx.current_search_id;
+        ctx.came_from[next] = current.id;
+
+        double h = calculateHeuristic(next, goal_id, h_type);
+        open_set.push({next, new_g + weight * h, new_g});
+        stats.pushed(open_set.size());
+      }
+    }
+  }
+  stats.reconstruct();
+
+  // Реконструкция: разворачиваем отрезки между jump point в полный путь по клеткам
+  const int target = found ? goal_id : frontier;
+  std::vector<std::pair<int, int>> path;
+  if (target >= 0 && ctx.keep_path) {
+    int curr = target;
+    while (curr != start_id) {
+      int prev = ctx.came_from[curr];
+      auto [x, y] = toCoord(curr);
+      auto [px, py] = toCoord(prev);
+      int sx = sign(px - x), sy = sign(py - y);
+      while (x != px || y != py) {
+        path.push_back({x, y});
+        x += sx;
+        y += sy;
+      }
+      curr = prev;
+    }
+    path.push_back(toCoord(start_id));
+    std::reverse(path.begin(), path.end());
+  }
+
+  auto end_time = std::chrono::high_resolution_clock::now();
+  std::chrono::duration<double> duration = end_time - start_time;
+
+  SearchResult result;
+  result.path = std::move(path);
+  result.found = found;
+  result.expanded_nodes = expanded_nodes;
+  result.path_length = target >= 0 ? ctx.getDistance(target) : 0.0;
+  result.execution_time = duration.count();
+  result.stop_reason = guard.reason();
+  stats.finish(result.stats);
+  return result;
+}
+
+// findPathImpl выбирает очередь в рантайме — инстанцируем все варианты
+template SearchResult PathPlanner::runJPS(SearchContext&, BinaryHeapQueue&, int,
+                                          int, HeuristicType, double, bool,
+                                          const SearchBudget&) const;
+template SearchResult PathPlanner::runJPS(SearchContext&, IndexedDAryHeap&, int,
+                                          int, HeuristicType, double, bool,
+                                          const SearchBudget&) const;
+template SearchResult PathPlanner::runJPS(SearchContext&, BucketQueue&, int,
+                                          int, HeuristicType, double, bool,
+                                          const SearchBudget&) const;
+template SearchResult PathPlanner::runJPS(SearchContext&, RadixHeap&, int, int,
+                                          HeuristicType, double, bool,
+                                          const SearchBudget&) const;
@@ -0,0 +1,232 @@
+#include "Landmarks.h"
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include <cmath>
+#include <cstring>
+#include <fstream>
+#include <stdexcept>
+
+#include "PathPlanner.h"
+
+// --------------------------------------------------
+// LandmarkTable
+// --------------------------------------------------
+
+void LandmarkTable::assign(int cells, int connectivity,
+                           const std::vector<int>& landmarks,
+                           const std::vector<std::vector<double>>& fields) {
+  reset();
+  count_ = static_cast<int>(landmarks.size());
+  connectivity_ = connectivity;
+  landmarks_ = landmarks;
+  unit_.assign(count_, 1.0f);
+  storage_.assign(static_cast<size_t>(cells) * count_, kUnreachable);
+
+  for (int k = 0; k < count_; ++k) {
+    double max_dist = 0.0;
+    for (double d : fields[k])
+      if (std::isfinite(d)) max_dist = std::max(max_dist, d);
+    // 65534 шагов на самое дальнее расстояние (65535 занято под "недостижимо")
+    unit_[k] = max_dist > 0.0 ? static_cast<float>(max_dist / (kUnreachable - 1))
+                              : 1.0f;
+    // Делим на unit в float, как он и хранится, чтобы q * unit <= d
+    for (int i = 0; i < cells; ++i) {
+      double d = fields[k][i];
+      if (!std::isfinite(d)) continue;
+      double q = std::floor(d / unit_[k]);
+      storage_[static_cast<size_t>(i) * count_ + k] =
+          static_cast<uint16_t>(std::min(q, double(kUnreachable - 1)));
+    }
+  }
+  data_ = storage_.data();
+}
+
+void LandmarkTable::save(const std::string& path, int width,
+                         int height) const {
+  if (empty()) throw std::runtime_error("Таблица ориентиров не построена");
+  std::ofstream out(path, std::ios::binary);
+  if (!out) throw std::runtime_error("Не удалось открыть " + path);
+  save(out, width, height);
+  if (!out) throw std::runtime_error("Ошибка записи " + path);
+}
+
+void LandmarkTable::save(std::ostream& out, int width, int height) const {
+  Header header{{'P', 'F', 'L', 'M'}, kVersion, width, height, count_,
+                connectivity_};
+  out.write(reinterpret_cast<const char*>(&header), sizeof(header));
+  std::vector<int32_t> ids(landmarks_.begin(), landmarks_.end());
+  out.write(reinterpret_cast<const char*>(ids.data()),
+            ids.size() * sizeof(int32_t));
+  out.write(reinterpret_cast<const char*>(unit_.data()),
+            unit_.size() * sizeof(float));
+  out.write(reinterpret_cast<const char*>(data_),
+            static_cast<std::streamsize>(static_cast<size_t>(width) * height *
+                                         count_ * sizeof(uint16_t)));
+}
+
+void LandmarkTable::load(const std::string& path, int width, int height,
+                         bool use_mmap) {
+  std::ifstream in(path, std::ios::binary | std::ios::ate);
+  if (!in) throw std::runtime_error("Не удалось открыть " + path);
+  size_t file_size = static_cast<size_t>(in.tellg());
+  in.seekg(0);
+
+  Header header;
+  if (file_size < sizeof(header) ||
+      !in.read(reinterpret_cast<char*>(&header), sizeof(header)) ||
+      std::memcmp(header.magic, "PFLM", 4) != 0) {
+    throw std::runtime_error("Файл не является таблицей ориентиров: " + path);
+  }
+  if (header.version != kVersion)
+    throw std::runtime_error("Неподдерживаемая версия таблицы ориентиров");
+  if (header.width != width || header.height != height || header.count <= 0)
+    throw std::runtime_error("Таблица ориентиров построена для другой карты");
+
+  const int count = header.count;
+  const size_t table_offset =
+      sizeof(header) + static_cast<size_t>(count) * (sizeof(int32_t) + sizeof(float));
+  const size_t table_bytes =
+      static_cast<size_t>(width) * height * count * sizeof(uint16_t);
+  if (file_size != table_offset + table_bytes)
+    throw std::runtime_error("Поврежденный файл ориентиров: " + path);
+
+  std::vector<int32_t> ids(count);
+  std::vector<float> unit(count);
+  in.read(reinterpret_cast<char*>(ids.data()), count * sizeof(int32_t));
+  in.read(reinterpret_cast<char*>(unit.data()), count * sizeof(float));
+
+  reset();
+  if (use_mmap) {
+    int fd = ::open(path.c_str(), O_RDONLY);
+    if (fd < 0) throw std::runtime_error("Не удалось открыть " + path);
+    void* addr = ::mmap(nullptr, file_size, PROT_READ, MAP_SHARED, fd, 0);
+    ::close(fd);
+    if (addr == MAP_FAILED) throw std::runtime_error("mmap не удался: " + path);
+    map_addr_ = addr;
+    map_size_ = file_size;
+    data_ = reinterpret_cast<const uint16_t*>(static_cast<const char*>(addr) +
+                                              table_offset);
+  } else {
+    storage_.resize(table_bytes / sizeof(uint16_t));
+    if (!in.read(reinterpret_cast<char*>(storage_.data()), table_bytes))
+      throw std::runtime_error("Ошибка чтения " + path);
+    data_ = storage_.data();
+  }
+
+  count_ = count;
+  connectivity_ = header.connectivity;
+  landmarks_.assign(ids.begin(), ids.end());
+  unit_ = std::move(unit);
+}
+
+void LandmarkTable::attach(const char* base, size_t size, int width,
+                           int height) {
+  Header header;
+  if (size < sizeof(header)) throw std::runtime_error("Поврежденная таблица ориентиров");
+  std::memcpy(&header, base, sizeof(header));
+  if (std::memcmp(header.magic, "PFLM", 4) != 0 || header.version != kVersion)
+    throw std::runtime_error("Неподдерживаемая таблица ориентиров");
+  if (header.width != width || header.height != height || header.count <= 0)
+    throw std::runtime_error("Таблица ориентиров построена для другой карты");
+  const int count = header.count;
+  const size_t table_offset =
+      sizeof(header) + static_cast<size_t>(count) * (sizeof(int32_t) + sizeof(float));
+  if (size != table_offset + static_cast<size_t>(width) * height * count *
+                                 sizeof(uint16_t))
+    throw std::runtime_error("Поврежденная таблица ориентиров");
+
+  reset();
+  std::vector<int32_t> ids(count);
+  unit_.resize(count);
+  std::memcpy(ids.data(), base + sizeof(header), count * sizeof(int32_t));
+  std::memcpy(unit_.data(), base + sizeof(header) + count * sizeof(int32_t),
+              count * sizeof(float));
+  landmarks_.assign(ids.begin(), ids.end());
+  data_ = reinterpret_cast<const uint16_t*>(base + table_offset);
+  count_ = count;
+  connectivity_ = header.connectivity;
+  map_size_ = size;
+  attached_ = true;
+}
+
+size_t LandmarkTable::bytes() const {
+  if (mapped()) return map_size_;
+  return storage_.size() * sizeof(uint16_t);
+}
+
+void LandmarkTable::reset() {
+  if (map_addr_) ::munmap(map_addr_, map_size_);
+  map_addr_ = nullptr;
+  map_size_ = 0;
+  attached_ = false;
+  storage_.clear();
+  storage_.shrink_to_fit();
+  data_ = nullptr;
+  count_ = 0;
+  landmarks_.clear();
+  unit_.clear();
+}
+
+// --------------------------------------------------
+// Построение ориентиров в PathPlanner
+// --------------------------------------------------
+
+void PathPlanner::buildLandmarks(int count, int connectivity) {
+  const int n = width_ * height_;
+  int seed = -1;
+  for (int i = 0; i < n && seed < 0; ++i)
+    if (!isBlocked(i)) seed = i;
+  if (count <= 0 || seed < 0) {
+    landmarks_.reset();
+    return;
+  }
+
+  // Farthest-point: первый ориентир — самая дальняя клетка от произвольной
+  // свободной, каждый следующий — клетка, максимально удаленная от уже
+  // выбранных (по минимуму расстояний). Недостижимые клетки не выбираются
+  std::vector<double> field;
+  computeDistanceField(ctx_, seed, connectivity, field);
+  std::vector<double> min_dist(n, std::numeric_limits<double>::infinity());
+  int next = seed;
+  double best = 0.0;
+  for (int i = 0; i < n; ++i) {
+    if (std::isfinite(field[i]) && field[i] > best) {
+      best = field[i];
+      next = i;
+    }
+  }
+
+  std::vector<int> landmarks;
+  std::vector<std::vector<double>> fields;
+  while (static_cast<int>(landmarks.size()) < count) {
+    landmarks.push_back(next);
+    fields.emplace_back();
+    computeDistanceField(ctx_, next, connectivity, fields.back());
+
+    best = 0.0;
+    next = -1;
+    for (int i = 0; i < n; ++i) {
+      double d = fields.back()[i];
+      if (d < min_dist[i]) min_dist[i] = d;
+      if (std::isfinite(min_dist[i]) && min_dist[i] > best) {
+        best = min_dist[i];
+        next = i;
+      }
+    }
+    if (next < 0) break;  // Все достижимые клетки уже ориентиры
+  }
+
+  landmarks_.assign(n, connectivity, landmarks, fields);
+}
+
+void PathPlanner::saveLandmarks(const std::string& path) const {
+  landmarks_.save(path, width_, height_);
+}
+
+void PathPlanner::loadLandmarks(const std::string& path, bool use_mmap) {
+  landmarks_.load(path, width_, height_, use_mmap);
+}
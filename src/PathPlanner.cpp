@@ -1,18 +1,37 @@
 #include "PathPlanner.h"
 
+#include <atomic>
 #include <chrono>
+#include <stdexcept>
+#include <thread>
 
 PathPlanner::PathPlanner(int width, int height, const std::vector<int>& grid)
-    : width_(width), height_(height), grid_(grid),
-      dist_matrix_(width * height),
-      came_from_(width * height),
-      search_epoch_(width * height, 0) {
-          
-    neighbors_cache_.reserve(8);
-    costs_cache_.reserve(8);
+    : width_(width), height_(height), ctx_(width * height) {
+  if (grid.size() != static_cast<size_t>(width) * height)
+    throw std::invalid_argument("Размер grid не равен width * height");
+  loadObstacles(grid.data());
 }
 
-double PathPlanner::calculateHeuristic(int idx1, int idx2, HeuristicType type) {
+PathPlanner::PathPlanner(int width, int height, const uint8_t* cells)
+    : width_(width), height_(height), ctx_(width * height) {
+  loadObstacles(cells);
+}
+
+// Упаковываем карту в биты прямо из чужого буфера: 1 бит на клетку вместо int
+template <class Cell>
+void PathPlanner::loadObstacles(const Cell* cells) {
+  const size_t n = static_cast<size_t>(width_) * height_;
+  obstacles_.assign((n + 63) / 64, 0);
+  uint64_t* bits = obstacles_.mutableData();
+  for (size_t i = 0; i < n; ++i) {
+    if (cells[i] != 0) bits[i >> 6] |= uint64_t(1) << (i & 63);
+  }
+  buildNeighborMasks();
+  buildComponents();
+}
+
+double PathPlanner::calculateHeuristic(int idx1, int idx2,
+                                       HeuristicType type) const {
   if (type == HeuristicType::Zero) return 0.0;
 
   int x1 = idx1 % width_;
@@ -33,247 +52,681 @@ double PathPlanner::calculateHeuristic(int idx1, int idx2, HeuristicType type) {
       // Формула: (dx + dy) + (sqrt(2) - 2) * min(dx, dy)
       // Это математически эквивалентно max(dx, dy) + (sqrt(2)-1)*min(dx, dy)
       return (dx + dy) + (1.41421356 - 2.0) * std::min(dx, dy);
+    case HeuristicType::Landmark:
+      return std::max((dx + dy) + (1.41421356 - 2.0) * std::min(dx, dy),
+                      landmarks_.bound(idx1, idx2));
     default:
       return 0.0;
   }
 }
 
-// Оптимизированное получение соседей без лишних аллокаций
-void PathPlanner::getNeighbors(int current_id, int connectivity,
-                               std::vector<int>& out_neighbors,
-                               std::vector<double>& out_costs) {
-  out_neighbors.clear();
-  out_costs.clear();
-
-  int cx = current_id % width_;
-  int cy = current_id / width_;
+// Маска одной клетки. Бит d маски = шаг в направлении d (DIR_DX/DIR_DY) разрешен.
+uint8_t PathPlanner::cellMask(int id) const {
+  if (isBlocked(id)) return 0;  // Из стены никуда не ходим
+  const int cx = id % width_, cy = id / width_;
+  uint8_t mask = 0;
 
-  // Ортогональные сдвиги: Right, Down, Left, Up
-  const int dx_orth[] = {1, 0, -1, 0};
-  const int dy_orth[] = {0, 1, 0, -1};
-  bool free_orth[4] = {false, false, false, false};
+  // 1. Ортогональные соседи: Right, Down, Left, Up (биты 0..3)
+  for (int d = 0; d < 4; ++d) {
+    if (isFree(cx + DIR_DX[d], cy + DIR_DY[d])) mask |= 1 << d;
+  }
 
-  // 1. Проверяем ортогональных соседей [cite: 21]
+  // 2. Диагональные (биты 4..7). Corner Cutting: диагональ разрешена, если
+  // оба ортогональных соседа свободны. Diag 4 (Right-Down): нужны Right(0)
+  // и Down(1); Diag 5 (Left-Down): Left(2) и Down(1); Diag 6 (Left-Up):
+  // Left(2) и Up(3); Diag 7 (Right-Up): Right(0) и Up(3)
+  const int check1[] = {0, 2, 2, 0};
+  const int check2[] = {1, 1, 3, 3};
   for (int i = 0; i < 4; ++i) {
-    int nx = cx + dx_orth[i];
-    int ny = cy + dy_orth[i];
-
-    if (nx >= 0 && nx < width_ && ny >= 0 && ny < height_) {
-      int n_idx = ny * width_ + nx;
-      if (grid_[n_idx] == 0) {
-        out_neighbors.push_back(n_idx);
-        out_costs.push_back(1.0);
-        free_orth[i] = true;
-      }
+    int d = 4 + i;
+    if (isFree(cx + DIR_DX[d], cy + DIR_DY[d]) &&
+        (mask >> check1[i] & 1) && (mask >> check2[i] & 1)) {
+      mask |= 1 << d;
     }
   }
+  return mask;
+}
+
+// Маски соседей считаются один раз при построении планировщика
+// (после правок карты — только вокруг задетых клеток, см. setCells)
+void PathPlanner::buildNeighborMasks() {
+  const int n = width_ * height_;
+  neighbor_masks_.assign(n, 0);
+  for (int d = 0; d < 8; ++d) dir_offset_[d] = DIR_DY[d] * width_ + DIR_DX[d];
+  uint8_t* masks = neighbor_masks_.mutableData();
+  for (int id = 0; id < n; ++id) masks[id] = cellMask(id);
+}
 
-  // 2. Диагональные (только если 8-связность) [cite: 22, 23]
-  if (connectivity == 8) {
-    const int dx_diag[] = {1, -1, -1, 1};
-    const int dy_diag[] = {1, 1, -1, -1};
-    const double diag_cost = 1.41421356;  // sqrt(2)
-
-    // Для проверки Corner Cutting: диагональ разрешена, если оба ортогональных
-    // соседа свободны Индексы в free_orth: 0=Right, 1=Down, 2=Left, 3=Up Diag 0
-    // (Right-Down): нужны Right(0) и Down(1) Diag 1 (Left-Down):  нужны Left(2)
-    // и Down(1) Diag 2 (Left-Up):    нужны Left(2)  и Up(3) Diag 3 (Right-Up):
-    // нужны Right(0) и Up(3)
-    const int check1[] = {0, 2, 2, 0};
-    const int check2[] = {1, 1, 3, 3};
-
-    for (int i = 0; i < 4; ++i) {
-      int nx = cx + dx_diag[i];
-      int ny = cy + dy_diag[i];
-
-      if (nx >= 0 && nx < width_ && ny >= 0 && ny < height_) {
-        int n_idx = ny * width_ + nx;
-        if (grid_[n_idx] == 0) {
-          // Corner Cutting check
-          if (free_orth[check1[i]] && free_orth[check2[i]]) {
-            out_neighbors.push_back(n_idx);
-            out_costs.push_back(diag_cost);
+// Разметка компонент обходом в ширину по тем же маскам соседей, что и поиск
+// (для 8-связности учтен запрет corner cutting)
+void PathPlanner::buildComponents() {
+  const int n = width_ * height_;
+  std::vector<int> stack;
+  for (int c = 0; c < 2; ++c) {
+    const unsigned dir_mask = c == 1 ? 0xFF : 0x0F;
+    components_[c].assign(n, -1);
+    int* labels = components_[c].mutableData();
+    std::vector<int>& sizes = component_sizes_[c];
+    sizes.clear();
+    free_labels_[c].clear();
+    int next_label = 0;
+    for (int seed = 0; seed < n; ++seed) {
+      if (labels[seed] >= 0 || isBlocked(seed)) continue;
+      labels[seed] = next_label;
+      stack.push_back(seed);
+      sizes.push_back(0);
+      while (!stack.empty()) {
+        int id = stack.back();
+        stack.pop_back();
+        sizes.back()++;
+        unsigned mask = neighbor_masks_[id] & dir_mask;
+        while (mask) {
+          int d = __builtin_ctz(mask);
+          mask &= mask - 1;
+          int next = id + dir_offset_[d];
+          if (labels[next] < 0) {
+            labels[next] = next_label;
+            stack.push_back(next);
           }
         }
       }
+      next_label++;
     }
   }
 }
 
+// Получение соседей — просто разбор битов маски, без проверок границ и стен
+void PathPlanner::getNeighbors(int current_id, int connectivity,
+                               std::vector<int>& out_neighbors,
+                               std::vector<double>& out_costs) const {
+  out_neighbors.clear();
+  out_costs.clear();
+
+  // Для 4-связности берем только ортогональные биты
+  unsigned mask = neighbor_masks_[current_id] & (connectivity == 8 ? 0xFF : 0x0F);
+  while (mask) {
+    int d = __builtin_ctz(mask);
+    mask &= mask - 1;
+    out_neighbors.push_back(current_id + dir_offset_[d]);
+    out_costs.push_back(d < 4 ? 1.0 : DIAG_COST);
+  }
+}
+
 std::vector<std::vector<double>> PathPlanner::getCost2GoWindow(
     int agent_x, int agent_y, int goal_x, int goal_y, int radius,
-    int connectivity, bool fast_break = true) {
+    int connectivity, bool fast_break, QueueType queue,
+    const SearchBudget& budget, Cost2GoStatus* status) {
+  auto start_time = std::chrono::high_resolution_clock::now();
   // Размер окна
   int side = 2 * radius + 1;
   // Инициализируем окно значением -1.0 (обозначает препятствие или недостижимость)
   std::vector<std::vector<double>> window(side,
                                           std::vector<double>(side, -1.0));
 
+  const int agent[2] = {agent_x, agent_y};
+  const int order[1] = {0};
+  BudgetGuard guard(budget);
+  int expanded = fillCost2GoWindows(
+      ctx_, goal_x, goal_y, agent, order, 1, radius, connectivity, fast_break,
+      queue, guard, [&](int, int local_y, int local_x) -> double& {
+        return window[local_y][local_x];
+      });
+  if (status) {
+    std::chrono::duration<double> duration =
+        std::chrono::high_resolution_clock::now() - start_time;
+    *status = {guard.reason(), expanded, duration.count()};
+  }
+  return window;
+}
+
+// Одна обратная Дейкстра от цели заполняет окна всех агентов группы.
+// agents — пары (x, y), order[0..count) — индексы агентов группы,
+// cell(k, local_y, local_x) — ссылка на ячейку окна k-го агента группы
+// Если бюджет кончился, клетки окон из компоненты цели, до которых поиск
+// не дошел, получают NaN (чтобы не путать их со стенами)
+template <class WindowCell>
+int PathPlanner::fillCost2GoWindows(SearchContext& ctx, int goal_x, int goal_y,
+                                    const int* agents, const int* order,
+                                    int count, int radius, int connectivity,
+                                    bool fast_break, QueueType queue,
+                                    BudgetGuard& guard, WindowCell&& cell) {
   // Проверка координат
   if (goal_x < 0 || goal_x >= width_ || goal_y < 0 || goal_y >= height_ ||
-      grid_[toIndex(goal_x, goal_y)] != 0) {
-    return window;  // Цель недостижима или некорректна
+      isBlocked(toIndex(goal_x, goal_y))) {
+    return 0;  // Цель недостижима или некорректна
   }
 
-  // Определяем границы окна в глобальных координатах
-  int win_min_x = agent_x - radius;
-  int win_max_x = agent_x + radius;
-  int win_min_y = agent_y - radius;
-  int win_max_y = agent_y + radius;
+  int goal_id = toIndex(goal_x, goal_y);
 
-  // Подсчитываем, сколько клеток внутри окна теоретически проходимы.
-  // Это нужно для ранней остановки Dijkstra.
+  // Подсчитываем, сколько клеток внутри окон достижимы из цели (та же
+  // компонента связности). Это нужно для ранней остановки Dijkstra: клетка
+  // в отрезанном кармане никогда не будет найдена, и без этой проверки
+  // fast_break не срабатывал бы, а поиск заливал всю карту
   int valid_targets_in_window = 0;
-  for (int wy = 0; wy < side; ++wy) {
-    for (int wx = 0; wx < side; ++wx) {
-      int gx = win_min_x + wx;
-      int gy = win_min_y + wy;
-      if (gx >= 0 && gx < width_ && gy >= 0 && gy < height_) {
-        if (grid_[toIndex(gx, gy)] == 0) {
+  for (int k = 0; k < count; ++k) {
+    int win_min_x = agents[2 * order[k]] - radius;
+    int win_min_y = agents[2 * order[k] + 1] - radius;
+    for (int gy = std::max(win_min_y, 0);
+         gy <= std::min(win_min_y + 2 * radius, height_ - 1); ++gy) {
+      for (int gx = std::max(win_min_x, 0);
+           gx <= std::min(win_min_x + 2 * radius, width_ - 1); ++gx) {
+        int id = toIndex(gx, gy);
+        if (!isBlocked(id) && sameComponent(id, goal_id, connectivity))
           valid_targets_in_window++;
-        }
       }
     }
   }
 
-  if (valid_targets_in_window == 0) return window;
+  if (valid_targets_in_window == 0) return 0;
+
+  auto mark_unfinished = [&] {
+    for (int k = 0; k < count; ++k) {
+      int win_min_x = agents[2 * order[k]] - radius;
+      int win_min_y = agents[2 * order[k] + 1] - radius;
+      for (int gy = std::max(win_min_y, 0);
+           gy <= std::min(win_min_y + 2 * radius, height_ - 1); ++gy) {
+        for (int gx = std::max(win_min_x, 0);
+             gx <= std::min(win_min_x + 2 * radius, width_ - 1); ++gx) {
+          int id = toIndex(gx, gy);
+          auto& value = cell(k, gy - win_min_y, gx - win_min_x);
+          if (value == -1.0 && !isBlocked(id) &&
+              sameComponent(id, goal_id, connectivity))
+            value = std::numeric_limits<double>::quiet_NaN();
+        }
+      }
+    }
+  };
 
   // Запускаем обратную Дейкстру. от цели до агента (до всех клеток, но может останавливать, когда все окно посчитано)
-  int goal_id = toIndex(goal_x, goal_y);
 
-  std::priority_queue<Node, std::vector<Node>, std::greater<Node>> open_set;
-  open_set.push({goal_id, 0.0, 0.0});  // f_score = distance
+  // С кэшем продолжаем сохраненный поиск для этой цели вместо нового
+  if (cost2go_cache_.enabled()) {
+    auto state = cost2go_cache_.acquire(goal_id, connectivity, width_ * height_);
+    int expanded = resumeCost2GoWindows(*state, agents, order, count, radius,
+                                        connectivity, fast_break, guard, cell);
+    cost2go_cache_.release(goal_id, connectivity, *state);
+    if (guard.reason() != StopReason::Finished) mark_unfinished();
+    return expanded;
+  }
 
-  const double INF = std::numeric_limits<double>::infinity();
-  current_search_id_++; // Мгновенно "очищаем" всю память
-  dist_matrix_[goal_id] = 0.0;
-  search_epoch_[goal_id] = current_search_id_;
+  ctx.beginSearch(); // Мгновенно "очищаем" всю память
+  ctx.dist_matrix[goal_id] = 0.0;
+  ctx.search_epoch[goal_id] = ctx.current_search_id;
 
   int found_in_window_count = 0;
+  int expanded = 0;
+
+  // Ключи монотонны (h = 0), так что подходит любой открытый список
+  ctx.withOpenList(queue == QueueType::Fifo ? QueueType::Binary : queue,
+                   [&](auto& open_set) {
+    open_set.push({goal_id, 0.0, 0.0});  // f_score = distance
+
+    while (!open_set.empty()) {
+      Node current = open_set.pop();
+
+      if (current.f_score > ctx.getDistance(current.id) + 1e-9) continue;
+      if (guard.exhausted(expanded)) break;
+      expanded++;
+
+      // Координаты текущей клетки
+      auto [cx, cy] = toCoord(current.id);
+
+      // Если текущая клетка попадает в окно агента, записываем результат
+      for (int k = 0; k < count; ++k) {
+        // Преобразуем глобальные в локальные окна
+        int local_x = cx - agents[2 * order[k]] + radius;
+        int local_y = cy - agents[2 * order[k] + 1] + radius;
+        if (local_x < 0 || local_x > 2 * radius || local_y < 0 ||
+            local_y > 2 * radius)
+          continue;
+
+        // Если мы еще не записывали сюда значение
+        auto& value = cell(k, local_y, local_x);
+        if (value == -1.0) {
+          value = current.f_score;
+          found_in_window_count++;
+        }
+      }
 
-  while (!open_set.empty()) {
-    Node current = open_set.top();
-    open_set.pop();
-
-    if (current.f_score > getDistance(current.id) + 1e-9) continue;
-
-    // Координаты текущей клетки
-    auto [cx, cy] = toCoord(current.id);
+      // зависит от флага. может быть, мы хотим продолжать подсчет не только для окна вокруг агента
+      if (fast_break) {
+        // Если мы нашли значения для всех свободных клеток окон, можно завершать
+        if (found_in_window_count >= valid_targets_in_window) {
+          break;
+        }
+      }
 
-    // Если текущая клетка попадает в окно агента, записываем результат
-    if (cx >= win_min_x && cx <= win_max_x && cy >= win_min_y &&
-        cy <= win_max_y) {
-      // Преобразуем глобальные в локальные окна
-      int local_x = cx - win_min_x;
-      int local_y = cy - win_min_y;
-
-      // Если мы еще не записывали сюда значение
-      if (window[local_y][local_x] == -1.0) {
-        window[local_y][local_x] = current.f_score;
-        found_in_window_count++;
+      getNeighbors(current.id, connectivity, ctx.neighbors_cache, ctx.costs_cache);
+    
+      for (size_t i = 0; i < ctx.neighbors_cache.size(); ++i) {
+        int next = ctx.neighbors_cache[i];
+        double move_cost = ctx.costs_cache[i];
+        double new_dist = ctx.getDistance(current.id) + move_cost;
+
+        if (new_dist < ctx.getDistance(next)) {
+          ctx.dist_matrix[next] = new_dist;
+          ctx.search_epoch[next] = ctx.current_search_id; // Отмечаем клетку как актуальную
+          open_set.push({next, new_dist, new_dist});
+        }
       }
     }
+  });
+  if (guard.reason() != StopReason::Finished) mark_unfinished();
+  return expanded;
+}
 
-    // зависит от флага. может быть, мы хотим продолжать подсчет не только для окна вокруг агента
-    if (fast_break) {
-      // Если мы нашли значения для всех свободных клеток окна, можно завершать
-      if (found_in_window_count >= valid_targets_in_window) {
-        break;
+// Продолжение обратной Дейкстры из кэша. Закрытые клетки окон читаются сразу,
+// поиск идет, только пока в окнах остались незакрытые свободные клетки.
+// Клетка раскрывается сразу при закрытии, поэтому состояние можно прервать
+// после любой итерации и продолжить позже
+template <class WindowCell>
+int PathPlanner::resumeCost2GoWindows(Cost2GoState& state, const int* agents,
+                                      const int* order, int count, int radius,
+                                      int connectivity, bool fast_break,
+                                      BudgetGuard& guard,
+                                      WindowCell&& cell) const {
+  // Ждем только клетки из компоненты цели: остальные не закроются никогда
+  const int goal_id = state.goal_id;
+  int pending = 0;
+  for (int k = 0; k < count; ++k) {
+    int win_min_x = agents[2 * order[k]] - radius;
+    int win_min_y = agents[2 * order[k] + 1] - radius;
+    for (int gy = std::max(win_min_y, 0);
+         gy <= std::min(win_min_y + 2 * radius, height_ - 1); ++gy) {
+      for (int gx = std::max(win_min_x, 0);
+           gx <= std::min(win_min_x + 2 * radius, width_ - 1); ++gx) {
+        int id = toIndex(gx, gy);
+        if (isBlocked(id)) continue;
+        if (state.isSettled(id))
+          cell(k, gy - win_min_y, gx - win_min_x) = state.dist[id];
+        else if (sameComponent(id, goal_id, connectivity))
+          pending++;
       }
     }
+  }
 
-    getNeighbors(current.id, connectivity, neighbors_cache_, costs_cache_);
-    
-    for (size_t i = 0; i < neighbors_cache_.size(); ++i) {
-      int next = neighbors_cache_[i];
-      double move_cost = costs_cache_[i];
-      double new_dist = getDistance(current.id) + move_cost;
-
-      if (new_dist < getDistance(next)) {
-        dist_matrix_[next] = new_dist;
-        search_epoch_[next] = current_search_id_; // Отмечаем клетку как актуальную
+  auto& open_set = state.open;
+  int expanded = 0;
+  while (!open_set.empty() && (pending > 0 || !fast_break)) {
+    if (guard.exhausted(expanded)) break;  // Состояние цело: продолжим позже
+    Node current = open_set.pop();
+    if (state.isSettled(current.id) ||
+        current.f_score > state.dist[current.id] + 1e-9)
+      continue;
+    state.settle(current.id);
+    expanded++;
+
+    auto [cx, cy] = toCoord(current.id);
+    for (int k = 0; k < count; ++k) {
+      int local_x = cx - agents[2 * order[k]] + radius;
+      int local_y = cy - agents[2 * order[k] + 1] + radius;
+      if (local_x < 0 || local_x > 2 * radius || local_y < 0 ||
+          local_y > 2 * radius)
+        continue;
+      cell(k, local_y, local_x) = state.dist[current.id];
+      pending--;
+    }
+
+    unsigned mask =
+        neighbor_masks_[current.id] & (connectivity == 8 ? 0xFF : 0x0F);
+    while (mask) {
+      int d = __builtin_ctz(mask);
+      mask &= mask - 1;
+      int next = current.id + dir_offset_[d];
+      double new_dist = state.dist[current.id] + (d < 4 ? 1.0 : DIAG_COST);
+      if (new_dist < state.dist[next]) {
+        state.dist[next] = new_dist;
         open_set.push({next, new_dist, new_dist});
       }
     }
   }
+  return expanded;
+}
 
-  return window;
+void PathPlanner::getCost2GoWindows(const int* agents, const int* goals,
+                                    int count, int radius, int connectivity,
+                                    bool fast_break, int threads, float* out,
+                                    QueueType queue) {
+  const int side = 2 * radius + 1;
+  const size_t window_size = static_cast<size_t>(side) * side;
+  std::fill(out, out + window_size * std::max(count, 0), -1.0f);
+  if (count <= 0) return;
+
+  // Группируем агентов по цели: одна обратная Дейкстра на каждую цель
+  std::vector<int> order(count);
+  for (int i = 0; i < count; ++i) order[i] = i;
+  std::stable_sort(order.begin(), order.end(), [&](int a, int b) {
+    return std::make_pair(goals[2 * a + 1], goals[2 * a]) <
+           std::make_pair(goals[2 * b + 1], goals[2 * b]);
+  });
+  std::vector<int> group_begin;
+  for (int i = 0; i < count; ++i) {
+    if (i == 0 || goals[2 * order[i]] != goals[2 * order[i - 1]] ||
+        goals[2 * order[i] + 1] != goals[2 * order[i - 1] + 1])
+      group_begin.push_back(i);
+  }
+  const int groups = static_cast<int>(group_begin.size());
+  group_begin.push_back(count);
+
+  if (threads <= 0) threads = std::max(1u, std::thread::hardware_concurrency());
+  threads = std::min(threads, groups);
+  ensureWorkerContexts(threads - 1);
+
+  std::atomic<int> next_group{0};
+  auto worker = [&](SearchContext& ctx) {
+    int g;
+    while ((g = next_group.fetch_add(1, std::memory_order_relaxed)) < groups) {
+      const int* group = order.data() + group_begin[g];
+      int goal = order[group_begin[g]];
+      BudgetGuard unlimited{SearchBudget{}};
+      fillCost2GoWindows(
+          ctx, goals[2 * goal], goals[2 * goal + 1], agents, group,
+          group_begin[g + 1] - group_begin[g], radius, connectivity,
+          fast_break, queue, unlimited,
+          [&](int k, int local_y, int local_x) -> float& {
+            return out[group[k] * window_size + local_y * side + local_x];
+          });
+    }
+  };
+
+  std::vector<std::thread> pool;
+  pool.reserve(threads - 1);
+  for (int t = 0; t < threads - 1; ++t)
+    pool.emplace_back(worker, std::ref(*worker_contexts_[t]));
+  worker(ctx_);
+  for (auto& th : pool) th.join();
 }
 
 SearchResult PathPlanner::findPath(int start_x, int start_y, int goal_x,
                                    int goal_y, AlgorithmType algo,
                                    HeuristicType heuristic, double weight,
-                                   int connectivity) {
+                                   int connectivity, QueueType queue,
+                                   const SearchBudget& budget, bool keep_path,
+                                   int trace_stride) {
+  if (algo == AlgorithmType::JPSPlus && connectivity == 8) ensureJumpTable();
+  if (algo == AlgorithmType::HPA) ensureHierarchy(connectivity);
+  return findPathImpl(ctx_, start_x, start_y, goal_x, goal_y, algo, heuristic,
+                      weight, connectivity, queue, budget, keep_path,
+                      trace_stride);
+}
+
+QueueType PathPlanner::resolveQueue(QueueType requested, AlgorithmType algo,
+                                    HeuristicType heuristic,
+                                    int connectivity) {
+  if (algo == AlgorithmType::BFS) return QueueType::Fifo;
+  // Абстрактный граф HPA* ищется только бинарной кучей
+  if (algo == AlgorithmType::HPA) return QueueType::Binary;
+  // CPD очередь не нужна; без таблицы — A* на бинарной куче
+  if (algo == AlgorithmType::CPD) return QueueType::Binary;
+  // У D* Lite своя куча с двойным ключом
+  if (algo == AlgorithmType::DStarLite) return QueueType::Binary;
+  if (requested == QueueType::Fifo) return QueueType::Binary;
+  if (requested != QueueType::Bucket && requested != QueueType::Radix)
+    return requested;
+
+  // A*/WA* с эвристикой дают немонотонные (или не кратные ребрам) ключи
+  bool zero_h = algo == AlgorithmType::Dijkstra ||
+                algo == AlgorithmType::BiDijkstra ||
+                heuristic == HeuristicType::Zero;
+  // ARA* перестраивает OPEN между итерациями — монотонность ключей теряется
+  if (!zero_h || algo == AlgorithmType::ARA) return QueueType::DAry;
+
+  // У JPS отрезки между jump point длинные — кольцо из 4 корзин не подходит
+  bool jps = (algo == AlgorithmType::JPS || algo == AlgorithmType::JPSPlus) &&
+             connectivity == 8;
+  if (requested == QueueType::Bucket && jps) return QueueType::Radix;
+
+  // Критерию остановки двунаправленного поиска нужен точный порядок ключей
+  bool bidirectional = algo == AlgorithmType::BiDijkstra ||
+                       algo == AlgorithmType::BiAStar;
+  if (requested == QueueType::Bucket && bidirectional) return QueueType::Radix;
+  return requested;
+}
+
+BatchSearchResult PathPlanner::findPaths(const int* starts, const int* goals,
+                                         int count, AlgorithmType algo,
+                                         HeuristicType heuristic,
+                                         double weight, int connectivity,
+                                         int threads, bool keep_paths,
+                                         QueueType queue,
+                                         const SearchBudget& budget) {
+  BatchSearchResult batch;
+  batch.queue = resolveQueue(queue, algo, heuristic, connectivity);
+  if (usesCompact(algo) && algo != AlgorithmType::BFS) batch.queue = QueueType::Binary;
+  batch.found.assign(count, 0);
+  batch.path_length.assign(count, 0.0);
+  batch.expanded_nodes.assign(count, 0);
+  batch.execution_time.assign(count, 0.0);
+  batch.stop_reason.assign(count, static_cast<uint8_t>(StopReason::Finished));
+  if (keep_paths) batch.paths.resize(count);
+  if (algo == AlgorithmType::ARA) batch.solutions.resize(count);
+  if (kStatsEnabled) batch.stats.resize(count);
+  if (count <= 0) return batch;
+
+  if (threads <= 0) threads = std::max(1u, std::thread::hardware_concurrency());
+  threads = std::min(threads, count);
+
+  // Ленивые структуры строим заранее: потоки их только читают
+  if (algo == AlgorithmType::JPSPlus && connectivity == 8) ensureJumpTable();
+  if (algo == AlgorithmType::HPA) ensureHierarchy(connectivity);
+
+  ensureWorkerContexts(threads - 1);
+
+  std::atomic<int> next_task{0};
+  auto worker = [&](SearchContext& ctx) {
+    int i;
+    while ((i = next_task.fetch_add(1, std::memory_order_relaxed)) < count) {
+      SearchResult res =
+          findPathImpl(ctx, starts[2 * i], starts[2 * i + 1], goals[2 * i],
+                       goals[2 * i + 1], algo, heuristic, weight, connectivity,
+                       queue, budget, keep_paths);
+      batch.found[i] = res.found;
+      batch.path_length[i] = res.path_length;
+      batch.expanded_nodes[i] = res.expanded_nodes;
+      batch.execution_time[i] = res.execution_time;
+      batch.stop_reason[i] = static_cast<uint8_t>(res.stop_reason);
+      if (keep_paths) batch.paths[i] = std::move(res.path);
+      if (!batch.solutions.empty()) batch.solutions[i] = std::move(res.solutions);
+      if (!batch.stats.empty()) batch.stats[i] = res.stats;
+    }
+  };
+
+  std::vector<std::thread> pool;
+  pool.reserve(threads - 1);
+  for (int t = 0; t < threads - 1; ++t)
+    pool.emplace_back(worker, std::ref(*worker_contexts_[t]));
+  worker(ctx_);
+  for (auto& th : pool) th.join();
+
+  return batch;
+}
+
+// Поток 0 работает на ctx_, остальным нужны свои контексты
+void PathPlanner::ensureWorkerContexts(int count) {
+  while (static_cast<int>(worker_contexts_.size()) < count) {
+    worker_contexts_.push_back(
+        std::make_unique<SearchContext>(width_ * height_));
+  }
+}
+
+SearchResult PathPlanner::findPathImpl(SearchContext& ctx, int start_x,
+                                       int start_y, int goal_x, int goal_y,
+                                       AlgorithmType algo,
+                                       HeuristicType heuristic, double weight,
+                                       int connectivity, QueueType queue,
+                                       const SearchBudget& budget,
+                                       bool keep_path, int trace_stride) {
+  queue = resolveQueue(queue, algo, heuristic, connectivity);
+  ctx.keep_path = keep_path;
+  ctx.trace_stride = trace_stride;
+
+  // Пустой результат для случаев, когда поиск не нужен
+  auto unreachable = [queue] {
+    SearchResult result;
+    result.queue = queue;
+    return result;
+  };
+
   // Валидация координат
   if (start_x < 0 || start_x >= width_ || start_y < 0 || start_y >= height_ ||
       goal_x < 0 || goal_x >= width_ || goal_y < 0 || goal_y >= height_) {
-    return {{}, false, 0, 0.0, 0.0};
+    return unreachable();
   }
 
   int start_id = toIndex(start_x, start_y);
   int goal_id = toIndex(goal_x, goal_y);
 
   // Если старт или цель в препятствии — пути нет
-  if (grid_[start_id] != 0 ||
-      grid_[grid_.size() > (size_t)goal_id ? goal_id : 0] != 0) {
-    if (grid_[start_id] != 0 || grid_[goal_id] != 0)
-      return {{}, false, 0, 0.0, 0.0};
+  if (isBlocked(start_id) || isBlocked(goal_id)) {
+    return unreachable();
   }
 
+  // Разные компоненты связности — пути тоже нет, и весь поиск не нужен
+  if (!sameComponent(start_id, goal_id, connectivity)) {
+    return unreachable();
+  }
+
+  // Без таблицы ориентиров (или если она посчитана для 4-связности, а поиск
+  // 8-связный — тогда оценки недопустимы) Landmark работает как Octile
+  if (heuristic == HeuristicType::Landmark &&
+      (landmarks_.empty() || landmarks_.connectivity() < connectivity)) {
+    heuristic = HeuristicType::Octile;
+  }
+
+  // Таблица первых ходов подходит только для своей связности
+  if (algo == AlgorithmType::CPD &&
+      (cpd_.empty() || cpd_.connectivity() != connectivity)) {
+    algo = AlgorithmType::AStar;
+    heuristic = HeuristicType::Octile;
+    weight = 1.0;
+  }
+
+  // Компактный режим: целые стоимости, бинарная куча из 12-байтовых записей
+  if (usesCompact(algo)) {
+    SearchResult result;
+    if (algo == AlgorithmType::BFS) {
+      result = runCompactBFS(ctx, start_id, goal_id, connectivity, budget);
+    } else {
+      if (algo == AlgorithmType::Dijkstra) heuristic = HeuristicType::Zero;
+      result = runCompact(ctx, start_id, goal_id, heuristic,
+                          algo == AlgorithmType::Dijkstra ? 0.0 : weight,
+                          connectivity, budget);
+      queue = QueueType::Binary;
+    }
+    result.queue = queue;
+    if (trace_stride > 0) result.trace = std::move(ctx.trace);
+    return result;
+  }
+
+  SearchResult result;
   if (algo == AlgorithmType::BFS) {
-    return runBFS(start_id, goal_id, connectivity);
+    result = runBFS(ctx, start_id, goal_id, connectivity, budget);
+  } else if (algo == AlgorithmType::CPD) {
+    result = runCPD(start_id, goal_id, keep_path);
+  } else if (algo == AlgorithmType::HPA) {
+    result = runHPA(ctx, start_id, goal_id, connectivity);
+  } else if (algo == AlgorithmType::DStarLite) {
+    result = runDStarLite(ctx, start_id, goal_id, heuristic, connectivity, budget);
+  } else if (algo == AlgorithmType::ARA) {
+    result = ctx.withOpenList(queue, [&](auto& open_set) {
+      return runARA(ctx, open_set, start_id, goal_id, heuristic, weight,
+                    connectivity, budget);
+    });
+  } else if ((algo == AlgorithmType::JPS || algo == AlgorithmType::JPSPlus) &&
+             connectivity == 8) {
+    // JPS отсекает симметричные пути только на 8-связной сетке
+    bool plus = algo == AlgorithmType::JPSPlus;
+    result = ctx.withOpenList(queue, [&](auto& open_set) {
+      return runJPS(ctx, open_set, start_id, goal_id, heuristic, weight, plus,
+                    budget);
+    });
+  } else if (algo == AlgorithmType::BiDijkstra ||
+             algo == AlgorithmType::BiAStar) {
+    if (algo == AlgorithmType::BiDijkstra) heuristic = HeuristicType::Zero;
+    SearchContext& bwd = ctx.backwardContext();
+    result = ctx.withOpenListPair(queue, bwd, [&](auto& open_f, auto& open_b) {
+      return runBidirectional(ctx, bwd, open_f, open_b, start_id, goal_id,
+                              heuristic, connectivity, budget);
+    });
   } else {
     // Dijkstra это частный случай A* с h=0
     if (algo == AlgorithmType::Dijkstra) {
       heuristic = HeuristicType::Zero;
       weight = 0.0;
     }
-    return runAStarLike(start_id, goal_id, heuristic, weight, connectivity);
+    result = ctx.withOpenList(queue, [&](auto& open_set) {
+      return runAStarLike(ctx, open_set, start_id, goal_id, heuristic, weight,
+                          connectivity, budget);
+    });
   }
+  result.queue = queue;
+  if (trace_stride > 0) result.trace = std::move(ctx.trace);
+  return result;
 }
 
-SearchResult PathPlanner::runBFS(int start_id, int goal_id, int connectivity) {
+SearchResult PathPlanner::runBFS(SearchContext& ctx, int start_id,
+                                 int goal_id, int connectivity,
+                                 const SearchBudget& budget) const {
   auto start_time = std::chrono::high_resolution_clock::now();
+  StatsCollector stats;
 
-  std::queue<int> q;
-  q.push(start_id);
+  // FIFO на переиспользуемом векторе контекста: голова просто сдвигается
+  std::vector<int>& q = ctx.fifo;
+  q.clear();
+  q.push_back(start_id);
+  size_t head = 0;
 
-  current_search_id_++; // "Сбрасываем" visited и came_from для всей карты
-  search_epoch_[start_id] = current_search_id_;
+  ctx.beginSearch(); // "Сбрасываем" visited и came_from для всей карты
+  ctx.search_epoch[start_id] = ctx.current_search_id;
+  stats.pushed(1);
+  stats.touched();
 
   int expanded_nodes = 0;
   bool found = false;
+  BudgetGuard guard(budget);
+  int frontier = -1;  // Куда вести путь, если бюджет кончился
+  TraceRecorder trace(ctx.trace, ctx.trace_stride, ctx.cells);
+  stats.loop();
 
-  while (!q.empty()) {
-    int current = q.front();
-    q.pop();
-    expanded_nodes++;
+  while (head < q.size()) {
+    int current = q[head++];
 
     if (current == goal_id) {
+      expanded_nodes++;
       found = true;
       break;
     }
+    if (guard.exhausted(expanded_nodes)) {
+      frontier = current;
+      break;
+    }
+    expanded_nodes++;
+    trace.record(current);
 
-    getNeighbors(current, connectivity, neighbors_cache_, costs_cache_);
-    for (int next : neighbors_cache_) {
+    getNeighbors(current, connectivity, ctx.neighbors_cache, ctx.costs_cache);
+    stats.generated(static_cast<int>(ctx.neighbors_cache.size()));
+    for (int next : ctx.neighbors_cache) {
       // Если эпоха не совпадает, значит клетка "не посещена" в текущем поиске
-      if (search_epoch_[next] != current_search_id_) {
-        search_epoch_[next] = current_search_id_; // Помечаем как visited
-        came_from_[next] = current;
-        q.push(next);
+      if (ctx.search_epoch[next] != ctx.current_search_id) {
+        ctx.search_epoch[next] = ctx.current_search_id; // Помечаем как visited
+        ctx.came_from[next] = current;
+        q.push_back(next);
+        stats.pushed(q.size() - head);
+        stats.touched();
       }
     }
   }
+  stats.reconstruct();
 
-  // Реконструкция пути
+  // Реконструкция пути (до цели или до клетки фронта)
   std::vector<std::pair<int, int>> path;
   double true_length = 0.0;
 
-  if (found) {
-    int curr = goal_id;
+  if (found || frontier >= 0) {
+    int curr = found ? goal_id : frontier;
     while (curr != start_id) {
-      path.push_back(toCoord(curr));
-      int prev = came_from_[curr]; // Берем из глобального кэша
+      if (ctx.keep_path) path.push_back(toCoord(curr));
+      int prev = ctx.came_from[curr]; // Берем из кэша контекста
 
       // Считаем точную длину для метрики (даже если BFS искал по ребрам)
       int cx = curr % width_;
@@ -288,74 +741,107 @@ SearchResult PathPlanner::runBFS(int start_id, int goal_id, int connectivity) {
 
       curr = prev;
     }
-    path.push_back(toCoord(start_id));
-    std::reverse(path.begin(), path.end());
+    if (ctx.keep_path) {
+      path.push_back(toCoord(start_id));
+      std::reverse(path.begin(), path.end());
+    }
   }
 
   auto end_time = std::chrono::high_resolution_clock::now();
   std::chrono::duration<double> duration = end_time - start_time;
 
-  return {path, found, expanded_nodes, true_length, duration.count()};
+  SearchResult result;
+  result.path = std::move(path);
+  result.found = found;
+  result.expanded_nodes = expanded_nodes;
+  result.path_length = true_length;
+  result.execution_time = duration.count();
+  result.stop_reason = guard.reason();
+  stats.finish(result.stats);
+  return result;
 }
 
-SearchResult PathPlanner::runAStarLike(int start_id, int goal_id,
+template <class OpenList>
+SearchResult PathPlanner::runAStarLike(SearchContext& ctx, OpenList& open_set,
+                                       int start_id, int goal_id,
                                        HeuristicType h_type, double weight,
-                                       int connectivity) {
+                                       int connectivity,
+                                       const SearchBudget& budget) const {
   auto start_time = std::chrono::high_resolution_clock::now();
-
-  std::priority_queue<Node, std::vector<Node>, std::greater<Node>> open_set;
+  StatsCollector stats;
+  stats.track(ctx.expansion_marks, ctx.cells);
 
   double h_start = calculateHeuristic(start_id, goal_id, h_type);
   open_set.push({start_id, weight * h_start, 0.0});
 
-  current_search_id_++;
-  dist_matrix_[start_id] = 0.0;
-  search_epoch_[start_id] = current_search_id_;
+  ctx.beginSearch();
+  ctx.dist_matrix[start_id] = 0.0;
+  ctx.search_epoch[start_id] = ctx.current_search_id;
+  stats.pushed(open_set.size());
+  stats.touched();
 
   int expanded_nodes = 0;
   bool found = false;
+  BudgetGuard guard(budget);
+  int frontier = -1;  // Лучшая клетка фронта, если бюджет кончился
+  TraceRecorder trace(ctx.trace, ctx.trace_stride, ctx.cells);
+  stats.loop();
 
   while (!open_set.empty()) {
-    Node current = open_set.top();
-    open_set.pop();
+    Node current = open_set.pop();
 
     // Lazy deletion: если извлеченный путь хуже уже известного, пропускаем
-    if (current.g_score > getDistance(current.id) + 1e-9) continue;
+    if (current.g_score > ctx.getDistance(current.id) + 1e-9) {
+      stats.stalePop();
+      continue;
+    }
 
     if (current.id == goal_id) {
       found = true;
       break;
     }
+    // Извлеченная клетка — минимальный ключ OPEN, ее и отдаем как частичный ответ
+    if (guard.exhausted(expanded_nodes)) {
+      frontier = current.id;
+      break;
+    }
 
     expanded_nodes++;
-    getNeighbors(current.id, connectivity, neighbors_cache_, costs_cache_);
-
-    for (size_t i = 0; i < neighbors_cache_.size(); ++i) {
-      int next = neighbors_cache_[i];
-      double move_cost = costs_cache_[i];
-      double new_g = getDistance(current.id) + move_cost;
-
-      if (new_g < getDistance(next)) {
-        dist_matrix_[next] = new_g;
-        search_epoch_[next] = current_search_id_; // Актуализируем
+    stats.expanded(ctx.expansion_marks, current.id);
+    trace.record(current.id, current.g_score, current.f_score);
+    getNeighbors(current.id, connectivity, ctx.neighbors_cache, ctx.costs_cache);
+    stats.generated(static_cast<int>(ctx.neighbors_cache.size()));
+
+    for (size_t i = 0; i < ctx.neighbors_cache.size(); ++i) {
+      int next = ctx.neighbors_cache[i];
+      double move_cost = ctx.costs_cache[i];
+      double new_g = ctx.getDistance(current.id) + move_cost;
+
+      if (new_g < ctx.getDistance(next)) {
+        stats.touched(ctx.search_epoch[next] != ctx.current_search_id);
+        ctx.dist_matrix[next] = new_g;
+        ctx.search_epoch[next] = ctx.current_search_id; // Актуализируем
         
         double h = calculateHeuristic(next, goal_id, h_type);
         double new_f = new_g + weight * h;
 
-        came_from_[next] = current.id;
+        ctx.came_from[next] = current.id;
         open_set.push({next, new_f, new_g});
+        stats.pushed(open_set.size());
       }
     }
   }
+  stats.reconstruct();
 
-  // Реконструкция
+  // Реконструкция (до цели или до клетки фронта)
+  const int target = found ? goal_id : frontier;
   std::vector<std::pair<int, int>> path;
-  if (found) {
-    int curr = goal_id;
+  if (target >= 0 && ctx.keep_path) {
+    int curr = target;
     // Остановка, когда достигли start_id (потому что мы не пишем -1 в came_from_ при старте, чтобы не нарушить эпоху)
     while (curr != start_id) {
       path.push_back(toCoord(curr));
-      curr = came_from_[curr];
+      curr = ctx.came_from[curr];
     }
     path.push_back(toCoord(start_id)); // Добавляем старт
     std::reverse(path.begin(), path.end());
@@ -364,6 +850,17 @@ SearchResult PathPlanner::runAStarLike(int start_id, int goal_id,
   auto end_time = std::chrono::high_resolution_clock::now();
   std::chrono::duration<double> duration = end_time - start_time;
 
-  return {path, found, expanded_nodes, found ? getDistance(goal_id) : 0.0,
-          duration.count()};
-}
\ No newline at end of file
+  SearchResult result;
+  result.path = std::move(path);
+  result.found = found;
+  result.expanded_nodes = expanded_nodes;
+  result.path_length = target >= 0 ? ctx.getDistance(target) : 0.0;
+  result.execution_time = duration.count();
+  result.stop_reason = guard.reason();
+  stats.finish(result.stats);
+  return result;
+}
+// HPA* (HPA.cpp) откатывается на обычный A* с бинарной кучей
+template SearchResult PathPlanner::runAStarLike(SearchContext&, BinaryHeapQueue&,
+                                                int, int, HeuristicType, double,
+                                                int, const SearchBudget&) const;
@@ -0,0 +1,213 @@
+#include "Snapshot.h"
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include <cstring>
+#include <fstream>
+#include <functional>
+#include <stdexcept>
+
+#include "PathPlanner.h"
+
+// --------------------------------------------------
+// SnapshotImage
+// --------------------------------------------------
+
+void SnapshotImage::open(const std::string& path, bool use_mmap) {
+  reset();
+  int fd = ::open(path.c_str(), O_RDONLY);
+  if (fd < 0) throw std::runtime_error("Не удалось открыть " + path);
+  struct stat st;
+  if (::fstat(fd, &st) != 0 || st.st_size == 0) {
+    ::close(fd);
+    throw std::runtime_error("Пустой или недоступный снимок: " + path);
+  }
+  const size_t size = static_cast<size_t>(st.st_size);
+
+  if (use_mmap) {
+    void* addr = ::mmap(nullptr, size, PROT_READ, MAP_SHARED, fd, 0);
+    ::close(fd);
+    if (addr == MAP_FAILED) throw std::runtime_error("mmap не удался: " + path);
+    map_addr_ = addr;
+    data_ = static_cast<const char*>(addr);
+  } else {
+    ::close(fd);
+    std::ifstream in(path, std::ios::binary);
+    storage_.resize((size + sizeof(uint64_t) - 1) / sizeof(uint64_t));
+    if (!in.read(reinterpret_cast<char*>(storage_.data()),
+                 static_cast<std::streamsize>(size)))
+      throw std::runtime_error("Ошибка чтения " + path);
+    data_ = reinterpret_cast<const char*>(storage_.data());
+  }
+  size_ = size;
+}
+
+void SnapshotImage::reset() {
+  if (map_addr_) ::munmap(map_addr_, size_);
+  map_addr_ = nullptr;
+  storage_.clear();
+  storage_.shrink_to_fit();
+  data_ = nullptr;
+  size_ = 0;
+}
+
+// --------------------------------------------------
+// Сохранение и загрузка планировщика
+// --------------------------------------------------
+
+PathPlanner::PathPlanner(int width, int height)
+    : width_(width), height_(height), ctx_(width * height) {
+  for (int d = 0; d < 8; ++d) dir_offset_[d] = DIR_DY[d] * width_ + DIR_DX[d];
+}
+
+void PathPlanner::save(const std::string& path) const {
+  using namespace snapshot;
+  auto raw = [](const void* data, size_t bytes) {
+    return [data, bytes](std::ostream& out) {
+      out.write(static_cast<const char*>(data), static_cast<std::streamsize>(bytes));
+    };
+  };
+  std::vector<std::pair<uint32_t, std::function<void(std::ostream&)>>> parts;
+  parts.emplace_back(kObstacles, raw(obstacles_.data(), obstacles_.size() * sizeof(uint64_t)));
+  parts.emplace_back(kMasks, raw(neighbor_masks_.data(), neighbor_masks_.size()));
+  for (int c = 0; c < 2; ++c) {
+    parts.emplace_back(kLabels4 + c, raw(components_[c].data(),
+                                         components_[c].size() * sizeof(int32_t)));
+    parts.emplace_back(kSizes4 + c, raw(component_sizes_[c].data(),
+                                        component_sizes_[c].size() * sizeof(int32_t)));
+    parts.emplace_back(kFreeLabels4 + c, raw(free_labels_[c].data(),
+                                             free_labels_[c].size() * sizeof(int32_t)));
+  }
+  if (jump_table_ready_)
+    parts.emplace_back(kJumpTable, raw(jump_table_.data(),
+                                       jump_table_.size() * sizeof(int16_t)));
+  if (!landmarks_.empty())
+    parts.emplace_back(kLandmarks, [&](std::ostream& out) {
+      landmarks_.save(out, width_, height_);
+    });
+  if (!cpd_.empty())
+    parts.emplace_back(kCPD, [&](std::ostream& out) { cpd_.save(out, width_, height_); });
+
+  std::ofstream out(path, std::ios::binary);
+  if (!out) throw std::runtime_error("Не удалось открыть " + path);
+  Header header{{'P', 'F', 'S', 'N'}, kVersion, width_, height_,
+                static_cast<uint32_t>(parts.size()), 0};
+  out.write(reinterpret_cast<const char*>(&header), sizeof(header));
+
+  // Оглавление дописывается в конце, когда известны смещения секций
+  std::vector<Section> sections(parts.size());
+  out.write(reinterpret_cast<const char*>(sections.data()),
+            sections.size() * sizeof(Section));
+  const char zeros[kAlignment] = {};
+  for (size_t i = 0; i < parts.size(); ++i) {
+    size_t pos = static_cast<size_t>(out.tellp());
+    size_t padding = (kAlignment - pos % kAlignment) % kAlignment;
+    out.write(zeros, padding);
+    sections[i].kind = parts[i].first;
+    sections[i].offset = pos + padding;
+    parts[i].second(out);
+    sections[i].size = static_cast<size_t>(out.tellp()) - sections[i].offset;
+  }
+  out.seekp(sizeof(header));
+  out.write(reinterpret_cast<const char*>(sections.data()),
+            sections.size() * sizeof(Section));
+  if (!out) throw std::runtime_error("Ошибка записи " + path);
+}
+
+std::unique_ptr<PathPlanner> PathPlanner::load(const std::string& path,
+                                               bool use_mmap) {
+  using namespace snapshot;
+  Header header;
+  {
+    std::ifstream in(path, std::ios::binary);
+    if (!in) throw std::runtime_error("Не удалось открыть " + path);
+    if (!in.read(reinterpret_cast<char*>(&header), sizeof(header)) ||
+        std::memcmp(header.magic, "PFSN", 4) != 0)
+      throw std::runtime_error("Файл не является снимком планировщика: " + path);
+  }
+  if (header.version != kVersion)
+    throw std::runtime_error("Неподдерживаемая версия снимка: " +
+                             std::to_string(header.version));
+  if (header.width <= 0 || header.height <= 0)
+    throw std::runtime_error("Поврежденный снимок: " + path);
+
+  std::unique_ptr<PathPlanner> planner(new PathPlanner(header.width, header.height));
+  PathPlanner& p = *planner;
+  SnapshotImage& image = p.snapshot_;
+  image.open(path, use_mmap);
+  const char* base = image.data();
+  const size_t table_end = sizeof(header) + header.sections * sizeof(Section);
+  if (image.size() < table_end || std::memcmp(base, &header, sizeof(header)) != 0)
+    throw std::runtime_error("Поврежденный снимок: " + path);
+
+  const size_t cells = static_cast<size_t>(header.width) * header.height;
+  uint32_t seen = 0;  // Биты обязательных секций
+  for (uint32_t i = 0; i < header.sections; ++i) {
+    Section section;
+    std::memcpy(&section, base + sizeof(header) + i * sizeof(Section), sizeof(section));
+    if (section.offset % sizeof(uint64_t) != 0 || section.offset > image.size() ||
+        section.size > image.size() - section.offset)
+      throw std::runtime_error("Поврежденный снимок: " + path);
+    const char* data = base + section.offset;
+    auto corrupt = [&]() {
+      return std::runtime_error("Поврежденный снимок: секция " +
+                                std::to_string(section.kind) + " в " + path);
+    };
+    auto expect = [&](size_t bytes) {
+      if (section.size != bytes) throw corrupt();
+    };
+    auto ints = [&](std::vector<int>& out) {
+      if (section.size % sizeof(int32_t) != 0) throw corrupt();
+      const int32_t* begin = reinterpret_cast<const int32_t*>(data);
+      out.assign(begin, begin + section.size / sizeof(int32_t));
+    };
+
+    switch (section.kind) {
+      case kObstacles:
+        expect((cells + 63) / 64 * sizeof(uint64_t));
+        p.obstacles_.view(reinterpret_cast<const uint64_t*>(data), (cells + 63) / 64);
+        break;
+      case kMasks:
+        expect(cells);
+        p.neighbor_masks_.view(reinterpret_cast<const uint8_t*>(data), cells);
+        break;
+      case kLabels4:
+      case kLabels8:
+        expect(cells * sizeof(int32_t));
+        p.components_[section.kind - kLabels4].view(
+            reinterpret_cast<const int*>(data), cells);
+        break;
+      case kSizes4:
+      case kSizes8:
+        ints(p.component_sizes_[section.kind - kSizes4]);
+        break;
+      case kFreeLabels4:
+      case kFreeLabels8:
+        ints(p.free_labels_[section.kind - kFreeLabels4]);
+        break;
+      case kJumpTable:
+        expect(cells * 8 * sizeof(int16_t));
+        p.jump_table_.view(reinterpret_cast<const int16_t*>(data), cells * 8);
+        p.jump_table_ready_ = true;
+        break;
+      case kLandmarks:
+        p.landmarks_.attach(data, section.size, header.width, header.height);
+        break;
+      case kCPD:
+        p.cpd_.attach(data, section.size, header.width, header.height);
+        break;
+      default:  // Секция из более новой версии — пропускаем
+        continue;
+    }
+    if (section.kind <= kSizes8) seen |= 1u << section.kind;
+  }
+
+  const uint32_t required = (1u << kObstacles) | (1u << kMasks) | (1u << kLabels4) |
+                            (1u << kLabels8) | (1u << kSizes4) | (1u << kSizes8);
+  if ((seen & required) != required)
+    throw std::runtime_error("В снимке нет карты или компонент: " + path);
+  return planner;
+}
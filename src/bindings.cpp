@@ -1,3 +1,4 @@
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
@@ -5,14 +6,328 @@
 
 namespace py = pybind11;
 
+using CoordArray = py::array_t<int, py::array::c_style | py::array::forcecast>;
+
+// Копия колонки std::vector -> 1D ndarray
+template <typename T>
+static py::array_t<T> toArray(const std::vector<T>& column) {
+  return py::array_t<T>(column.size(), column.data());
+}
+
+// Конструктор из буфера: NumPy uint8/bool, memoryview, bytes, mmap — без
+// промежуточного списка Python. Однобайтовый C-contiguous буфер читается
+// напрямую, остальные dtype приводятся к uint8 через NumPy
+static std::unique_ptr<PathPlanner> plannerFromBuffer(int width, int height,
+                                                      py::buffer grid) {
+  py::buffer_info info = grid.request();
+  bool contiguous = true;
+  py::ssize_t expected_stride = info.itemsize;
+  for (py::ssize_t d = info.ndim - 1; d >= 0; --d) {
+    if (info.shape[d] > 1 && info.strides[d] != expected_stride)
+      contiguous = false;
+    expected_stride *= info.shape[d];
+  }
+
+  if (info.size != static_cast<py::ssize_t>(width) * height) {
+    throw std::invalid_argument("Размер буфера карты не равен width * height");
+  }
+
+  if (info.itemsize == 1 && contiguous) {
+    const auto* cells = static_cast<const uint8_t*>(info.ptr);
+    py::gil_scoped_release release;
+    return std::make_unique<PathPlanner>(width, height, cells);
+  }
+
+  auto cells = py::array_t<uint8_t, py::array::c_style | py::array::forcecast>(
+      py::module_::import("numpy").attr("asarray")(grid).attr("astype")("uint8"));
+  return std::make_unique<PathPlanner>(width, height, cells.data());
+}
+
+// Улучшения ARA* -> float64 ndarray (K, 3): время (с), длина, граница
+static py::array_t<double> solutionsToArray(
+    const std::vector<AnytimeSolution>& solutions) {
+  py::array_t<double> arr({static_cast<py::ssize_t>(solutions.size()),
+                           static_cast<py::ssize_t>(3)});
+  auto view = arr.mutable_unchecked<2>();
+  for (size_t k = 0; k < solutions.size(); ++k) {
+    view(k, 0) = solutions[k].time;
+    view(k, 1) = solutions[k].cost;
+    view(k, 2) = solutions[k].bound;
+  }
+  return arr;
+}
+
+// Путь -> int32 ndarray (N, 2) поверх буфера самого вектора, без копии.
+// owner — объект Python, который держит вектор живым, пока жив массив
+static py::array_t<int> pathView(const std::vector<std::pair<int, int>>& path,
+                                 py::handle owner) {
+  const int* data = path.empty() ? nullptr : &path.front().first;
+  return py::array_t<int>({static_cast<py::ssize_t>(path.size()),
+                           static_cast<py::ssize_t>(2)},
+                          {static_cast<py::ssize_t>(2 * sizeof(int)),
+                           static_cast<py::ssize_t>(sizeof(int))},
+                          data, owner);
+}
+
+// Путь из пакета: вектор переезжает в капсулу, массив становится его владельцем
+static py::array_t<int> pathToArray(std::vector<std::pair<int, int>>&& path) {
+  auto* owned = new std::vector<std::pair<int, int>>(std::move(path));
+  py::capsule owner(owned, [](void* p) {
+    delete static_cast<std::vector<std::pair<int, int>>*>(p);
+  });
+  return pathView(*owned, owner);
+}
+
+// Счетчики одного поиска -> dict (None, если модуль собран без статистики)
+static py::object statsToDict(const SearchStats& s) {
+  if (!kStatsEnabled) return py::none();
+  auto counter = [](long long value) -> py::object {
+    if (value == SearchStats::kUntracked) return py::none();
+    return py::int_(value);
+  };
+  py::dict d;
+  d["generated"] = counter(s.generated);
+  d["pushes"] = counter(s.pushes);
+  d["stale_pops"] = counter(s.stale_pops);
+  d["reexpansions"] = counter(s.reexpansions);
+  d["peak_open"] = counter(s.peak_open);
+  d["touched"] = counter(s.touched);
+  d["setup_time"] = s.setup_time;
+  d["search_time"] = s.search_time;
+  d["reconstruct_time"] = s.reconstruct_time;
+  return d;
+}
+
+// Счетчики пакета -> dict колонок NumPy
+template <typename T>
+static py::array_t<T> statsColumn(const std::vector<SearchStats>& stats,
+                                  T SearchStats::*field) {
+  py::array_t<T> arr(stats.size());
+  auto view = arr.template mutable_unchecked<1>();
+  for (size_t i = 0; i < stats.size(); ++i) view(i) = stats[i].*field;
+  return arr;
+}
+
+static py::object statsToColumns(const std::vector<SearchStats>& stats) {
+  if (!kStatsEnabled) return py::none();
+  py::dict d;
+  d["generated"] = statsColumn(stats, &SearchStats::generated);
+  d["pushes"] = statsColumn(stats, &SearchStats::pushes);
+  d["stale_pops"] = statsColumn(stats, &SearchStats::stale_pops);
+  d["reexpansions"] = statsColumn(stats, &SearchStats::reexpansions);
+  d["peak_open"] = statsColumn(stats, &SearchStats::peak_open);
+  d["touched"] = statsColumn(stats, &SearchStats::touched);
+  d["setup_time"] = statsColumn(stats, &SearchStats::setup_time);
+  d["search_time"] = statsColumn(stats, &SearchStats::search_time);
+  d["reconstruct_time"] = statsColumn(stats, &SearchStats::reconstruct_time);
+  return d;
+}
+
+// Бюджет из аргументов Python (0 / None — без ограничения)
+static SearchBudget makeBudget(long long max_expansions, double deadline_ms,
+                               const CancelToken* cancel) {
+  return {max_expansions, deadline_ms, cancel};
+}
+
+// find_path: с токеном отмены GIL отпускается, чтобы отменить поиск
+// можно было из другого потока Python
+static SearchResult findPath(PathPlanner& planner, int start_x, int start_y,
+                             int goal_x, int goal_y, AlgorithmType algo,
+                             HeuristicType heuristic, double weight,
+                             int connectivity, QueueType queue,
+                             double deadline_ms, long long max_expansions,
+                             const CancelToken* cancel, bool return_path,
+                             int trace_stride) {
+  SearchBudget budget = makeBudget(max_expansions, deadline_ms, cancel);
+  if (!cancel)
+    return planner.findPath(start_x, start_y, goal_x, goal_y, algo, heuristic,
+                            weight, connectivity, queue, budget, return_path,
+                            trace_stride);
+  py::gil_scoped_release release;
+  return planner.findPath(start_x, start_y, goal_x, goal_y, algo, heuristic,
+                          weight, connectivity, queue, budget, return_path,
+                          trace_stride);
+}
+
+// find_paths: массивы (N, 2) стартов и целей -> словарь колонок NumPy
+static py::dict findPaths(PathPlanner& planner, CoordArray starts,
+                          CoordArray goals, AlgorithmType algo,
+                          HeuristicType heuristic, double weight,
+                          int connectivity, int threads, bool return_paths,
+                          QueueType queue, double deadline_ms,
+                          long long max_expansions, const CancelToken* cancel) {
+  if (starts.ndim() != 2 || starts.shape(1) != 2 || goals.ndim() != 2 ||
+      goals.shape(1) != 2 || starts.shape(0) != goals.shape(0)) {
+    throw std::invalid_argument("starts и goals должны быть массивами (N, 2)");
+  }
+  int count = static_cast<int>(starts.shape(0));
+
+  BatchSearchResult batch;
+  {
+    py::gil_scoped_release release;
+    batch = planner.findPaths(starts.data(), goals.data(), count, algo,
+                              heuristic, weight, connectivity, threads,
+                              return_paths, queue,
+                              makeBudget(max_expansions, deadline_ms, cancel));
+  }
+
+  py::dict out;
+  out["found"] = toArray(batch.found).attr("astype")("bool");
+  out["path_length"] = toArray(batch.path_length);
+  out["expanded_nodes"] = toArray(batch.expanded_nodes);
+  out["execution_time"] = toArray(batch.execution_time);
+  out["stop_reason"] = toArray(batch.stop_reason);
+  out["stats"] = statsToColumns(batch.stats);
+  out["queue"] = batch.queue;
+  if (return_paths) {
+    py::list paths;
+    for (auto& path : batch.paths) paths.append(pathToArray(std::move(path)));
+    out["paths"] = paths;
+  } else {
+    out["paths"] = py::none();
+  }
+  if (!batch.solutions.empty()) {
+    py::list solutions;
+    for (const auto& task : batch.solutions) solutions.append(solutionsToArray(task));
+    out["solutions"] = solutions;
+  }
+  return out;
+}
+
+// get_cost2go_window: окно (side x side) списками; with_status — еще и dict
+// со stop_reason, expanded_nodes, execution_time
+static py::object getCost2GoWindow(PathPlanner& planner, int agent_x,
+                                   int agent_y, int goal_x, int goal_y,
+                                   int radius, int connectivity,
+                                   bool fast_break, QueueType queue,
+                                   long long max_expansions, double deadline_ms,
+                                   const CancelToken* cancel, bool with_status) {
+  SearchBudget budget = makeBudget(max_expansions, deadline_ms, cancel);
+  Cost2GoStatus status;
+  std::vector<std::vector<double>> window;
+  {
+    std::unique_ptr<py::gil_scoped_release> release;
+    if (cancel) release = std::make_unique<py::gil_scoped_release>();
+    window = planner.getCost2GoWindow(agent_x, agent_y, goal_x, goal_y, radius,
+                                      connectivity, fast_break, queue, budget,
+                                      &status);
+  }
+  if (!with_status) return py::cast(window);
+  py::dict info;
+  info["stop_reason"] = status.stop_reason;
+  info["expanded_nodes"] = status.expanded_nodes;
+  info["execution_time"] = status.execution_time;
+  return py::make_tuple(window, info);
+}
+
+// get_cost2go_windows: массивы (B, 2) агентов и целей -> ndarray (B, side, side)
+static py::array_t<float> getCost2GoWindows(PathPlanner& planner,
+                                            CoordArray agents, CoordArray goals,
+                                            int radius, int connectivity,
+                                            bool fast_break, int threads,
+                                            QueueType queue) {
+  if (agents.ndim() != 2 || agents.shape(1) != 2 || goals.ndim() != 2 ||
+      goals.shape(1) != 2 || agents.shape(0) != goals.shape(0)) {
+    throw std::invalid_argument("agents и goals должны быть массивами (B, 2)");
+  }
+  if (radius < 0) throw std::invalid_argument("radius должен быть >= 0");
+  int count = static_cast<int>(agents.shape(0));
+  py::ssize_t side = 2 * radius + 1;
+
+  py::array_t<float> windows({static_cast<py::ssize_t>(count), side, side});
+  float* out = windows.mutable_data();
+  {
+    py::gil_scoped_release release;
+    planner.getCost2GoWindows(agents.data(), goals.data(), count, radius,
+                              connectivity, fast_break, threads, out, queue);
+  }
+  return windows;
+}
+
+// distance_field: (H, W) float32 (inf — недостижимо) или, с dtype="uint16",
+// кортеж (поле uint16, unit): расстояние ~ q * unit, 65535 — недостижимо
+static py::object distanceField(PathPlanner& planner, std::pair<int, int> source,
+                                int connectivity, std::optional<double> max_cost,
+                                const std::string& dtype) {
+  if (dtype != "float32" && dtype != "uint16")
+    throw std::invalid_argument("dtype должен быть \"float32\" или \"uint16\"");
+  const double limit = max_cost.value_or(std::numeric_limits<double>::infinity());
+  py::array_t<float> field({static_cast<py::ssize_t>(planner.height()),
+                            static_cast<py::ssize_t>(planner.width())});
+  float* data = field.mutable_data();
+  {
+    py::gil_scoped_release release;
+    planner.distanceField(source.first, source.second, connectivity, limit, data);
+  }
+  if (dtype == "float32") return field;
+
+  // Квантование как у таблицы ориентиров: 65534 шага на самое дальнее расстояние
+  const size_t n = static_cast<size_t>(field.size());
+  float max_dist = 0.0f;
+  for (size_t i = 0; i < n; ++i)
+    if (std::isfinite(data[i])) max_dist = std::max(max_dist, data[i]);
+  const double unit = max_dist > 0.0f ? max_dist / double(LandmarkTable::kUnreachable - 1) : 1.0;
+  py::array_t<uint16_t> quantized({static_cast<py::ssize_t>(planner.height()),
+                                   static_cast<py::ssize_t>(planner.width())});
+  uint16_t* q = quantized.mutable_data();
+  for (size_t i = 0; i < n; ++i)
+    q[i] = std::isfinite(data[i]) ? static_cast<uint16_t>(std::lround(data[i] / unit))
+                                  : LandmarkTable::kUnreachable;
+  return py::make_tuple(quantized, unit);
+}
+
+// distances_to_many: targets (N, 2) -> float64 (N,), inf — недостижимо
+static py::array_t<double> distancesToMany(PathPlanner& planner,
+                                           std::pair<int, int> source,
+                                           CoordArray targets, int connectivity,
+                                           std::optional<double> max_cost) {
+  if (targets.ndim() != 2 || targets.shape(1) != 2)
+    throw std::invalid_argument("targets должен быть массивом (N, 2)");
+  const int count = static_cast<int>(targets.shape(0));
+  py::array_t<double> out(count);
+  double* data = out.mutable_data();
+  {
+    py::gil_scoped_release release;
+    planner.distancesToMany(source.first, source.second, targets.data(), count,
+                            connectivity,
+                            max_cost.value_or(std::numeric_limits<double>::infinity()),
+                            data);
+  }
+  return out;
+}
+
+// set_cells: три одномерных массива одной длины (xs, ys, values)
+static int setCells(PathPlanner& planner, CoordArray xs, CoordArray ys,
+                    py::array_t<uint8_t, py::array::c_style | py::array::forcecast> values) {
+  if (xs.ndim() != 1 || ys.ndim() != 1 || values.ndim() != 1 ||
+      xs.shape(0) != ys.shape(0) || xs.shape(0) != values.shape(0)) {
+    throw std::invalid_argument("xs, ys и values должны быть массивами (N,)");
+  }
+  return planner.setCells(xs.data(), ys.data(), values.data(),
+                          static_cast<int>(xs.shape(0)));
+}
+
 PYBIND11_MODULE(pathfinding_core, m) {
   m.doc() = "Pathfinding algorithms implemented in C++ optimized";
+  // Собран ли модуль со счетчиками (cmake -DPATHFINDING_STATS=ON)
+  m.attr("STATS_ENABLED") = kStatsEnabled;
+
+  // dtype записи трассы: step, cell (int32), g, f (float32)
+  PYBIND11_NUMPY_DTYPE(TraceRecord, step, cell, g, f);
 
   py::enum_<AlgorithmType>(m, "AlgorithmType")
       .value("BFS", AlgorithmType::BFS)
       .value("Dijkstra", AlgorithmType::Dijkstra)
       .value("AStar", AlgorithmType::AStar)
       .value("WAStar", AlgorithmType::WAStar)
+      .value("JPS", AlgorithmType::JPS)
+      .value("JPSPlus", AlgorithmType::JPSPlus)
+      .value("BiDijkstra", AlgorithmType::BiDijkstra)
+      .value("BiAStar", AlgorithmType::BiAStar)
+      .value("HPA", AlgorithmType::HPA)
+      .value("CPD", AlgorithmType::CPD)
+      .value("ARA", AlgorithmType::ARA)
+      .value("DStarLite", AlgorithmType::DStarLite)
       .export_values();
 
   py::enum_<HeuristicType>(m, "HeuristicType")
@@ -20,23 +335,272 @@ PYBIND11_MODULE(pathfinding_core, m) {
       .value("Euclidean", HeuristicType::Euclidean)
       .value("Octile", HeuristicType::Octile)
       .value("Zero", HeuristicType::Zero)
+      .value("Landmark", HeuristicType::Landmark)
+      .export_values();
+
+  py::enum_<StopReason>(m, "StopReason")
+      .value("Finished", StopReason::Finished)
+      .value("MaxExpansions", StopReason::MaxExpansions)
+      .value("Deadline", StopReason::Deadline)
+      .value("Cancelled", StopReason::Cancelled)
+      .export_values();
+
+  py::class_<CancelToken>(m, "CancelToken",
+                          "Флаг отмены поиска: cancel() можно звать из "
+                          "другого потока, поиск остановится на ближайшей "
+                          "проверке бюджета")
+      .def(py::init<>())
+      .def("cancel", &CancelToken::cancel)
+      .def("reset", &CancelToken::reset)
+      .def_property_readonly("cancelled", &CancelToken::cancelled);
+
+  py::enum_<QueueType>(m, "QueueType")
+      .value("Binary", QueueType::Binary)
+      .value("DAry", QueueType::DAry)
+      .value("Bucket", QueueType::Bucket)
+      .value("Radix", QueueType::Radix)
+      .value("Fifo", QueueType::Fifo)
       .export_values();
 
   py::class_<SearchResult>(m, "SearchResult")
-      .def_readonly("path", &SearchResult::path)
+      .def_property_readonly(
+          "path",
+          [](py::object self) {
+            auto arr = pathView(self.cast<const SearchResult&>().path, self);
+            arr.attr("flags").attr("writeable") = false;
+            return arr;
+          },
+          "Путь int32 ndarray (N, 2) из (x, y) поверх буфера результата, без "
+          "копии. Пустой (0, 2), если путь не найден или return_path=False")
+      .def_property_readonly(
+          "trace",
+          [](py::object self) {
+            const auto& trace = self.cast<const SearchResult&>().trace;
+            py::array_t<TraceRecord> arr(
+                {static_cast<py::ssize_t>(trace.size())},
+                {static_cast<py::ssize_t>(sizeof(TraceRecord))},
+                trace.empty() ? nullptr : trace.data(), self);
+            arr.attr("flags").attr("writeable") = false;
+            return arr;
+          },
+          "Трасса раскрытий (find_path с trace_stride > 0): структурный "
+          "массив step, cell (y * width + x), g, f (float32; у BFS — NaN), "
+          "без копии")
       .def_readonly("found", &SearchResult::found)
       .def_readonly("expanded_nodes", &SearchResult::expanded_nodes)
       .def_readonly("path_length", &SearchResult::path_length)
-      .def_readonly("execution_time", &SearchResult::execution_time);
+      .def_readonly("execution_time", &SearchResult::execution_time)
+      .def_readonly("queue", &SearchResult::queue)
+      .def_readonly("stop_reason", &SearchResult::stop_reason)
+      .def_property_readonly(
+          "stats", [](const SearchResult& r) { return statsToDict(r.stats); },
+          "Подробные счетчики (generated, pushes, stale_pops, reexpansions, "
+          "peak_open, touched; setup_time / search_time / reconstruct_time в "
+          "секундах). None, если модуль собран без PATHFINDING_STATS")
+      .def_property_readonly(
+          "solutions",
+          [](const SearchResult& r) { return solutionsToArray(r.solutions); },
+          "ARA*: улучшения пути по порядку, ndarray (K, 3) — время (с), "
+          "длина, доказанная граница субоптимальности");
 
   py::class_<PathPlanner>(m, "PathPlanner")
-      .def(py::init<int, int, const std::vector<int>&>())
-      .def("find_path", &PathPlanner::findPath, py::arg("start_x"),
+      .def(py::init(&plannerFromBuffer), py::arg("width"), py::arg("height"),
+           py::arg("grid"))
+      .def(py::init<int, int, const std::vector<int>&>(), py::arg("width"),
+           py::arg("height"), py::arg("grid"))
+      .def("find_path", &findPath, py::arg("start_x"),
            py::arg("start_y"), py::arg("goal_x"), py::arg("goal_y"),
            py::arg("algo"), py::arg("heuristic") = HeuristicType::Manhattan,
-           py::arg("weight") = 1.0, py::arg("connectivity") = 4)
-      .def("get_cost2go_window", &PathPlanner::getCost2GoWindow,
+           py::arg("weight") = 1.0, py::arg("connectivity") = 4,
+           py::arg("queue") = QueueType::Binary, py::arg("deadline_ms") = 0.0,
+           py::arg("max_expansions") = 0, py::arg("cancel") = nullptr,
+           py::arg("return_path") = true, py::arg("trace_stride") = 0,
+           "Поиск пути. Бюджет (0 / None — без ограничения): max_expansions, "
+           "deadline_ms, cancel (CancelToken). Если он кончился, stop_reason "
+           "!= Finished, а path ведет к лучшей клетке фронта (у DStarLite "
+           "path пустой и path_length = 0: поиск идет от цели, пути от "
+           "старта еще нет; следующий запрос продолжит работу). "
+           "return_path=False — путь не собирается (только длина и раскрытия). "
+           "trace_stride=k — в result.trace каждое k-е раскрытие")
+      .def("find_paths", &findPaths, py::arg("starts"), py::arg("goals"),
+           py::arg("algo"), py::arg("heuristic") = HeuristicType::Manhattan,
+           py::arg("weight") = 1.0, py::arg("connectivity") = 4,
+           py::arg("threads") = 0, py::arg("return_paths") = false,
+           py::arg("queue") = QueueType::Binary, py::arg("deadline_ms") = 0.0,
+           py::arg("max_expansions") = 0, py::arg("cancel") = nullptr,
+           "Пакетный поиск в нескольких потоках без GIL. Бюджет — на каждую "
+           "задачу, cancel — на весь пакет. "
+           "Возвращает dict колонок: found, path_length, expanded_nodes, "
+           "execution_time, stop_reason (int(StopReason)), paths, queue, "
+           "stats (колонки счетчиков или None; -1 — счетчик алгоритмом не ведется) "
+           "(+ solutions для ARA*)")
+      .def_static("resolve_queue", &PathPlanner::resolveQueue,
+                  py::arg("queue"), py::arg("algo"), py::arg("heuristic"),
+                  py::arg("connectivity"),
+                  "Какой открытый список ядро реально использует для запроса")
+      .def("get_cost2go_window", &getCost2GoWindow,
            py::arg("agent_x"), py::arg("agent_y"), py::arg("goal_x"),
            py::arg("goal_y"), py::arg("radius"), py::arg("connectivity") = 4, 
-           py::arg("fast_break") = true);
+           py::arg("fast_break") = true, py::arg("queue") = QueueType::Binary,
+           py::arg("max_expansions") = 0, py::arg("deadline_ms") = 0.0,
+           py::arg("cancel") = nullptr, py::arg("with_status") = false,
+           "Окно cost2go вокруг агента, -1 — стена или недостижимо. С бюджетом "
+           "клетки, до которых поиск не дошел, — NaN; with_status=True "
+           "возвращает (окно, dict stop_reason/expanded_nodes/execution_time)")
+      .def("get_cost2go_windows", &getCost2GoWindows, py::arg("agents"),
+           py::arg("goals"), py::arg("radius"), py::arg("connectivity") = 4,
+           py::arg("fast_break") = true, py::arg("threads") = 0,
+           py::arg("queue") = QueueType::Binary,
+           "Пакет окон cost2go в нескольких потоках без GIL: одна обратная "
+           "Дейкстра на каждую уникальную цель. Возвращает float32 ndarray "
+           "(B, side, side), -1 — стена или недостижимо")
+      .def("distance_field", &distanceField, py::arg("source"),
+           py::arg("connectivity") = 4, py::arg("max_cost") = py::none(),
+           py::arg("dtype") = "float32",
+           "Точные расстояния от source=(x, y) до всех клеток одной Дейкстрой: "
+           "float32 (H, W), inf — стена, недостижимо или дальше max_cost. "
+           "dtype=\"uint16\" — кортеж (поле, unit): расстояние ~ q * unit, "
+           "65535 — недостижимо")
+      .def("distances_to_many", &distancesToMany, py::arg("source"),
+           py::arg("targets"), py::arg("connectivity") = 4,
+           py::arg("max_cost") = py::none(),
+           "Расстояния от source=(x, y) до targets (N, 2) одной Дейкстрой, "
+           "которая останавливается, когда закрыты все достижимые цели. "
+           "float64 (N,), inf — недостижимо")
+      .def("set_cells", &setCells, py::arg("xs"), py::arg("ys"),
+           py::arg("values"),
+           "Пакетная правка карты: клетка (xs[i], ys[i]) становится стеной при "
+           "values[i] != 0. Маски и компоненты чинятся локально, решения "
+           "DStarLite — следующим запросом. Возвращает число изменившихся клеток")
+      .def("component_labels",
+           [](const PathPlanner& planner, int connectivity) {
+             const int* labels = planner.componentLabels(connectivity);
+             py::array_t<int> out({static_cast<py::ssize_t>(planner.height()),
+                                   static_cast<py::ssize_t>(planner.width())});
+             std::copy(labels, labels + out.size(), out.mutable_data());
+             return out;
+           },
+           py::arg("connectivity") = 4,
+           "Метки компонент связности (H, W), -1 — стена")
+      .def("save", &PathPlanner::save, py::arg("path"),
+           "Снимок планировщика (.pfs): карта, маски, компоненты, таблица JPS+, "
+           "ориентиры и CPD одним файлом")
+      .def_static("load", &PathPlanner::load, py::arg("path"),
+                  py::arg("mmap") = true,
+                  py::call_guard<py::gil_scoped_release>(),
+                  "Планировщик из снимка. mmap=True — массивы смотрят в страницы "
+                  "файла только для чтения (общие для всех процессов), правки "
+                  "карты копируют задетые массивы в память процесса")
+      .def("build_landmarks", &PathPlanner::buildLandmarks,
+           py::arg("count") = 8, py::arg("connectivity") = 8,
+           py::call_guard<py::gil_scoped_release>(),
+           "Выбор K ориентиров (farthest-point) и расчет их полей расстояний "
+           "для эвристики HeuristicType.Landmark")
+      .def("save_landmarks", &PathPlanner::saveLandmarks, py::arg("path"))
+      .def("load_landmarks", &PathPlanner::loadLandmarks, py::arg("path"),
+           py::arg("mmap") = true)
+      .def("landmark_info", [](const PathPlanner& planner) {
+        const LandmarkTable& table = planner.landmarkTable();
+        py::dict out;
+        py::list landmarks;
+        for (int id : table.landmarks())
+          landmarks.append(py::make_tuple(id % planner.width(), id / planner.width()));
+        out["count"] = table.count();
+        out["connectivity"] = table.connectivity();
+        out["landmarks"] = landmarks;
+        out["bytes"] = table.bytes();
+        out["mmap"] = table.mapped();
+        return out;
+      })
+      .def("build_cpd", &PathPlanner::buildCPD, py::arg("connectivity") = 8,
+           py::arg("threads") = 0, py::call_guard<py::gil_scoped_release>(),
+           "Построение таблицы первых ходов (CPD) для AlgorithmType.CPD: "
+           "по одной Дейкстре на каждую свободную клетку, в threads потоках")
+      .def("save_cpd", &PathPlanner::saveCPD, py::arg("path"))
+      .def("load_cpd", &PathPlanner::loadCPD, py::arg("path"),
+           py::arg("mmap") = true)
+      .def("cpd_info", [](const PathPlanner& planner) {
+        const FirstMoveTable& table = planner.cpdTable();
+        py::dict out;
+        out["nodes"] = table.nodes();
+        out["runs"] = table.runCount();
+        out["connectivity"] = table.connectivity();
+        out["bytes"] = table.bytes();
+        out["mmap"] = table.mapped();
+        return out;
+      })
+      .def("set_hpa_options", &PathPlanner::setHierarchyOptions,
+           py::arg("cluster_size") = 16, py::arg("smooth") = true,
+           "Размер кластера HPA* и сглаживание пути (смена размера сбрасывает "
+           "иерархии)")
+      .def("build_hierarchy", &PathPlanner::ensureHierarchy,
+           py::arg("connectivity") = 8,
+           py::call_guard<py::gil_scoped_release>(),
+           "Построить иерархию HPA* заранее (иначе — при первом запросе)")
+      .def("rebuild_hierarchy", &PathPlanner::rebuildHierarchy, py::arg("x0"),
+           py::arg("y0"), py::arg("x1"), py::arg("y1"),
+           "Перестроить кластеры HPA*, задетые правкой прямоугольника клеток")
+      .def("hierarchy_info", [](const PathPlanner& planner, int connectivity) {
+             py::dict out;
+             const HierarchyGraph* graph = planner.hierarchy(connectivity);
+             if (!graph) return out;
+             out["cluster_size"] = graph->cluster_size;
+             out["clusters"] = graph->clusters_x * graph->clusters_y;
+             out["nodes"] = graph->nodeCount();
+             out["edges"] = graph->edgeCount();
+             out["build_time"] = graph->build_time;
+             return out;
+           },
+           py::arg("connectivity") = 8)
+      .def("set_compact_mode", &PathPlanner::setCompactMode,
+           py::arg("enabled") = true, py::arg("direction_parents") = true,
+           py::arg("scale") = 0,
+           "Компактный режим для больших карт: BFS/Dijkstra/A*/WA* на целых "
+           "стоимостях (uint32, 1/scale), куча из 12-байтовых записей, предок — "
+           "3 бита направления. scale=0 — подобрать по размеру карты")
+      .def("memory_info", [](const PathPlanner& planner) {
+        MemoryFootprint m = planner.memoryFootprint();
+        const CompactOptions& compact = planner.compactOptions();
+        py::dict out;
+        out["mode"] = !compact.enabled ? "standard"
+                      : compact.direction_parents ? "compact_dir" : "compact";
+        out["scale"] = compact.enabled ? compact.scale : 0;
+        out["grid"] = m.grid;
+        out["components"] = m.components;
+        out["search"] = m.search;
+        out["cost2go_cache"] = m.cost2go_cache;
+        out["landmarks"] = m.landmarks;
+        out["cpd"] = m.cpd;
+        out["jump_table"] = m.jump_table;
+        out["hierarchy"] = m.hierarchy;
+        out["snapshot"] = m.snapshot;
+        out["snapshot_mmap"] = planner.snapshotImage().mapped();
+        out["total"] = m.grid + m.components + m.search + m.cost2go_cache +
+                       m.landmarks + m.cpd + m.jump_table + m.hierarchy +
+                       m.snapshot;
+        py::dict per_context;
+        per_context["standard"] = m.context_standard;
+        per_context["compact"] = m.context_compact;
+        per_context["compact_dir"] = m.context_compact_dir;
+        out["context_bytes"] = per_context;
+        return out;
+      },
+      "Память планировщика по частям (байты). context_bytes — рабочая память "
+      "одного потока на этой карте в каждом режиме; snapshot — снимок, из "
+      "которого загружен планировщик (при snapshot_mmap — общие страницы файла)")
+      .def("set_cost2go_cache_budget", &PathPlanner::setCost2GoCacheBudget,
+           py::arg("bytes"),
+           "Бюджет памяти кэша поиска cost2go по целям в байтах (0 — выключить)")
+      .def("clear_cost2go_cache", &PathPlanner::clearCost2GoCache)
+      .def("cost2go_cache_stats", [](const PathPlanner& planner) {
+        Cost2GoCacheStats stats = planner.cost2GoCacheStats();
+        py::dict out;
+        out["hits"] = stats.hits;
+        out["misses"] = stats.misses;
+        out["evictions"] = stats.evictions;
+        out["entries"] = stats.entries;
+        out["bytes"] = stats.bytes;
+        out["budget"] = stats.budget;
+        return out;
+      });
 }
\ No newline at end of file
@@ -0,0 +1,80 @@
+#pragma once
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <limits>
+
+// Почему поиск остановился. Finished — штатно (путь найден или его нет),
+// остальные — кончился бюджет: результат частичный
+enum class StopReason : uint8_t { Finished, MaxExpansions, Deadline, Cancelled };
+
+// Флаг кооперативной отмены: выставляется из любого потока, поиск проверяет
+// его вместе с часами и останавливается на ближайшей проверке
+class CancelToken {
+ public:
+  void cancel() { flag_.store(true, std::memory_order_relaxed); }
+  void reset() { flag_.store(false, std::memory_order_relaxed); }
+  bool cancelled() const { return flag_.load(std::memory_order_relaxed); }
+
+ private:
+  std::atomic<bool> flag_{false};
+};
+
+// Бюджет одного поиска. 0 / nullptr — без ограничения
+struct SearchBudget {
+  long long max_expansions = 0;
+  double deadline_ms = 0.0;
+  const CancelToken* cancel = nullptr;
+};
+
+// Проверка бюджета внутри цикла поиска. Лимит раскрытий — одно сравнение,
+// часы и флаг отмены читаются раз в kCheckMask + 1 вызовов. Без бюджета
+// остаются два хорошо предсказуемых перехода на раскрытие
+class BudgetGuard {
+ public:
+  using clock = std::chrono::steady_clock;
+
+  explicit BudgetGuard(const SearchBudget& budget)
+      : max_expansions_(budget.max_expansions > 0
+                            ? budget.max_expansions
+                            : std::numeric_limits<long long>::max()),
+        timed_(budget.deadline_ms > 0.0 || budget.cancel != nullptr),
+        has_deadline_(budget.deadline_ms > 0.0),
+        cancel_(budget.cancel) {
+    if (has_deadline_)
+      deadline_ = clock::now() + std::chrono::duration_cast<clock::duration>(
+                                     std::chrono::duration<double, std::milli>(
+                                         budget.deadline_ms));
+  }
+
+  // true — бюджет исчерпан (причина в reason()). expanded — уже раскрыто
+  inline bool exhausted(long long expanded) {
+    if (expanded >= max_expansions_) {
+      reason_ = StopReason::MaxExpansions;
+      return true;
+    }
+    if (!timed_ || (++ticks_ & kCheckMask) != 0) return false;
+    if (cancel_ && cancel_->cancelled()) {
+      reason_ = StopReason::Cancelled;
+      return true;
+    }
+    if (has_deadline_ && clock::now() >= deadline_) {
+      reason_ = StopReason::Deadline;
+      return true;
+    }
+    return false;
+  }
+
+  StopReason reason() const { return reason_; }
+
+ private:
+  static constexpr unsigned kCheckMask = 255;
+
+  long long max_expansions_;
+  bool timed_;
+  bool has_deadline_;
+  const CancelToken* cancel_;
+  clock::time_point deadline_{};
+  unsigned ticks_ = kCheckMask;  // Первая проверка часов — на первом вызове
+  StopReason reason_ = StopReason::Finished;
+};
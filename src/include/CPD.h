@@ -0,0 +1,86 @@
+#pragma once
+#include <algorithm>
+#include <cstdint>
+#include <ostream>
+#include <string>
+#include <vector>
+
+// Compressed Path Database (CPD): для каждой пары (a, b) — первый ход
+// кратчайшего пути из a в b. Путь восстанавливается поиском в таблице
+// шаг за шагом, без открытого списка.
+//
+// Свободные клетки нумеруются в порядке обхода в глубину (соседние клетки
+// получают близкие номера). Строка клетки a — первые ходы ко всем b в этом
+// порядке, сжатая в отрезки одинакового хода: uint32 = (номер начала << 3) | ход.
+// Клетки, из a недостижимые, и сама a — "любой ход" и просто продлевают
+// текущий отрезок. При нескольких кратчайших путях ход выбирается так,
+// чтобы отрезки были длиннее. Ход для b — последний отрезок с началом <= rank(b).
+//
+// Формат файла (.cpd, little-endian), пригоден для mmap:
+//   Header (32 байта), int32 rank[width * height] (-1 — стена),
+//   выравнивание до 8 байт, uint64 offsets[nodes + 1], uint32 runs[runs].
+class FirstMoveTable {
+ public:
+  static constexpr uint32_t kVersion = 1;
+
+  struct Header {
+    char magic[4];  // "PFCP"
+    uint32_t version;
+    int32_t width, height, connectivity, nodes;
+    uint64_t runs;
+  };
+
+  FirstMoveTable() = default;
+  FirstMoveTable(const FirstMoveTable&) = delete;
+  FirstMoveTable& operator=(const FirstMoveTable&) = delete;
+  ~FirstMoveTable() { reset(); }
+
+  bool empty() const { return runs_ == nullptr; }
+  int connectivity() const { return connectivity_; }
+  int nodes() const { return nodes_; }
+  uint64_t runCount() const { return run_count_; }
+  bool mapped() const { return map_addr_ != nullptr || attached_; }
+  // Таблица смотрит в чужую память (секция снимка), см. attach
+  bool attached() const { return attached_; }
+  const int32_t* rank() const { return rank_; }
+
+  // Первый ход (направление 0..7) из a в b. Обе клетки свободны и в одной компоненте
+  inline int firstMove(int a, int b) const {
+    const int32_t ra = rank_[a];
+    const uint32_t* begin = runs_ + offsets_[ra];
+    const uint32_t* end = runs_ + offsets_[ra + 1];
+    const uint32_t key = (static_cast<uint32_t>(rank_[b]) << 3) | 7u;
+    return *(std::upper_bound(begin, end, key) - 1) & 7;
+  }
+
+  // rows[r] — сжатая строка клетки с номером r
+  void assign(int connectivity, std::vector<int32_t> rank,
+              const std::vector<std::vector<uint32_t>>& rows);
+
+  // Бросают std::runtime_error при ошибке ввода-вывода / несовпадении карты
+  void save(const std::string& path, int width, int height) const;
+  void load(const std::string& path, int width, int height, bool use_mmap);
+  // То же в поток / из образа файла в памяти: attach ничего не копирует и не
+  // освобождает, память base должна пережить таблицу (или следующий reset)
+  void save(std::ostream& out, int width, int height) const;
+  void attach(const char* base, size_t size, int width, int height);
+
+  size_t bytes() const;
+  void reset();
+
+ private:
+  int connectivity_ = 0;
+  int nodes_ = 0;
+  uint64_t run_count_ = 0;
+  const int32_t* rank_ = nullptr;
+  const uint64_t* offsets_ = nullptr;
+  const uint32_t* runs_ = nullptr;
+
+  // Если таблица в памяти процесса
+  std::vector<int32_t> rank_storage_;
+  std::vector<uint64_t> offset_storage_;
+  std::vector<uint32_t> run_storage_;
+  void* map_addr_ = nullptr;  // Если файл отображен через mmap
+  size_t map_size_ = 0;
+  bool attached_ = false;
+};
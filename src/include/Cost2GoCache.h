@@ -0,0 +1,149 @@
+#pragma once
+#include <cstdint>
+#include <limits>
+#include <list>
+#include <memory>
+#include <mutex>
+#include <unordered_map>
+#include <vector>
+
+#include "OpenList.h"
+
+// Приостановленная обратная Дейкстра от одной цели (для cost2go).
+// Хранит частичное поле расстояний и открытый список: следующий запрос с той
+// же целью читает уже закрытые клетки и продолжает поиск только при нужде.
+struct Cost2GoState {
+  int goal_id;
+  std::vector<double> dist;       // inf — клетка еще не достигнута
+  std::vector<uint64_t> settled;  // Бит = расстояние окончательное
+  BinaryHeapQueue open;           // Открытый список между запросами
+
+  Cost2GoState(int cells, int goal_id)
+      : goal_id(goal_id),
+        dist(cells, std::numeric_limits<double>::infinity()),
+        settled((static_cast<size_t>(cells) + 63) / 64, 0) {
+    dist[goal_id] = 0.0;
+    open.push({goal_id, 0.0, 0.0});
+  }
+
+  inline bool isSettled(int id) const {
+    return (settled[id >> 6] >> (id & 63)) & 1;
+  }
+  inline void settle(int id) { settled[id >> 6] |= uint64_t(1) << (id & 63); }
+
+  size_t bytes() const {
+    return dist.capacity() * sizeof(double) +
+           settled.capacity() * sizeof(uint64_t) + open.capacity() * sizeof(Node);
+  }
+};
+
+struct Cost2GoCacheStats {
+  long long hits = 0;
+  long long misses = 0;
+  long long evictions = 0;
+  size_t entries = 0;
+  size_t bytes = 0;
+  size_t budget = 0;
+};
+
+// LRU-кэш состояний по ключу (цель, связность) с бюджетом памяти в байтах.
+// Сам кэш защищен мьютексом; состоянием владеет shared_ptr, поэтому вытеснение
+// не мешает потоку, который с ним сейчас работает. Бюджет 0 — кэш выключен.
+class Cost2GoCache {
+ public:
+  explicit Cost2GoCache(size_t budget) { stats_.budget = budget; }
+
+  bool enabled() const { return stats_.budget > 0; }
+
+  // Состояние для цели: из кэша (hit) или новое (miss)
+  std::shared_ptr<Cost2GoState> acquire(int goal_id, int connectivity,
+                                        int cells) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = index_.find(key(goal_id, connectivity));
+    if (it != index_.end()) {
+      stats_.hits++;
+      lru_.splice(lru_.begin(), lru_, it->second);  // Наверх как самый свежий
+      return it->second->state;
+    }
+    stats_.misses++;
+    // Состояние больше всего бюджета не кэшируем: поиск идет без сохранения
+    if (stateBytes(cells) > stats_.budget)
+      return std::make_shared<Cost2GoState>(cells, goal_id);
+    auto state = std::make_shared<Cost2GoState>(cells, goal_id);
+    lru_.push_front({key(goal_id, connectivity), state, state->bytes()});
+    index_[lru_.front().key] = lru_.begin();
+    stats_.bytes += lru_.front().bytes;
+    evict();
+    return state;
+  }
+
+  // После поиска состояние выросло: пересчитываем память и вытесняем лишнее
+  void release(int goal_id, int connectivity, const Cost2GoState& state) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = index_.find(key(goal_id, connectivity));
+    if (it == index_.end() || it->second->state.get() != &state) return;
+    stats_.bytes -= it->second->bytes;
+    it->second->bytes = state.bytes();
+    if (it->second->bytes > stats_.budget) {
+      // Выросло больше бюджета: убираем только его, остальные цели не трогаем
+      lru_.erase(it->second);
+      index_.erase(it);
+      stats_.evictions++;
+      return;
+    }
+    stats_.bytes += it->second->bytes;
+    evict();
+  }
+
+  void setBudget(size_t budget) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    stats_.budget = budget;
+    evict();
+  }
+
+  void clear() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    lru_.clear();
+    index_.clear();
+    stats_.bytes = 0;
+  }
+
+  Cost2GoCacheStats stats() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    Cost2GoCacheStats out = stats_;
+    out.entries = lru_.size();
+    return out;
+  }
+
+ private:
+  struct Entry {
+    int64_t key;
+    std::shared_ptr<Cost2GoState> state;
+    size_t bytes;
+  };
+
+  mutable std::mutex mutex_;
+  std::list<Entry> lru_;  // Начало — самые свежие
+  std::unordered_map<int64_t, std::list<Entry>::iterator> index_;
+  Cost2GoCacheStats stats_;
+
+  // Память нового состояния: поле расстояний и биты закрытых клеток
+  static size_t stateBytes(int cells) {
+    return static_cast<size_t>(cells) * sizeof(double) +
+           (static_cast<size_t>(cells) + 63) / 64 * sizeof(uint64_t);
+  }
+
+  static int64_t key(int goal_id, int connectivity) {
+    return static_cast<int64_t>(goal_id) * 16 + connectivity;
+  }
+
+  // Вытесняем самые старые записи, пока не уложимся в бюджет
+  void evict() {
+    while (!lru_.empty() && stats_.bytes > stats_.budget) {
+      stats_.bytes -= lru_.back().bytes;
+      index_.erase(lru_.back().key);
+      lru_.pop_back();
+      stats_.evictions++;
+    }
+  }
+};
@@ -0,0 +1,58 @@
+#pragma once
+#include <unordered_map>
+#include <vector>
+
+// Абстрактный граф HPA* (Botea et al.) для одной связности.
+//
+// Карта режется на кластеры cluster_size x cluster_size. На каждой границе
+// двух соседних кластеров ищутся отрезки, где обе стороны свободны; короткий
+// отрезок дает один переход (в середине), длинный — два (по краям). Переход —
+// пара узлов по обе стороны границы, связанная ребром стоимости 1.
+// Внутри кластера узлы связаны ребрами, стоимость которых — кратчайшее
+// расстояние, не выходящее за прямоугольник кластера.
+//
+// Узел может принадлежать сразу двум границам (угол кластера), поэтому у
+// узла есть счетчик ссылок: граница создает/удаляет только свои переходы.
+// Это позволяет перестраивать отдельные границы и кластеры при правках карты.
+struct AbstractEdge {
+  int to;
+  double cost;
+  bool inter;  // Переход через границу (true) или путь внутри кластера
+};
+
+struct HierarchyGraph {
+  int connectivity = 4;
+  int cluster_size = 16;
+  int clusters_x = 0, clusters_y = 0;
+  double build_time = 0.0;
+
+  std::vector<int> node_cell;   // Клетка узла (-1 — слот свободен)
+  std::vector<int> node_refs;   // Сколько границ ссылается на узел
+  std::vector<std::vector<AbstractEdge>> edges;
+  std::vector<int> free_slots;
+  std::unordered_map<int, int> cell_node;  // Клетка -> узел
+
+  std::vector<std::vector<int>> cluster_nodes;  // Узлы каждого кластера
+  // Переходы каждой границы: id = 2 * кластер + (0 — правая, 1 — нижняя)
+  std::vector<std::vector<std::pair<int, int>>> border_links;
+
+  int nodeCount() const {
+    return static_cast<int>(node_cell.size() - free_slots.size());
+  }
+  size_t edgeCount() const {
+    size_t total = 0;
+    for (const auto& list : edges) total += list.size();
+    return total;
+  }
+  // Оценка занятой памяти (без служебных данных аллокатора и хеш-таблицы)
+  size_t bytes() const {
+    size_t total = (node_cell.capacity() + node_refs.capacity() +
+                    free_slots.capacity()) * sizeof(int) +
+                   cell_node.size() * 2 * sizeof(int);
+    for (const auto& list : edges) total += list.capacity() * sizeof(AbstractEdge);
+    for (const auto& list : cluster_nodes) total += list.capacity() * sizeof(int);
+    for (const auto& list : border_links)
+      total += list.capacity() * sizeof(std::pair<int, int>);
+    return total;
+  }
+};
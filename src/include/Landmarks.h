@@ -0,0 +1,85 @@
+#pragma once
+#include <cstdint>
+#include <ostream>
+#include <string>
+#include <vector>
+
+// Таблица ALT (A*, Landmarks, Triangle inequality).
+// Для K ориентиров L хранятся расстояния d(L, v) до каждой клетки, и
+// |d(L, a) - d(L, b)| <= d(a, b) дает допустимую нижнюю оценку.
+//
+// Расстояния квантуются в uint16: d ~ q * unit, unit свой у каждого
+// ориентира (max_dist / 65534), 65535 — клетка недостижима из L.
+// Раскладка по клеткам: table[cell * K + k], т.е. все K значений клетки
+// лежат рядом (одна кэш-линия на клетку).
+//
+// Формат файла (.lm, little-endian), пригоден для mmap / np.memmap:
+//   Header (24 байта), int32 landmarks[K], float32 unit[K],
+//   uint16 table[width * height * K].
+class LandmarkTable {
+ public:
+  static constexpr uint16_t kUnreachable = 0xFFFF;
+  static constexpr uint32_t kVersion = 1;
+
+  struct Header {
+    char magic[4];  // "PFLM"
+    uint32_t version;
+    int32_t width, height, count, connectivity;
+  };
+
+  LandmarkTable() = default;
+  LandmarkTable(const LandmarkTable&) = delete;
+  LandmarkTable& operator=(const LandmarkTable&) = delete;
+  ~LandmarkTable() { reset(); }
+
+  bool empty() const { return data_ == nullptr; }
+  int count() const { return count_; }
+  int connectivity() const { return connectivity_; }
+  bool mapped() const { return map_addr_ != nullptr || attached_; }
+  // Таблица смотрит в чужую память (секция снимка), см. attach
+  bool attached() const { return attached_; }
+  const std::vector<int>& landmarks() const { return landmarks_; }
+
+  // Заполнение из посчитанных полей: fields[k][cell], inf — недостижимо
+  void assign(int cells, int connectivity, const std::vector<int>& landmarks,
+              const std::vector<std::vector<double>>& fields);
+
+  // Нижняя оценка d(a, b) по всем ориентирам (0, если оценок нет)
+  inline double bound(int a, int b) const {
+    const uint16_t* qa = data_ + static_cast<size_t>(a) * count_;
+    const uint16_t* qb = data_ + static_cast<size_t>(b) * count_;
+    double best = 0.0;
+    for (int k = 0; k < count_; ++k) {
+      if (qa[k] == kUnreachable || qb[k] == kUnreachable) continue;
+      // Квантование вниз: каждое значение занижено меньше чем на unit,
+      // поэтому вычитаем один шаг, чтобы оценка осталась допустимой
+      int diff = qa[k] > qb[k] ? qa[k] - qb[k] : qb[k] - qa[k];
+      double value = (diff - 1) * unit_[k];
+      if (value > best) best = value;
+    }
+    return best;
+  }
+
+  // Бросают std::runtime_error при ошибке ввода-вывода / несовпадении карты
+  void save(const std::string& path, int width, int height) const;
+  void load(const std::string& path, int width, int height, bool use_mmap);
+  // То же в поток / из образа файла в памяти: attach ничего не копирует и не
+  // освобождает, память base должна пережить таблицу (или следующий reset)
+  void save(std::ostream& out, int width, int height) const;
+  void attach(const char* base, size_t size, int width, int height);
+
+  size_t bytes() const;
+  void reset();
+
+ private:
+  int count_ = 0;
+  int connectivity_ = 0;
+  std::vector<int> landmarks_;
+  std::vector<float> unit_;
+  const uint16_t* data_ = nullptr;
+
+  std::vector<uint16_t> storage_;  // Если таблица в памяти процесса
+  void* map_addr_ = nullptr;       // Если файл отображен через mmap
+  size_t map_size_ = 0;
+  bool attached_ = false;
+};
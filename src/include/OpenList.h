@@ -0,0 +1,294 @@
+#pragma once
+#include <algorithm>
+#include <array>
+#include <cstdint>
+#include <cstring>
+#include <functional>
+#include <vector>
+
+// Типы открытого списка (выбираются на каждый запрос)
+//  Binary — бинарная куча с ленивым удалением (как было раньше), любой алгоритм
+//  DAry   — индексированная 4-арная куча с decrease-key, любой алгоритм
+//  Bucket — очередь Dial с корзинами ширины 1, только монотонные ключи g (h = 0)
+//  Radix  — монотонная radix-куча, только монотонные ключи g (h = 0)
+//  Fifo   — обычная очередь BFS (выставляется автоматически, не выбирается)
+enum class QueueType { Binary, DAry, Bucket, Radix, Fifo };
+
+// Узел для Priority Queue
+struct Node {
+  int id;
+  double f_score;
+  double g_score;  // Вернули g_score для корректной проверки lazy deletion
+
+  // Priority Queue в C++ по умолчанию max-heap, поэтому для min-heap (меньший f
+  // лучше) оператор должен возвращать true, если текущий элемент "больше"
+  // (имеет меньший приоритет)
+  bool operator>(const Node& other) const {
+    // Если f_score равны, можно сравнивать g_score для тай-брейкинга
+    // (опционально)
+    return f_score > other.f_score;
+  }
+};
+
+// Все очереди имеют одинаковый интерфейс: clear / push / pop / empty / size.
+// Память не освобождается между поисками (clear сохраняет capacity), так же как
+// эпохальные массивы в SearchContext.
+
+// --------------------------------------------------
+// Бинарная куча с ленивым удалением на собственном векторе
+// --------------------------------------------------
+class BinaryHeapQueue {
+ public:
+  void clear() { data_.clear(); }
+  bool empty() const { return data_.empty(); }
+  size_t size() const { return data_.size(); }
+  size_t capacity() const { return data_.capacity(); }
+  size_t bytes() const { return data_.capacity() * sizeof(Node); }
+
+  void push(const Node& node) {
+    data_.push_back(node);
+    std::push_heap(data_.begin(), data_.end(), std::greater<Node>());
+  }
+
+  Node pop() {
+    std::pop_heap(data_.begin(), data_.end(), std::greater<Node>());
+    Node top = data_.back();
+    data_.pop_back();
+    return top;
+  }
+
+ private:
+  std::vector<Node> data_;
+};
+
+// --------------------------------------------------
+// Индексированная 4-арная куча: у каждой клетки не больше одной записи,
+// повторный push той же клетки — это decrease-key. Устаревших записей нет.
+// --------------------------------------------------
+class IndexedDAryHeap {
+ public:
+  static constexpr int kArity = 4;
+
+  // pos_ — позиция клетки в куче (-1, если ее там нет). Размер = число клеток
+  void reserve(int cells) {
+    if (pos_.size() < static_cast<size_t>(cells)) pos_.assign(cells, -1);
+  }
+
+  // Сбрасываем только оставшиеся в куче клетки, а не весь pos_
+  void clear() {
+    for (const Node& node : heap_) pos_[node.id] = -1;
+    heap_.clear();
+  }
+  bool empty() const { return heap_.empty(); }
+  size_t size() const { return heap_.size(); }
+  size_t bytes() const {
+    return heap_.capacity() * sizeof(Node) + pos_.capacity() * sizeof(int);
+  }
+
+  void push(const Node& node) {
+    int p = pos_[node.id];
+    if (p < 0) {
+      heap_.push_back(node);
+      siftUp(static_cast<int>(heap_.size()) - 1);
+    } else if (node.f_score < heap_[p].f_score) {
+      heap_[p] = node;
+      siftUp(p);
+    } else {
+      heap_[p] = node;
+      siftDown(p);
+    }
+  }
+
+  Node pop() {
+    Node top = heap_[0];
+    pos_[top.id] = -1;
+    Node last = heap_.back();
+    heap_.pop_back();
+    if (!heap_.empty()) {
+      heap_[0] = last;
+      siftDown(0);
+    }
+    return top;
+  }
+
+ private:
+  std::vector<Node> heap_;
+  std::vector<int> pos_;
+
+  void siftUp(int i) {
+    Node node = heap_[i];
+    while (i > 0) {
+      int parent = (i - 1) / kArity;
+      if (!(heap_[parent] > node)) break;
+      heap_[i] = heap_[parent];
+      pos_[heap_[i].id] = i;
+      i = parent;
+    }
+    heap_[i] = node;
+    pos_[node.id] = i;
+  }
+
+  void siftDown(int i) {
+    Node node = heap_[i];
+    int n = static_cast<int>(heap_.size());
+    while (true) {
+      int first = i * kArity + 1;
+      if (first >= n) break;
+      int best = first;
+      int last = std::min(first + kArity, n);
+      for (int c = first + 1; c < last; ++c)
+        if (heap_[best] > heap_[c]) best = c;
+      if (!(node > heap_[best])) break;
+      heap_[i] = heap_[best];
+      pos_[heap_[i].id] = i;
+      i = best;
+    }
+    heap_[i] = node;
+    pos_[node.id] = i;
+  }
+};
+
+// --------------------------------------------------
+// Очередь Dial: корзины ширины 1 = минимальная стоимость ребра.
+// Все клетки текущей корзины уже имеют окончательное расстояние (любая
+// релаксация из той же корзины дает >= k + 1), поэтому порядок внутри корзины
+// не важен. Ребра {1, sqrt(2)} < 2, значит одновременно заняты не больше трех
+// соседних корзин — хватает кольца из 4.
+// --------------------------------------------------
+class BucketQueue {
+ public:
+  void clear() {
+    for (auto& bucket : buckets_) bucket.clear();
+    size_ = 0;
+  }
+  bool empty() const { return size_ == 0; }
+  size_t size() const { return size_; }
+  size_t bytes() const {
+    size_t total = 0;
+    for (const auto& bucket : buckets_) total += bucket.capacity() * sizeof(Node);
+    return total;
+  }
+
+  void push(const Node& node) {
+    long bucket = static_cast<long>(node.f_score);
+    if (size_ == 0) current_ = bucket;
+    buckets_[bucket & kMask].push_back(node);
+    size_++;
+  }
+
+  Node pop() {
+    while (buckets_[current_ & kMask].empty()) current_++;
+    auto& bucket = buckets_[current_ & kMask];
+    Node top = bucket.back();
+    bucket.pop_back();
+    size_--;
+    return top;
+  }
+
+ private:
+  static constexpr long kMask = 3;
+  std::array<std::vector<Node>, 4> buckets_;
+  long current_ = 0;
+  size_t size_ = 0;
+};
+
+// --------------------------------------------------
+// Монотонная radix-куча. Ключи — неотрицательные double: их битовое
+// представление упорядочено так же, как uint64. Корзина i хранит ключи, у
+// которых старший отличающийся от last_ бит равен i - 1.
+// --------------------------------------------------
+class RadixHeap {
+ public:
+  void clear() {
+    for (auto& bucket : buckets_) bucket.clear();
+    last_ = 0;
+    size_ = 0;
+  }
+  bool empty() const { return size_ == 0; }
+  size_t size() const { return size_; }
+  size_t bytes() const {
+    size_t total = 0;
+    for (const auto& bucket : buckets_) total += bucket.capacity() * sizeof(Node);
+    return total;
+  }
+
+  void push(const Node& node) {
+    // Ключ меньше last_ возможен только из-за погрешности double — прижимаем
+    uint64_t key = std::max(keyBits(node.f_score), last_);
+    buckets_[bucketIndex(key)].push_back(node);
+    size_++;
+  }
+
+  Node pop() {
+    if (buckets_[0].empty()) {
+      int i = 1;
+      while (buckets_[i].empty()) i++;
+      // Новый last_ — минимум корзины i, остальное раскладываем по младшим
+      uint64_t new_last = keyBits(buckets_[i][0].f_score);
+      for (const Node& node : buckets_[i])
+        new_last = std::min(new_last, keyBits(node.f_score));
+      last_ = new_last;
+      for (const Node& node : buckets_[i])
+        buckets_[bucketIndex(keyBits(node.f_score))].push_back(node);
+      buckets_[i].clear();
+    }
+    Node top = buckets_[0].back();
+    buckets_[0].pop_back();
+    size_--;
+    return top;
+  }
+
+ private:
+  std::array<std::vector<Node>, 65> buckets_;
+  uint64_t last_ = 0;
+  size_t size_ = 0;
+
+  static uint64_t keyBits(double key) {
+    uint64_t bits;
+    std::memcpy(&bits, &key, sizeof(bits));
+    return bits;
+  }
+  int bucketIndex(uint64_t key) const {
+    return key == last_ ? 0 : 64 - __builtin_clzll(key ^ last_);
+  }
+};
+
+// --------------------------------------------------
+// Куча компактного режима: ключи и g — целые в единицах 1/scale,
+// запись 12 байт вместо 24. При равных f первой идет клетка с большим g
+// (ближе к цели) — с целыми ключами равенства частые
+// --------------------------------------------------
+struct CompactNode {
+  uint32_t f;
+  uint32_t g;
+  int32_t id;
+};
+static_assert(sizeof(CompactNode) <= 16, "запись кучи компактного режима");
+
+class CompactHeap {
+ public:
+  void clear() { data_.clear(); }
+  bool empty() const { return data_.empty(); }
+  size_t size() const { return data_.size(); }
+  size_t bytes() const { return data_.capacity() * sizeof(CompactNode); }
+
+  void push(const CompactNode& node) {
+    data_.push_back(node);
+    std::push_heap(data_.begin(), data_.end(), Later());
+  }
+
+  CompactNode pop() {
+    std::pop_heap(data_.begin(), data_.end(), Later());
+    CompactNode top = data_.back();
+    data_.pop_back();
+    return top;
+  }
+
+ private:
+  struct Later {
+    bool operator()(const CompactNode& a, const CompactNode& b) const {
+      return a.f > b.f || (a.f == b.f && a.g < b.g);
+    }
+  };
+  std::vector<CompactNode> data_;
+};
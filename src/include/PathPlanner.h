@@ -3,90 +3,669 @@
 #include <cmath>
 #include <iostream>
 #include <limits>
+#include <memory>
+#include <cstdint>
 #include <queue>
+#include <string>
 #include <vector>
 
+#include "Budget.h"
+#include "CPD.h"
+#include "Cost2GoCache.h"
+#include "Hierarchy.h"
+#include "Landmarks.h"
+#include "OpenList.h"
+#include "Snapshot.h"
+#include "Stats.h"
+#include "Trace.h"
+
 // Типы алгоритмов
-enum class AlgorithmType { BFS, Dijkstra, AStar, WAStar };
+// JPS / JPSPlus работают только на 8-связной сетке (на 4-связной откатываемся на A*)
+// BiDijkstra / BiAStar — двунаправленные варианты (всегда оптимальные, вес не используется)
+// HPA — иерархический поиск по кластерам (почти оптимальный, эвристика и вес не используются)
+// CPD — путь по таблице первых ходов без поиска (без таблицы — обычный A* с Octile)
+// ARA — anytime ARA*: вес убывает от weight до 1, пока не кончится бюджет
+// DStarLite — D* Lite: повторный запрос к той же цели чинит прошлое решение
+// после setCells и сдвига старта (вес не используется)
+enum class AlgorithmType {
+  BFS, Dijkstra, AStar, WAStar, JPS, JPSPlus, BiDijkstra, BiAStar, HPA, CPD, ARA,
+  DStarLite
+};
 
 // Типы эвристик
-enum class HeuristicType { Manhattan, Euclidean, Octile, Zero };
+// Landmark — max(ALT-оценки по ориентирам, Octile); без построенных ориентиров = Octile
+enum class HeuristicType { Manhattan, Euclidean, Octile, Zero, Landmark };
+
+// Стоимость диагонального шага (sqrt(2)), та же константа, что и в getNeighbors
+constexpr double DIAG_COST = 1.41421356;
+
+// Направления: сначала ортогональные (Right, Down, Left, Up),
+// затем диагональные (Right-Down, Left-Down, Left-Up, Right-Up) — как в getNeighbors
+constexpr int DIR_DX[8] = {1, 0, -1, 0, 1, -1, -1, 1};
+constexpr int DIR_DY[8] = {0, 1, 0, -1, 1, 1, -1, -1};
+
+// Очередное улучшение пути в anytime-поиске: время от старта (с),
+// длина пути и доказанная граница субоптимальности (длина <= bound * оптимум)
+struct AnytimeSolution {
+  double time;
+  double cost;
+  double bound;
+};
 
 // Структура результата
+// Путь лежит парами (x, y) подряд: Python видит его как int32 (N, 2) без копии
+static_assert(sizeof(std::pair<int, int>) == 2 * sizeof(int32_t),
+              "path должен быть плотным массивом пар int32");
+
 struct SearchResult {
-  std::vector<std::pair<int, int>> path;
-  bool found;
-  int expanded_nodes;
-  double path_length;
-  double execution_time;
+  std::vector<std::pair<int, int>> path;  // Пусто, если путь не запрашивали
+  bool found = false;
+  int expanded_nodes = 0;
+  double path_length = 0.0;
+  double execution_time = 0.0;
+  QueueType queue = QueueType::Binary;  // Какой открытый список реально использовался
+  std::vector<AnytimeSolution> solutions;  // Только ARA*: все улучшения по порядку
+  // Не Finished — поиск прерван бюджетом. Тогда path ведет от старта к самой
+  // перспективной клетке фронта (минимальный ключ OPEN), path_length — ее g,
+  // а expanded_nodes / execution_time — сколько бюджета потрачено.
+  // ARA* и двунаправленный поиск, если путь до цели уже есть, отдают его
+  // (found = true, но оптимальность не доказана). HPA* и CPD бюджет не проверяют
+  StopReason stop_reason = StopReason::Finished;
+  SearchStats stats;  // Заполняется только в сборке с PATHFINDING_STATS
+  std::vector<TraceRecord> trace;  // Трасса раскрытий (find_path с trace_stride > 0)
+};
+
+// Итог одного окна cost2go (для вызовов с бюджетом)
+struct Cost2GoStatus {
+  StopReason stop_reason = StopReason::Finished;
+  int expanded_nodes = 0;
+  double execution_time = 0.0;
 };
 
-// Узел для Priority Queue
-struct Node {
+// Запись кучи D* Lite: ключ (k1, k2) сравнивается лексикографически.
+// version — номер вставки клетки: запись устарела, если клетку вставляли позже
+struct DStarEntry {
+  double k1, k2;
   int id;
-  double f_score;
-  double g_score;  // Вернули g_score для корректной проверки lazy deletion
+  int version;
+};
+
+// Состояние D* Lite (DStarLite.cpp) для одной цели. Поиск идет от цели к
+// старту: g / rhs — оценки расстояния до цели. Пока цель, связность и
+// эвристика те же, следующий запрос пересчитывает только вершины, которые
+// задели правки карты (pending) и сдвиг старта (km)
+struct DStarLiteState {
+  int goal = -1;
+  int connectivity = 0;
+  HeuristicType heuristic = HeuristicType::Octile;
+  int last_start = -1;  // Старт прошлого запроса
+  double km = 0.0;      // Поправка ключей за сдвиги старта
+  std::vector<double> g, rhs;
+  std::vector<int> version;      // Номер последней вставки клетки в кучу
+  std::vector<DStarEntry> open;  // Куча с ленивым удалением
+  std::vector<int> pending;      // Клетки, у которых поменялись ребра
+
+  size_t bytes() const {
+    return (g.capacity() + rhs.capacity()) * sizeof(double) +
+           (version.capacity() + pending.capacity()) * sizeof(int) +
+           open.capacity() * sizeof(DStarEntry);
+  }
+};
+
+// Рабочая память одного поиска (epoch counter).
+// Сетка общая и только читается, а вот эти массивы у каждого потока свои.
+// Массивы выделяются при первом поиске (beginSearch): в компактном режиме
+// обычные массивы не нужны, и планировщик их не держит
+struct SearchContext {
+  int cells;                          // Клеток карты
+  int current_search_id = 0;          // Глобальный счетчик эпохи
+  std::vector<double> dist_matrix;    // Переиспользуемый массив расстояний
+  std::vector<int> came_from;         // Переиспользуемый массив предков
+  std::vector<int> search_epoch;      // Массив "поколений" (когда клетка обновлялась)
+
+  // Кэшированные списки соседей (чтобы не создавать std::vector каждый шаг)
+  std::vector<int> neighbors_cache;
+  std::vector<double> costs_cache;
+
+  // Открытые списки живут между поисками, как и эпохальные массивы
+  BinaryHeapQueue binary_heap;
+  IndexedDAryHeap dary_heap;
+  BucketQueue bucket_queue;
+  RadixHeap radix_heap;
+  std::vector<int> fifo;  // Очередь BFS (голова — индекс внутри поиска)
+
+  // Метки CLOSED / INCONS для ARA* (номер итерации), выделяются при первом запросе
+  std::vector<int> closed_epoch;
+  std::vector<int> incons_epoch;
+  int anytime_id = 0;
+
+  // false — путь не собирается: нужны только длина и раскрытия (эксперименты,
+  // bench). Выставляет findPathImpl на каждый запрос
+  bool keep_path = true;
+
+  // Метки раскрытий для счетчика повторных раскрытий (только PATHFINDING_STATS)
+  ExpansionMarks expansion_marks;
+
+  // Трасса раскрытий: каждое trace_stride-е (0 — не пишется). Выставляет
+  // findPathImpl, после поиска буфер переезжает в SearchResult
+  int trace_stride = 0;
+  std::vector<TraceRecord> trace;
+
+  // Компактный режим (Compact.cpp): g в фиксированной точке, эпоха вместе
+  // с направлением от предка в одном uint32, куча из 12-байтовых записей
+  std::vector<uint32_t> compact_g;
+  std::vector<uint32_t> compact_stamp;   // (эпоха << 3) | направление от предка
+  std::vector<int32_t> compact_parent;   // Только без кодирования направлением
+  CompactHeap compact_open;
+  uint32_t compact_epoch = 0;
+
+  // Второй контекст для обратной стороны двунаправленного поиска.
+  // Создается при первом двунаправленном запросе
+  std::unique_ptr<SearchContext> backward;
+
+  // Решение D* Lite, которое чинится следующими запросами к той же цели.
+  // Создается при первом запросе DStarLite
+  std::unique_ptr<DStarLiteState> dstar;
+
+  explicit SearchContext(int size) : cells(size) {
+    neighbors_cache.reserve(8);
+    costs_cache.reserve(8);
+  }
+
+  // Начало нового поиска: все метки прошлых поисков становятся устаревшими.
+  // Счетчик int не переполняется: на пределе метки сбрасываются (раз в 2^31 поисков)
+  inline void beginSearch() {
+    if (search_epoch.empty()) {
+      dist_matrix.resize(cells);
+      came_from.resize(cells);
+      search_epoch.assign(cells, 0);
+    }
+    if (current_search_id == std::numeric_limits<int>::max()) {
+      std::fill(search_epoch.begin(), search_epoch.end(), 0);
+      current_search_id = 0;
+    }
+    current_search_id++;
+  }
+
+  // То же для компактного режима. На эпоху остается 29 бит: сброс раз в 2^29 поисков
+  static constexpr uint32_t kCompactEpochMax = (uint32_t(1) << 29) - 1;
+  inline void beginCompactSearch(bool direction_parents) {
+    if (compact_stamp.empty()) {
+      compact_g.resize(cells);
+      compact_stamp.assign(cells, 0);
+    }
+    if (!direction_parents && compact_parent.empty()) compact_parent.resize(cells);
+    if (direction_parents && !compact_parent.empty()) releaseVector(compact_parent);
+    if (compact_epoch == kCompactEpochMax) {
+      std::fill(compact_stamp.begin(), compact_stamp.end(), 0);
+      compact_epoch = 0;
+    }
+    compact_epoch++;
+  }
+
+  // Освободить память одного из режимов (и открытых списков к нему)
+  void releaseStandard() {
+    releaseVector(dist_matrix);
+    releaseVector(came_from);
+    releaseVector(search_epoch);
+    releaseVector(closed_epoch);
+    releaseVector(incons_epoch);
+    releaseVector(fifo);
+    binary_heap = BinaryHeapQueue();
+    dary_heap = IndexedDAryHeap();
+    bucket_queue = BucketQueue();
+    radix_heap = RadixHeap();
+    current_search_id = 0;
+    anytime_id = 0;
+    backward.reset();
+  }
+  void releaseCompact() {
+    releaseVector(compact_g);
+    releaseVector(compact_stamp);
+    releaseVector(compact_parent);
+    compact_open = CompactHeap();
+    compact_epoch = 0;
+  }
+
+  // Сколько памяти держит контекст (массивы и открытые списки)
+  size_t bytes() const;
+
+  // Вызывает fn(open_list) с очередью нужного типа (уже очищенной)
+  template <class Fn>
+  auto withOpenList(QueueType type, Fn&& fn) {
+    switch (type) {
+      case QueueType::DAry:
+        dary_heap.reserve(cells);
+        dary_heap.clear();
+        return fn(dary_heap);
+      case QueueType::Bucket:
+        bucket_queue.clear();
+        return fn(bucket_queue);
+      case QueueType::Radix:
+        radix_heap.clear();
+        return fn(radix_heap);
+      default:
+        binary_heap.clear();
+        return fn(binary_heap);
+    }
+  }
+
+  // То же для пары очередей одного типа: своя и очередь контекста other
+  template <class Fn>
+  auto withOpenListPair(QueueType type, SearchContext& other, Fn&& fn) {
+    switch (type) {
+      case QueueType::DAry:
+        dary_heap.reserve(cells);
+        other.dary_heap.reserve(other.cells);
+        dary_heap.clear();
+        other.dary_heap.clear();
+        return fn(dary_heap, other.dary_heap);
+      case QueueType::Bucket:
+        bucket_queue.clear();
+        other.bucket_queue.clear();
+        return fn(bucket_queue, other.bucket_queue);
+      case QueueType::Radix:
+        radix_heap.clear();
+        other.radix_heap.clear();
+        return fn(radix_heap, other.radix_heap);
+      default:
+        binary_heap.clear();
+        other.binary_heap.clear();
+        return fn(binary_heap, other.binary_heap);
+    }
+  }
+
+  SearchContext& backwardContext() {
+    if (!backward)
+      backward = std::make_unique<SearchContext>(cells);
+    return *backward;
+  }
+
+  // Умная обертка для получения расстояния с учетом эпохи
+  inline double getDistance(int id) const {
+    return (search_epoch[id] == current_search_id)
+            ? dist_matrix[id]
+            : std::numeric_limits<double>::infinity();
+  }
 
-  // Priority Queue в C++ по умолчанию max-heap, поэтому для min-heap (меньший f
-  // лучше) оператор должен возвращать true, если текущий элемент "больше"
-  // (имеет меньший приоритет)
-  bool operator>(const Node& other) const {
-    // Если f_score равны, можно сравнивать g_score для тай-брейкинга
-    // (опционально)
-    return f_score > other.f_score;
+ private:
+  template <class T>
+  static void releaseVector(std::vector<T>& v) {
+    std::vector<T>().swap(v);
   }
 };
 
+// Компактный режим: стоимости — целые в единицах 1/scale (ортогональный шаг
+// = scale, диагональ = diag = round(scale * sqrt(2))). Любой путь на сетке
+// складывается из этих двух чисел, поэтому g точен для выбранного масштаба
+struct CompactOptions {
+  bool enabled = false;
+  bool direction_parents = true;  // Предок — 3 бита направления, а не int32
+  uint32_t scale = 0;
+  uint32_t diag = 0;
+  double h_scale = 0.0;  // Множитель эвристики: допустима для целых стоимостей
+};
+
+// Память планировщика по частям (байты)
+struct MemoryFootprint {
+  size_t grid = 0;           // Биты препятствий и маски соседей
+  size_t components = 0;     // Метки компонент связности
+  size_t search = 0;         // Контексты поиска всех потоков (сейчас выделено)
+  size_t cost2go_cache = 0;
+  size_t landmarks = 0;
+  size_t cpd = 0;
+  size_t jump_table = 0;
+  size_t hierarchy = 0;
+  // Снимок, из которого загружен планировщик (при mmap — общие страницы
+  // файла). Массивы и таблицы, которые смотрят в снимок, в полях выше не
+  // учитываются, пока правки не скопируют их в память процесса
+  size_t snapshot = 0;
+  // Рабочая память одного потока на этой карте в каждом режиме
+  // (массивы клеток, без открытого списка)
+  size_t context_standard = 0;     // double g + int предок + int эпоха
+  size_t context_compact = 0;      // uint32 g + int32 предок + uint32 метка
+  size_t context_compact_dir = 0;  // uint32 g + uint32 метка с направлением
+};
+
+// Результат пакетного поиска, по колонкам (удобно отдавать в NumPy)
+struct BatchSearchResult {
+  std::vector<uint8_t> found;
+  std::vector<double> path_length;
+  std::vector<int> expanded_nodes;
+  std::vector<double> execution_time;
+  QueueType queue = QueueType::Binary;
+  std::vector<uint8_t> stop_reason;                      // StopReason по задачам
+  std::vector<SearchStats> stats;                        // Только PATHFINDING_STATS
+  std::vector<std::vector<AnytimeSolution>> solutions;  // Только для ARA*
+  std::vector<std::vector<std::pair<int, int>>> paths;  // пусто, если пути не нужны
+};
+
 class PathPlanner {
  public:
   PathPlanner(int width, int height, const std::vector<int>& grid);
+  // Карта из сырого буфера width * height байт (0 — свободно), без копии в int
+  PathPlanner(int width, int height, const uint8_t* cells);
+
+  int width() const { return width_; }
+  int height() const { return height_; }
+
+  // Метки компонент связности, width * height значений (-1 — стена).
+  // Считаются в конструкторе и поддерживаются setCells (номера меток после
+  // правок идут с пропусками)
+  const int* componentLabels(int connectivity) const {
+    return components_[connectivity == 8].data();
+  }
+
+  // Снимок (Snapshot.cpp): карта, маски, компоненты, таблица JPS+ (если
+  // построена), ориентиры и CPD (если есть) одним файлом, см. Snapshot.h.
+  // load с use_mmap отображает файл только для чтения и ничего не копирует;
+  // иерархии HPA* не сохраняются и строятся при первом запросе.
+  // Бросают std::runtime_error при ошибке ввода-вывода / неверном файле
+  void save(const std::string& path) const;
+  static std::unique_ptr<PathPlanner> load(const std::string& path,
+                                           bool use_mmap = true);
+  const SnapshotImage& snapshotImage() const { return snapshot_; }
+
+  // Пакетная правка карты (Dynamic.cpp): клетка (xs[i], ys[i]) становится
+  // стеной при values[i] != 0. Маски соседей и метки компонент обновляются
+  // локально вокруг правок, иерархии HPA* — по задетым кластерам; ориентиры,
+  // таблица CPD, таблица JPS+ и кэш cost2go сбрасываются. Решения D* Lite
+  // получают задетые клетки и чинятся при следующем запросе.
+  // Возвращает число клеток, которые реально поменялись.
+  // Нельзя вызывать одновременно с поиском
+  int setCells(const int* xs, const int* ys, const uint8_t* values, int count);
 
   SearchResult findPath(int start_x, int start_y, int goal_x, int goal_y,
                         AlgorithmType algo,
                         HeuristicType heuristic = HeuristicType::Manhattan,
-                        double weight = 1.0, int connectivity = 4);
+                        double weight = 1.0, int connectivity = 4,
+                        QueueType queue = QueueType::Binary,
+                        const SearchBudget& budget = {},
+                        bool keep_path = true, int trace_stride = 0);
+
+  // Пакет задач: starts/goals — массивы пар (x, y) длины 2 * count.
+  // Задачи раздаются потокам динамически, у каждого потока свой SearchContext.
+  // threads <= 0 — по числу ядер. Вызывать можно без GIL.
+  // Бюджет действует на каждую задачу отдельно, флаг отмены — на весь пакет.
+  BatchSearchResult findPaths(const int* starts, const int* goals, int count,
+                              AlgorithmType algo, HeuristicType heuristic,
+                              double weight, int connectivity, int threads,
+                              bool keep_paths,
+                              QueueType queue = QueueType::Binary,
+                              const SearchBudget& budget = {});
+
+  // С бюджетом обратная Дейкстра может остановиться раньше: клетки окна,
+  // до которых она не дошла (но достижимые из цели), получают NaN
   std::vector<std::vector<double>> getCost2GoWindow(int agent_x, int agent_y,
                                                     int goal_x, int goal_y,
                                                     int radius,
                                                     int connectivity, 
-                                                    bool fast_break);
+                                                    bool fast_break,
+                                                    QueueType queue = QueueType::Binary,
+                                                    const SearchBudget& budget = {},
+                                                    Cost2GoStatus* status = nullptr);
+
+  // Пакет окон cost2go: agents/goals — пары (x, y) длины 2 * count,
+  // out — count окон side x side (side = 2 * radius + 1), -1 — стена/недостижимо.
+  // Агенты с общей целью считаются одной обратной Дейкстрой, группы раздаются
+  // потокам. Вызывать можно без GIL
+  void getCost2GoWindows(const int* agents, const int* goals, int count,
+                         int radius, int connectivity, bool fast_break,
+                         int threads, float* out,
+                         QueueType queue = QueueType::Binary);
+
+  // Поля расстояний (Distances.cpp): одна Дейкстра от source вместо поиска
+  // на каждую пару. Граф неориентированный — это же расстояния до source.
+  // max_cost — дальше не искать (inf — вся компонента).
+  // distanceField: out — width * height значений, inf — стена, недостижимо
+  // или дальше max_cost. distancesToMany: targets — пары (x, y) длины
+  // 2 * count, поиск останавливается, как только закрыты все достижимые цели.
+  // Оба возвращают число раскрытых клеток
+  int distanceField(int source_x, int source_y, int connectivity,
+                    double max_cost, float* out);
+  int distancesToMany(int source_x, int source_y, const int* targets, int count,
+                      int connectivity, double max_cost, double* out);
+
+  // Кэш поиска cost2go по целям (LRU, бюджет в байтах, 0 — выключен).
+  // Пока кэш включен, окна считаются продолжением сохраненной обратной
+  // Дейкстры (открытый список — всегда Binary), параметр queue не используется
+  void setCost2GoCacheBudget(size_t bytes) { cost2go_cache_.setBudget(bytes); }
+  void clearCost2GoCache() { cost2go_cache_.clear(); }
+  Cost2GoCacheStats cost2GoCacheStats() const { return cost2go_cache_.stats(); }
+
+  // Ориентиры ALT (Landmarks.cpp): K ориентиров выбираются farthest-point,
+  // для каждого считается полное поле расстояний для данной связности.
+  // Таблица, построенная для 8-связности, допустима и для 4-связной сетки
+  void buildLandmarks(int count, int connectivity);
+  void saveLandmarks(const std::string& path) const;
+  // use_mmap — отобразить файл в память вместо чтения (таблица не копируется)
+  void loadLandmarks(const std::string& path, bool use_mmap = true);
+  const LandmarkTable& landmarkTable() const { return landmarks_; }
+
+  // Таблица первых ходов CPD (CPD.cpp): одна Дейкстра на каждую свободную
+  // клетку, строки считаются в threads потоках (<= 0 — по числу ядер).
+  // Годится для статичных карт, где важна задержка запроса, а не предрасчет
+  void buildCPD(int connectivity, int threads = 0);
+  void saveCPD(const std::string& path) const;
+  void loadCPD(const std::string& path, bool use_mmap = true);
+  const FirstMoveTable& cpdTable() const { return cpd_; }
+
+  // Иерархия HPA* (HPA.cpp) строится при первом запросе для каждой связности.
+  // Смена размера кластера сбрасывает уже построенные иерархии
+  void setHierarchyOptions(int cluster_size, bool smooth);
+  // Перестроить кластеры, задетые правкой клеток в прямоугольнике [x0..x1] x [y0..y1]
+  void rebuildHierarchy(int x0, int y0, int x1, int y1);
+  // nullptr — иерархия для этой связности еще не построена
+  const HierarchyGraph* hierarchy(int connectivity) const;
+  bool ensureHierarchy(int connectivity);
+
+  // Компактный режим для очень больших карт (Compact.cpp). BFS, Dijkstra,
+  // A* и WA* считают g в uint32 (единицы 1/scale), куча — 12-байтовые записи,
+  // предок — направление в метке эпохи (direction_parents) или индекс int32.
+  // scale <= 0 — наибольший (до 1024), при котором g не переполняется.
+  // Остальные алгоритмы работают на обычных массивах (выделяются по запросу).
+  // Переключение освобождает рабочую память другого режима
+  void setCompactMode(bool enabled, bool direction_parents = true,
+                      int scale = 0);
+  const CompactOptions& compactOptions() const { return compact_; }
+  MemoryFootprint memoryFootprint() const;
+
+  // Какой открытый список будет реально использован для такого запроса.
+  // Bucket и Radix требуют монотонных ключей (h = 0), иначе берется DAry;
+  // Bucket рассчитан на ребра < 2, поэтому для JPS заменяется на Radix;
+  // двунаправленному поиску нужен точный порядок — тоже Radix
+  static QueueType resolveQueue(QueueType requested, AlgorithmType algo,
+                                HeuristicType heuristic, int connectivity);
 
  private:
   int width_, height_;
-  const std::vector<int> grid_;
 
+  // Снимок, в который смотрят массивы ниже (пуст, если планировщик построен по карте)
+  SnapshotImage snapshot_;
+  PathPlanner(int width, int height);  // Для load: массивы заполняет снимок
 
-  // --------------------------------------------------
-  // --- НОВЫЕ ПОЛЯ ДЛЯ EPOCH COUNTER ---
-  int current_search_id_ = 0;          // Глобальный счетчик эпохи
-  std::vector<double> dist_matrix_;    // Переиспользуемый массив расстояний
-  std::vector<int> came_from_;         // Переиспользуемый массив предков
-  std::vector<int> search_epoch_;      // Массив "поколений" (когда клетка обновлялась)
+  // Препятствия упакованы в биты (1 = стена): в 32 раза меньше, чем vector<int>
+  SharedArray<uint64_t> obstacles_;
 
-  // Кэшированные списки соседей (чтобы не создавать std::vector каждый шаг)
-  std::vector<int> neighbors_cache_;
-  std::vector<double> costs_cache_;
+  // Маска соседей на клетку: бит d = шаг в направлении d разрешен
+  // (границы, стены и запрет corner cutting уже учтены).
+  // 8-связность — все 8 бит, 4-связность — младшие 4 бита
+  SharedArray<uint8_t> neighbor_masks_;
+  int dir_offset_[8];  // Сдвиг индекса клетки для каждого направления
 
-  // Умная обертка для получения расстояния с учетом эпохи
-  inline double getDistance(int id) const {
-    return (search_epoch_[id] == current_search_id_) 
-            ? dist_matrix_[id] 
-            : std::numeric_limits<double>::infinity();
+  inline bool isBlocked(int id) const {
+    return (obstacles_[id >> 6] >> (id & 63)) & 1;
   }
+  template <class Cell>
+  void loadObstacles(const Cell* cells);
+  uint8_t cellMask(int id) const;
+  void buildNeighborMasks();
+
+  // Компоненты связности: [0] — 4-связность, [1] — 8-связность.
+  // Старт и цель в разных компонентах — пути нет, искать не нужно
+  SharedArray<int> components_[2];
+  std::vector<int> component_sizes_[2];  // Клеток в компоненте (по метке)
+  std::vector<int> free_labels_[2];      // Метки исчезнувших компонент
+  void buildComponents();
 
-  // --------------------------------------------------
+  // --- Правки карты (Dynamic.cpp) ---
+  // Рабочие массивы локальной переразметки компонент (по запросу)
+  std::vector<int> relabel_epoch_, relabel_group_;
+  int relabel_id_ = 0;
+  void updateComponents(int c, int cell, const std::vector<int>& ring);
+  inline bool sameComponent(int a, int b, int connectivity) const {
+    const SharedArray<int>& labels = components_[connectivity == 8];
+    return labels[a] == labels[b];
+  }
+
+  // Контекст для одиночных запросов и контексты рабочих потоков findPaths
+  // (создаются один раз и переиспользуются между вызовами)
+  SearchContext ctx_;
+  std::vector<std::unique_ptr<SearchContext>> worker_contexts_;
+  void ensureWorkerContexts(int count);
 
   // Хелперы
-  double calculateHeuristic(int idx1, int idx2, HeuristicType type);
+  double calculateHeuristic(int idx1, int idx2, HeuristicType type) const;
 
   // Передаем векторы по ссылке, чтобы избежать re-allocation в цикле
   void getNeighbors(int current_id, int connectivity,
                     std::vector<int>& out_neighbors,
-                    std::vector<double>& out_costs);
+                    std::vector<double>& out_costs) const;
+
+  // Состояния обратной Дейкстры по целям. По умолчанию выключен: одно
+  // состояние — ~9 * W * H байт, включается set_cost2go_cache_budget
+  Cost2GoCache cost2go_cache_{0};
+
+  // Возвращают число закрытых клеток
+  template <class WindowCell>
+  int fillCost2GoWindows(SearchContext& ctx, int goal_x, int goal_y,
+                         const int* agents, const int* order, int count,
+                         int radius, int connectivity, bool fast_break,
+                         QueueType queue, BudgetGuard& guard, WindowCell&& cell);
+  template <class WindowCell>
+  int resumeCost2GoWindows(Cost2GoState& state, const int* agents,
+                           const int* order, int count, int radius,
+                           int connectivity, bool fast_break,
+                           BudgetGuard& guard, WindowCell&& cell) const;
+
+  SearchResult findPathImpl(SearchContext& ctx, int start_x, int start_y,
+                            int goal_x, int goal_y, AlgorithmType algo,
+                            HeuristicType heuristic, double weight,
+                            int connectivity, QueueType queue,
+                            const SearchBudget& budget, bool keep_path,
+                            int trace_stride = 0);
+  // Поиски с бюджетом: при остановке путь строится до клетки фронта
+  template <class OpenList>
+  SearchResult runAStarLike(SearchContext& ctx, OpenList& open_set,
+                            int start_id, int goal_id, HeuristicType h_type,
+                            double weight, int connectivity,
+                            const SearchBudget& budget) const;
+  SearchResult runBFS(SearchContext& ctx, int start_id, int goal_id,
+                      int connectivity, const SearchBudget& budget) const;
+
+  // --- Компактный режим (Compact.cpp) ---
+  CompactOptions compact_;
+  inline bool usesCompact(AlgorithmType algo) const {
+    return compact_.enabled &&
+           (algo == AlgorithmType::BFS || algo == AlgorithmType::Dijkstra ||
+            algo == AlgorithmType::AStar || algo == AlgorithmType::WAStar);
+  }
+  SearchResult runCompact(SearchContext& ctx, int start_id, int goal_id,
+                          HeuristicType h_type, double weight, int connectivity,
+                          const SearchBudget& budget) const;
+  SearchResult runCompactBFS(SearchContext& ctx, int start_id, int goal_id,
+                             int connectivity, const SearchBudget& budget) const;
+  // После правок карты: если самая большая компонента выросла и g может
+  // переполнить uint32, масштаб выбирается заново
+  void refreshCompactScale();
+  // Путь по предкам компактного режима и его настоящая длина
+  void traceCompactPath(const SearchContext& ctx, int start_id, int target,
+                        std::vector<std::pair<int, int>>& path,
+                        double& length) const;
+
+  // --- Ориентиры ALT (Landmarks.cpp) ---
+  LandmarkTable landmarks_;
+
+  // --- Поля расстояний (Distances.cpp) ---
+  // Дейкстра от source: settle(id, dist) вызывается, когда расстояние клетки
+  // окончательное (false — остановиться). Возвращает число раскрытых клеток
+  template <class Settle>
+  int dijkstraFrom(SearchContext& ctx, int source, int connectivity,
+                   double max_cost, Settle&& settle) const;
+  void computeDistanceField(SearchContext& ctx, int source, int connectivity,
+                            std::vector<double>& out) const;
+
+  // --- D* Lite (DStarLite.cpp) ---
+  SearchResult runDStarLite(SearchContext& ctx, int start_id, int goal_id,
+                            HeuristicType h_type, int connectivity,
+                            const SearchBudget& budget) const;
+
+  // --- Anytime ARA* (ARA.cpp) ---
+  // Без бюджета — до веса 1. После первого решения остановка по бюджету
+  // возвращает лучший найденный путь (found = true)
+  template <class OpenList>
+  SearchResult runARA(SearchContext& ctx, OpenList& open_set, int start_id,
+                      int goal_id, HeuristicType h_type, double weight,
+                      int connectivity, const SearchBudget& budget) const;
+
+  // --- Двунаправленный поиск (Bidirectional.cpp) ---
+  template <class OpenList>
+  SearchResult runBidirectional(SearchContext& fwd, SearchContext& bwd,
+                                OpenList& open_f, OpenList& open_b,
+                                int start_id, int goal_id,
+                                HeuristicType h_type, int connectivity,
+                                const SearchBudget& budget) const;
 
-  SearchResult runAStarLike(int start_id, int goal_id, HeuristicType h_type,
-                            double weight, int connectivity);
-  SearchResult runBFS(int start_id, int goal_id, int connectivity);
+  // --- Таблица первых ходов (CPD.cpp) ---
+  FirstMoveTable cpd_;
+  void computeFirstMoves(SearchContext& ctx, int source, int connectivity,
+                         std::vector<uint8_t>& first) const;
+  SearchResult runCPD(int start_id, int goal_id, bool keep_path) const;
+
+  // --- HPA* (HPA.cpp) ---
+  // [0] — 4-связность, [1] — 8-связность
+  std::unique_ptr<HierarchyGraph> hierarchies_[2];
+  int hpa_cluster_size_ = 16;
+  bool hpa_smooth_ = true;
+
+  inline int clusterOf(const HierarchyGraph& graph, int cell) const;
+  // Перестроить кластеры, в которые попадают клетки cells (с их границами)
+  void rebuildClusters(const std::vector<int>& cells);
+  int acquireNode(HierarchyGraph& graph, int cell);
+  void releaseNode(HierarchyGraph& graph, int node);
+  void buildBorder(HierarchyGraph& graph, int border);
+  void clearBorder(HierarchyGraph& graph, int border);
+  void buildIntraEdges(HierarchyGraph& graph, int cluster,
+                       SearchContext& ctx) const;
+  double clusterSearch(SearchContext& ctx, const HierarchyGraph& graph,
+                       int cluster, int source, int target,
+                       int& expanded) const;
+  bool straightWalk(int a, int b, int connectivity, std::vector<int>& out) const;
+  void smoothPath(std::vector<int>& cells, int connectivity, int lookahead) const;
+  SearchResult runHPA(SearchContext& ctx, int start_id, int goal_id,
+                      int connectivity) const;
+
+  // --- Jump Point Search (JPS.cpp) ---
+  // Таблица дистанций прыжков для JPS+: 8 значений на клетку.
+  // > 0  — через столько шагов в этом направлении лежит jump point
+  // <= 0 — столько шагов (по модулю) можно пройти до стены
+  SharedArray<int16_t> jump_table_;
+  bool jump_table_ready_ = false;
+
+  inline bool isFree(int x, int y) const {
+    return x >= 0 && x < width_ && y >= 0 && y < height_ &&
+           !isBlocked(toIndex(x, y));
+  }
+  bool isForcedStraight(int x, int y, int dx, int dy) const;
+  int jump(int x, int y, int dx, int dy, int goal_id) const;
+  int jumpPlus(int x, int y, int dir, int goal_x, int goal_y) const;
+  // Строит таблицу JPS+ при первом обращении. false — карта слишком большая для int16
+  bool ensureJumpTable();
+  int prunedDirections(int id, int parent_id, int out_dirs[8]) const;
+  template <class OpenList>
+  SearchResult runJPS(SearchContext& ctx, OpenList& open_set, int start_id,
+                      int goal_id, HeuristicType h_type, double weight,
+                      bool plus, const SearchBudget& budget) const;
 
   inline int toIndex(int x, int y) const { return y * width_ + x; }
   inline std::pair<int, int> toCoord(int index) const {
@@ -0,0 +1,115 @@
+#pragma once
+#include <cstddef>
+#include <cstdint>
+#include <string>
+#include <vector>
+
+// Снимок планировщика (.pfs, little-endian): все, что конструктор считает по
+// карте, одним файлом. Загрузка через mmap не копирует массивы, а смотрит в
+// страницы файла только для чтения, поэтому N процессов на одной карте держат
+// одну физическую копию (page cache).
+//
+// Формат: Header (24 байта), Section[sections] (по 24 байта), затем данные
+// секций, каждая с начала, кратного 64 байтам. Незнакомые секции при
+// загрузке пропускаются — новые секции не ломают старые файлы.
+namespace snapshot {
+
+constexpr uint32_t kVersion = 1;
+constexpr size_t kAlignment = 64;
+
+struct Header {
+  char magic[4];  // "PFSN"
+  uint32_t version;
+  int32_t width, height;
+  uint32_t sections;
+  uint32_t reserved;
+};
+
+struct Section {
+  uint32_t kind;
+  uint32_t reserved;
+  uint64_t offset;  // От начала файла
+  uint64_t size;    // Байт
+};
+
+enum SectionKind : uint32_t {
+  kObstacles = 1,    // uint64 биты препятствий
+  kMasks = 2,        // uint8 маски соседей
+  kLabels4 = 3,      // int32 метки компонент, 4-связность
+  kLabels8 = 4,      // то же для 8-связности
+  kSizes4 = 5,       // int32 клеток в компоненте (по метке)
+  kSizes8 = 6,
+  kFreeLabels4 = 7,  // int32 метки исчезнувших компонент
+  kFreeLabels8 = 8,
+  kJumpTable = 9,    // int16 таблица JPS+ (если была построена)
+  kLandmarks = 10,   // Таблица ориентиров в формате .lm
+  kCPD = 11,         // Таблица первых ходов в формате .cpd
+};
+
+}  // namespace snapshot
+
+// Байты снимка: отображение файла (mmap, только чтение) или копия в памяти
+// процесса. Массивы планировщика и таблицы смотрят в него, пока он жив
+class SnapshotImage {
+ public:
+  SnapshotImage() = default;
+  SnapshotImage(const SnapshotImage&) = delete;
+  SnapshotImage& operator=(const SnapshotImage&) = delete;
+  ~SnapshotImage() { reset(); }
+
+  // Бросает std::runtime_error при ошибке ввода-вывода
+  void open(const std::string& path, bool use_mmap);
+  void reset();
+
+  bool empty() const { return data_ == nullptr; }
+  bool mapped() const { return map_addr_ != nullptr; }
+  const char* data() const { return data_; }
+  size_t size() const { return size_; }
+
+ private:
+  const char* data_ = nullptr;
+  size_t size_ = 0;
+  std::vector<uint64_t> storage_;  // Если файл прочитан (выравнивание 8 байт)
+  void* map_addr_ = nullptr;       // Если файл отображен через mmap
+};
+
+// Массив клеток, который либо лежит в памяти процесса, либо смотрит в
+// снимок. Чтение — по указателю без проверок; первая запись в массив снимка
+// копирует его к себе (copy-on-write), так что правки карты после загрузки
+// через mmap работают, а файл и соседние процессы их не видят
+template <class T>
+class SharedArray {
+ public:
+  const T& operator[](size_t i) const { return data_[i]; }
+  const T* data() const { return data_; }
+  size_t size() const { return size_; }
+  bool empty() const { return size_ == 0; }
+  bool shared() const { return data_ != nullptr && storage_.empty(); }
+
+  void assign(size_t n, T value) {
+    storage_.assign(n, value);
+    data_ = storage_.data();
+    size_ = n;
+  }
+  // Смотреть в чужую память (она должна пережить массив или следующий assign)
+  void view(const T* data, size_t n) {
+    storage_.clear();
+    storage_.shrink_to_fit();
+    data_ = data;
+    size_ = n;
+  }
+  T* mutableData() {
+    if (shared()) {
+      storage_.assign(data_, data_ + size_);
+      data_ = storage_.data();
+    }
+    return storage_.data();
+  }
+  // Память процесса (у массива снимка — 0)
+  size_t bytes() const { return storage_.capacity() * sizeof(T); }
+
+ private:
+  const T* data_ = nullptr;
+  size_t size_ = 0;
+  std::vector<T> storage_;
+};
@@ -0,0 +1,129 @@
+#pragma once
+#include <algorithm>
+#include <chrono>
+#include <cstddef>
+#include <limits>
+#include <vector>
+
+// Подробные счетчики одного поиска. Собираются только в сборке с
+// -DPATHFINDING_STATS=ON; без нее все вызовы StatsCollector пустые и
+// компилятор выкидывает их из цикла поиска
+#ifdef PATHFINDING_STATS
+constexpr bool kStatsEnabled = true;
+#else
+constexpr bool kStatsEnabled = false;
+#endif
+
+// Счетчик, который алгоритм не ведет (HPA*, CPD, touched у D* Lite), равен
+// kUntracked: в Python это None / -1 в колонке, в CSV — пустая ячейка, а не 0
+struct SearchStats {
+  static constexpr long long kUntracked = -1;
+
+  long long generated = 0;     // Рассмотрено соседей (ребер)
+  long long pushes = 0;        // Вставок в открытый список
+  long long stale_pops = 0;    // Устаревших записей, пропущенных при извлечении
+  long long reexpansions = 0;  // Повторных раскрытий (несогласованная h, WA*)
+  long long peak_open = 0;     // Максимальный размер открытого списка
+  long long touched = 0;       // Клеток, впервые затронутых в этом поиске
+  double setup_time = 0.0;        // Подготовка: эпохи, очистка очереди (с)
+  double search_time = 0.0;       // Основной цикл (с)
+  double reconstruct_time = 0.0;  // Восстановление пути (с)
+};
+
+// Метки "уже раскрыта в этом поиске" для подсчета повторных раскрытий.
+// Живут в SearchContext; память выделяется только в сборке со статистикой
+struct ExpansionMarks {
+  std::vector<int> epoch_of;
+  int epoch = 0;
+
+  void begin(int cells) {
+    if (epoch_of.empty()) epoch_of.assign(cells, 0);
+    if (epoch == std::numeric_limits<int>::max()) {
+      std::fill(epoch_of.begin(), epoch_of.end(), 0);
+      epoch = 0;
+    }
+    epoch++;
+  }
+
+  // true — клетку в этом поиске уже раскрывали
+  bool mark(int id) {
+    bool again = epoch_of[id] == epoch;
+    epoch_of[id] = epoch;
+    return again;
+  }
+};
+
+// Сборщик статистики внутри поиска. Фазы: создание -> loop() (конец
+// подготовки) -> reconstruct() (конец цикла) -> finish() (путь готов)
+class StatsCollector {
+ public:
+  using clock = std::chrono::steady_clock;
+
+  StatsCollector() {
+    if constexpr (kStatsEnabled) t_setup_ = clock::now();
+  }
+
+  // Подключить метки раскрытий контекста (у двунаправленного поиска — обе стороны)
+  void track(ExpansionMarks& marks, int cells) {
+    if constexpr (kStatsEnabled) marks.begin(cells);
+  }
+
+  // Счетчик не ведется этим алгоритмом (вызывать до начала поиска)
+  void untracked(long long SearchStats::*field) {
+    if constexpr (kStatsEnabled) stats_.*field = SearchStats::kUntracked;
+  }
+  // Все счетчики: у алгоритма есть только время по фазам
+  void countersUntracked() {
+    for (auto field : {&SearchStats::generated, &SearchStats::pushes,
+                       &SearchStats::stale_pops, &SearchStats::reexpansions,
+                       &SearchStats::peak_open, &SearchStats::touched})
+      untracked(field);
+  }
+
+  void loop() {
+    if constexpr (kStatsEnabled) t_loop_ = clock::now();
+  }
+  void reconstruct() {
+    if constexpr (kStatsEnabled) t_reconstruct_ = clock::now();
+  }
+
+  inline void generated(int count = 1) {
+    if constexpr (kStatsEnabled) stats_.generated += count;
+  }
+  inline void pushed(size_t open_size) {
+    if constexpr (kStatsEnabled) {
+      stats_.pushes++;
+      stats_.peak_open = std::max<long long>(stats_.peak_open, open_size);
+    }
+  }
+  inline void stalePop() {
+    if constexpr (kStatsEnabled) stats_.stale_pops++;
+  }
+  inline void touched(bool first_time = true) {
+    if constexpr (kStatsEnabled) stats_.touched += first_time;
+  }
+  inline void expanded(ExpansionMarks& marks, int id) {
+    if constexpr (kStatsEnabled) stats_.reexpansions += marks.mark(id);
+  }
+
+  // Закрыть фазы и отдать счетчики. Фазы, которые поиск не отметил,
+  // сливаются с соседними
+  void finish(SearchStats& out) {
+    if constexpr (kStatsEnabled) {
+      auto end = clock::now();
+      if (t_loop_ == clock::time_point{}) t_loop_ = t_setup_;
+      if (t_reconstruct_ == clock::time_point{}) t_reconstruct_ = end;
+      auto seconds = [](clock::duration d) {
+        return std::chrono::duration<double>(d).count();
+      };
+      stats_.setup_time = seconds(t_loop_ - t_setup_);
+      stats_.search_time = seconds(t_reconstruct_ - t_loop_);
+      stats_.reconstruct_time = seconds(end - t_reconstruct_);
+      out = stats_;
+    }
+  }
+
+ private:
+  SearchStats stats_;
+  clock::time_point t_setup_{}, t_loop_{}, t_reconstruct_{};
+};
@@ -0,0 +1,53 @@
+#pragma once
+#include <algorithm>
+#include <cstdint>
+#include <limits>
+#include <vector>
+
+// Одна запись трассы раскрытий (16 байт). В Python — структурный массив
+// NumPy с полями step, cell, g, f
+struct TraceRecord {
+  int32_t step;  // Номер раскрытия в поиске (с 0)
+  int32_t cell;  // Индекс клетки y * width + x
+  float g;       // Стоимость от старта (NaN у BFS)
+  float f;       // Ключ открытого списка (NaN у BFS)
+};
+
+// Запись трассы в цикле поиска: каждое stride-е раскрытие. Заранее
+// резервируется немного (буфер уходит в SearchResult::trace целиком, а
+// короткому поиску не нужны мегабайты), дальше вектор растет сам: раскрытий
+// бывает и больше клеток (повторные раскрытия WA* и ARA*, две стороны
+// двунаправленного поиска). Без трассы (stride = 0) остается одна
+// предсказуемая проверка на раскрытие
+class TraceRecorder {
+ public:
+  static constexpr int kInitialRecords = 4096;  // 64 КБ
+
+  TraceRecorder(std::vector<TraceRecord>& out, int stride, int cells)
+      : out_(out), stride_(stride) {
+    if (stride_ <= 0) return;
+    out_.clear();
+    out_.reserve(std::min(cells / stride_ + 1, kInitialRecords));
+  }
+
+  inline void record(int cell, double g, double f) {
+    if (stride_ <= 0) return;
+    if (step_ == next_) {
+      out_.push_back({step_, cell, static_cast<float>(g), static_cast<float>(f)});
+      next_ += stride_;
+    }
+    step_++;
+  }
+
+  // BFS: ни g, ни ключа нет
+  inline void record(int cell) {
+    constexpr double nan = std::numeric_limits<double>::quiet_NaN();
+    record(cell, nan, nan);
+  }
+
+ private:
+  std::vector<TraceRecord>& out_;
+  int stride_;
+  int32_t step_ = 0;
+  int32_t next_ = 0;  // Номер следующего записываемого раскрытия
+};